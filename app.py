@@ -1,20 +1,45 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, Response, stream_with_context, get_flashed_messages
+from flask_wtf.csrf import generate_csrf
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import zipfile
 import io
+import tempfile
+import hmac
 from datetime import datetime, timedelta
 from config import Config
-from models import db, Property, PropertyImage, PropertyVideo, PropertyDocument, Enquiry, Admin, User, Favorite, PropertyAlert, Booking, ActivityLog
-from forms import PropertyForm, EnquiryForm, LoginForm, UserRegistrationForm, UserLoginForm, PropertyAlertForm, BookingForm
+from models import db, Property, PropertyImage, PropertyVideo, SiteVideo, PropertyDocument, Enquiry, Admin, User, Favorite, PropertyAlert, Booking, ActivityLog, JobRun, add_missing_columns
+from forms import PropertyForm, EnquiryForm, LoginForm, UserRegistrationForm, UserLoginForm, PropertyAlertForm, BookingForm, PropertyImportForm
 from functools import wraps
 from flask_mail import Mail
 from helpers.notifications import send_email  # use send_email helper
-try:
-    import vercel_blob
-except ImportError:
-    vercel_blob = None  # Will use local storage if not available
-
+from helpers.bookings import reserve_slot, release_slot, get_slot_availability, backfill_booking_slots
+from helpers.favorites import current_favorite_ids, adjust_favorites_count, recount_favorites
+from helpers.dashboard import load_user_dashboard, favorites_page, bookings_page, invalidate_user_dashboard
+from helpers.bulk import detect_format, export_csv, export_jsonl, start_import, import_job_status
+from helpers.perf import PerfMonitor
+from helpers.profiler import SamplingProfiler, PROFILE_HEADER
+from helpers.templating import init_template_cache
+from helpers.assets import AssetPipeline
+from helpers.http_cache import HttpCache
+from helpers.compression import ResponseCompression
+from helpers.compare import requested_ids, get_comparison
+from helpers.facets import normalize_filters, get_facets
+from helpers.listings import listing_query, featured_query, recent_query, related_query
+from helpers.static_export import is_static_export, auth_only
+from helpers.alerts import deliver_property_alerts, send_alert_digests
+from helpers.scheduler import Scheduler
+from helpers.media import store_upload, collect_garbage, backfill_document_sizes
+from helpers.placeholders import upload_placeholder, backfill_image_placeholders
+from helpers.video import start_video_processing, process_pending_videos, hero_video
+from helpers.sitemap import sitemap_path, feed_path, refresh_sitemaps
+from helpers.brochures import pdf_enabled, get_brochure, download_name, stream_brochures_zip
+from helpers.ratelimit import RateLimiter
+from helpers.passwords import HashingBusy
+from helpers.sessions import init_sessions, rotate_session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 try:
     from slugify import slugify
 except ImportError:
@@ -30,10 +55,21 @@ except ImportError:
 app = Flask(__name__)
 handler = app
 app.config.from_object(Config)
+if app.config['PROXY_FIX_X_FOR']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+init_template_cache(app)
 
 # Initialize database and mail
 db.init_app(app)
 mail = Mail(app)
+perf = PerfMonitor(app, db)
+profiler = SamplingProfiler(app)
+assets = AssetPipeline(app)
+http_cache = HttpCache(app)
+compression = ResponseCompression(app)
+limiter = RateLimiter(app)
+sessions = init_sessions(app, db)
+scheduler = Scheduler(app)
 
 
 
@@ -41,6 +77,23 @@ mail = Mail(app)
 def slugify_filter(text):
     return slugify(text)
 
+@app.template_filter("media_url")
+def media_url_filter(url):
+    # Local uploads are stored as "uploads/..." under the static folder; Blob URLs are absolute
+    if url and url.startswith('uploads/'):
+        return url_for('static', filename=url)
+    return url
+
+@app.after_request
+def deliver_alerts(response):
+    # New listings, price drops and relistings committed by this request
+    try:
+        deliver_property_alerts()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Alert delivery error: {e}")
+    return response
+
 # Make datetime and other utilities available to all templates
 @app.context_processor
 def inject_globals():
@@ -55,12 +108,30 @@ def inject_globals():
 def inject_config():
     return {'config': app.config}
 
+# Favorite state for listing cards: favorite_ids() runs one query per request
+@app.context_processor
+def inject_favorites():
+    return {'favorite_ids': current_favorite_ids}
+
 # Hide website navbar/footer on all admin routes
 @app.context_processor
 def inject_admin_flag():
     from flask import request as _req
     return {'hide_chrome': _req.endpoint and _req.endpoint.startswith('admin')}
 
+# Pages rendered by export_static.py are the same for every visitor: both the
+# guest and the logged-in variants are written out and /api/session picks one
+@app.context_processor
+def inject_static_export():
+    return {'static_export': is_static_export(), 'auth_only': auth_only}
+
+@app.after_request
+def discard_export_session(response):
+    # CSRF tokens generated while pre-rendering must not create stored sessions
+    if is_static_export():
+        session.clear()
+    return response
+
 # Create upload directories (Vercel read-only filesystem safe)
 try:
     os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'images'), exist_ok=True)
@@ -93,31 +164,9 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
 def save_uploaded_file(file, subfolder='images'):
+    """Store an allowed upload by content hash; returns a StoredFile (url, content_hash, size_bytes) or None."""
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-        filename = timestamp + filename
-        
-        # Try Vercel Blob first (for production)
-        if vercel_blob and os.environ.get('BLOB_READ_WRITE_TOKEN'):
-            try:
-                file_content = file.read()
-                blob_filename = f"{subfolder}/{filename}"
-                response = vercel_blob.put(blob_filename, file_content, options={'access': 'public'})
-                return response['url']
-            except Exception as e:
-                print(f"Vercel Blob upload failed: {e}")
-                file.seek(0)  # Reset file pointer for fallback
-        
-        # Fallback to local storage (for development)
-        try:
-            target_dir = os.path.join(app.config['UPLOAD_FOLDER'], subfolder)
-            os.makedirs(target_dir, exist_ok=True)
-            filepath = os.path.join(target_dir, filename)
-            file.save(filepath)
-            return f'uploads/{subfolder}/{filename}'
-        except (OSError, PermissionError):
-            return None
+        return store_upload(file, subfolder)
     return None
 
 def log_activity(action, description='', user_type='guest', user_id=None):
@@ -139,6 +188,9 @@ def log_activity(action, description='', user_type='guest', user_id=None):
 with app.app_context():
     try:
         db.create_all()
+        if 'properties.favorites_count' in add_missing_columns():
+            recount_favorites()
+        backfill_booking_slots()
         print("Database tables initialized")
     except Exception as e:
         print(f"Database initialization: {e}")
@@ -147,9 +199,9 @@ with app.app_context():
 @app.route('/')
 def index():
     try:
-        featured_properties = Property.query.filter_by(featured=True, status='Available').limit(9).all()
-        recent_properties = Property.query.filter_by(status='Available').order_by(Property.created_at.desc()).limit(9).all()
-        return render_template('index.html', featured=featured_properties, recent=recent_properties)
+        featured_properties = featured_query().all()
+        recent_properties = recent_query().all()
+        return render_template('index.html', featured=featured_properties, recent=recent_properties, hero=hero_video())
     except Exception as e:
         print(f"Error in index route: {e}")
         return f"Error: {e}", 500
@@ -158,66 +210,41 @@ def index():
 def properties():
     try:
         page = request.args.get('page', 1, type=int)
-        property_type = request.args.get('type', '')
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        location = request.args.get('location', '')
         sort_by = request.args.get('sort', 'recent')
+        filters = normalize_filters(request.args)
         
-        query = Property.query.filter_by(status='Available')
+        properties = listing_query(filters, sort_by).paginate(page=page, per_page=app.config['PROPERTIES_PER_PAGE'], error_out=False)
         
-        if property_type:
-            query = query.filter_by(property_type=property_type)
-        if min_price is not None:
-            query = query.filter(Property.price >= min_price)
-        if max_price is not None:
-            query = query.filter(Property.price <= max_price)
-        if location:
-            query = query.filter(Property.location.contains(location))
-        
-        if sort_by == 'price_low':
-            query = query.order_by(Property.price.asc())
-        elif sort_by == 'price_high':
-            query = query.order_by(Property.price.desc())
-        elif sort_by == 'area_low':
-            query = query.order_by(Property.area.asc())
-        elif sort_by == 'area_high':
-            query = query.order_by(Property.area.desc())
-        else:
-            query = query.order_by(Property.created_at.desc())
-        
-        properties = query.paginate(page=page, per_page=app.config['PROPERTIES_PER_PAGE'], error_out=False)
-        
-        return render_template('properties.html', properties=properties)
+        return render_template('properties.html', properties=properties, facets=get_facets(filters))
     except Exception as e:
         print(f"Error in properties route: {e}")
         return f"Error: {e}", 500
 
+def record_view(property_id):
+    """Count a view without touching updated_at, which keys every page and brochure cache of the property."""
+    db.session.execute(db.update(Property).where(Property.id == property_id).values(
+        views=db.func.coalesce(Property.views, 0) + 1, updated_at=Property.updated_at))
+    db.session.commit()
+
 @app.route('/property/<int:id>')
 def property_detail(id):
     try:
+        # Pre-rendered pages count their views from the browser (api_property_view)
+        if not is_static_export():
+            record_view(id)
         property = Property.query.get_or_404(id)
         
-        # Increment views
-        property.views += 1
-        db.session.commit()
-        
         # Check if favorited by current user
-        is_favorited = False
-        if 'user_id' in session:
-            is_favorited = Favorite.query.filter_by(user_id=session['user_id'], property_id=id).first() is not None
+        is_favorited = id in current_favorite_ids()
         
         form = EnquiryForm()
         booking_form = BookingForm()
-        related_properties = Property.query.filter(
-            Property.id != id,
-            Property.property_type == property.property_type,
-            Property.status == 'Available'
-        ).limit(3).all()
+        related_properties = related_query(id, property.property_type).all()
         
-        log_activity('view_property', f'Viewed property: {property.title}', 
-                     'user' if 'user_id' in session else 'guest',
-                     session.get('user_id'))
+        if not is_static_export():
+            log_activity('view_property', f'Viewed property: {property.title}', 
+                         'user' if 'user_id' in session else 'guest',
+                         session.get('user_id'))
         
         return render_template('property_detail.html', 
                                property=property, 
@@ -236,8 +263,25 @@ def property_brochure(id):
     property = Property.query.get_or_404(id)
     return render_template('brochure.html', property=property)
 
+@app.route('/property/<int:id>/brochure.pdf')
+def property_brochure_pdf(id):
+    """Server-rendered brochure PDF, cached on disk until the property changes"""
+    property = Property.query.get_or_404(id)
+    if not pdf_enabled():
+        # No PDF engine on this deployment: the HTML brochure generates it in the browser
+        return redirect(url_for('property_brochure', id=id, download='true'))
+    try:
+        path = get_brochure(property)
+    except Exception as e:
+        print(f"Brochure rendering failed for property {id}: {e}")
+        return redirect(url_for('property_brochure', id=id, download='true'))
+    return send_file(path, mimetype='application/pdf',
+                     as_attachment=request.args.get('download') == 'true',
+                     download_name=download_name(property))
+
 # ENQUIRIES
 @app.route('/enquiry', methods=['POST'])
+@limiter.limit('5/10minutes')
 def submit_enquiry():
     form = EnquiryForm()
     if form.validate_on_submit():
@@ -291,6 +335,7 @@ def contact():
 
 # USER AUTHENTICATION ROUTES
 @app.route('/user/register', methods=['GET', 'POST'])
+@limiter.limit('5/hour', methods=('POST',))
 def user_register():
     if 'user_id' in session:
         return redirect(url_for('user_dashboard'))
@@ -307,7 +352,11 @@ def user_register():
             email=form.email.data,
             phone=form.phone.data
         )
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('user/register.html', form=form), 503
         db.session.add(user)
         db.session.commit()
         
@@ -319,6 +368,7 @@ def user_register():
     return render_template('user/register.html', form=form)
 
 @app.route('/user/login', methods=['GET', 'POST'])
+@limiter.limit('10/minute', methods=('POST',))
 def user_login():
     if 'user_id' in session:
         return redirect(url_for('user_dashboard'))
@@ -326,7 +376,14 @@ def user_login():
     form = UserLoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            authenticated = user is not None and user.check_password(form.password.data)
+        except HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'warning')
+            return render_template('user/login.html', form=form), 503
+        if authenticated:
+            # check_password may have upgraded the hash; log_activity commits it
+            rotate_session()
             session['user_id'] = user.id
             session['user_name'] = user.name
             session['user_email'] = user.email
@@ -354,19 +411,34 @@ def user_logout():
 @app.route('/user/dashboard')
 @user_login_required
 def user_dashboard():
-    user = User.query.get(session['user_id'])
-    favorites = Favorite.query.filter_by(user_id=session['user_id']).all()
-    alerts = PropertyAlert.query.filter_by(user_id=session['user_id']).all()
-    bookings = Booking.query.filter_by(user_id=session['user_id']).order_by(Booking.created_at.desc()).all()
+    data = load_user_dashboard(session['user_id'])
+    if data is None:
+        session.pop('user_id', None)
+        return redirect(url_for('user_login'))
     
-    return render_template('user/dashboard.html', 
-                           user=user, 
-                           favorites=favorites, 
-                           alerts=alerts,
-                           bookings=bookings)
+    return render_template('user/dashboard.html', **data)
+
+@app.route('/api/user/favorites')
+@user_login_required
+def api_user_favorites():
+    """Paginated JSON of the user's favorites (cached per user and page)"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    response = jsonify(favorites_page(session['user_id'], page))
+    response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
+@app.route('/api/user/bookings')
+@user_login_required
+def api_user_bookings():
+    """Paginated JSON of the user's bookings (cached per user and page)"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    response = jsonify(bookings_page(session['user_id'], page))
+    response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
 
 # FAVORITES ROUTES
 @app.route('/favorite/toggle/<int:property_id>', methods=['POST'])
+@limiter.limit('60/minute', scope='user', as_json=True)
 @user_login_required
 def toggle_favorite(property_id):
     property = Property.query.get_or_404(property_id)
@@ -374,20 +446,26 @@ def toggle_favorite(property_id):
     
     if favorite:
         db.session.delete(favorite)
+        adjust_favorites_count(property_id, -1)
         db.session.commit()
+        invalidate_user_dashboard(session['user_id'])
         log_activity('remove_favorite', f'Removed favorite: {property.title}', 'user', session['user_id'])
-        return jsonify({'status': 'removed', 'message': 'Removed from favorites'})
+        return jsonify({'status': 'removed', 'message': 'Removed from favorites', 'favorites_count': property.favorites_count})
     else:
         favorite = Favorite(user_id=session['user_id'], property_id=property_id)
         db.session.add(favorite)
+        adjust_favorites_count(property_id, 1)
         db.session.commit()
+        invalidate_user_dashboard(session['user_id'])
         log_activity('add_favorite', f'Added favorite: {property.title}', 'user', session['user_id'])
-        return jsonify({'status': 'added', 'message': 'Added to favorites'})
+        return jsonify({'status': 'added', 'message': 'Added to favorites', 'favorites_count': property.favorites_count})
 
 @app.route('/user/favorites')
 @user_login_required
 def user_favorites():
-    favorites = Favorite.query.filter_by(user_id=session['user_id']).all()
+    favorites = Favorite.query.filter_by(user_id=session['user_id']).options(
+        selectinload(Favorite.property).selectinload(Property.images)
+    ).all()
     return render_template('user/favorites.html', favorites=favorites)
 
 # PROPERTY ALERTS ROUTES
@@ -398,7 +476,8 @@ def create_alert():
     if form.validate_on_submit():
         alert = PropertyAlert(
             user_id=session['user_id'],
-            alert_type='new_property',
+            alert_type=form.alert_type.data,
+            frequency=form.frequency.data,
             property_type=form.property_type.data,
             min_price=form.min_price.data,
             max_price=form.max_price.data,
@@ -430,47 +509,9 @@ def delete_alert(alert_id):
     flash('Alert deleted successfully.', 'success')
     return redirect(url_for('user_dashboard'))
 
-def check_and_send_alerts(property):
-    """Notify users whose alerts match the new property (email + activity)."""
-    alerts = PropertyAlert.query.filter_by(is_active=True).all()
-    for alert in alerts:
-        match = True
-        if alert.property_type and alert.property_type != property.property_type:
-            match = False
-        if alert.min_price and property.price < alert.min_price:
-            match = False
-        if alert.max_price and property.price > alert.max_price:
-            match = False
-        if alert.location and alert.location.lower() not in (property.location or '').lower():
-            match = False
-
-        if match:
-            user = User.query.get(alert.user_id)
-            if user and user.email:
-                send_email(
-                    mail,
-                    subject="New property matches your alert",
-                    recipients=[user.email],
-                    body=f"""Hi {user.name},
-
-A new property matches your alert:
-
-Title: {property.title}
-Type: {property.property_type}
-Location: {property.location}
-Area: {property.area} sq ft
-Price: ₹{property.price:,.0f}
-
-View: {url_for('property_detail', id=property.id, _external=True)}
-
-You can manage alerts in your dashboard.
-""",
-                    category='alert'
-                )
-            log_activity('alert_triggered', f'Alert triggered for user {alert.user_id}: {property.title}', 'system')
-
 # BOOKING ROUTES
 @app.route('/booking/create/<int:property_id>', methods=['POST'])
+@limiter.limit('10/hour', scope='user')
 @user_login_required
 def create_booking(property_id):
     property = Property.query.get_or_404(property_id)
@@ -488,8 +529,15 @@ def create_booking(property_id):
             number_of_visitors=form.number_of_visitors.data,
             message=form.message.data
         )
+        reserve_slot(booking)
         db.session.add(booking)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('Sorry, that time slot was just booked. Please choose another slot.', 'error')
+            return redirect(url_for('property_detail', id=property_id))
+        invalidate_user_dashboard(booking.user_id)
         
         log_activity('create_booking', f'Booking for {property.title}', 'user', session['user_id'])
 
@@ -535,7 +583,9 @@ def cancel_booking(booking_id):
         return redirect(url_for('user_dashboard'))
     
     booking.status = 'Cancelled'
+    release_slot(booking)
     db.session.commit()
+    invalidate_user_dashboard(booking.user_id)
     
     log_activity('cancel_booking', f'Cancelled booking #{booking_id}', 'user', session['user_id'])
 
@@ -552,6 +602,18 @@ def cancel_booking(booking_id):
     return redirect(url_for('user_dashboard'))
 
 
+@app.route('/api/property/<int:id>/slots')
+def api_property_slots(id):
+    """JSON availability of site-visit slots for a property on ?date=YYYY-MM-DD"""
+    try:
+        day = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'date must be given as YYYY-MM-DD'}), 400
+    if db.session.get(Property, id) is None:
+        return jsonify({'error': 'Property not found'}), 404
+    return jsonify({'property_id': id, 'date': day.isoformat(), 'slots': get_slot_availability(id, day)})
+
+
 # BULK DOCUMENT DOWNLOAD
 @app.route('/property/<int:property_id>/documents/download-all')
 def download_all_documents(property_id):
@@ -588,6 +650,56 @@ def download_all_documents(property_id):
         download_name=download_name
     )
 
+# SITEMAP & FEED
+@app.route('/sitemap.xml')
+def sitemap():
+    """Sitemap (an index of shards past SITEMAP_SHARD_SIZE ids), served from cached files"""
+    return send_file(sitemap_path(), mimetype='application/xml')
+
+@app.route('/sitemap-<int:number>.xml')
+def sitemap_shard(number):
+    path = sitemap_path(number)
+    if path is None:
+        return 'Not found', 404
+    return send_file(path, mimetype='application/xml')
+
+@app.route('/feed.atom')
+def listings_feed():
+    """Atom feed of new and updated listings"""
+    return send_file(feed_path(), mimetype='application/atom+xml')
+
+@app.route('/robots.txt')
+def robots_txt():
+    sitemap_url = app.config['SITE_URL'].rstrip('/') + url_for('sitemap')
+    return Response(f'User-agent: *\nDisallow: /admin/\nDisallow: /user/\nSitemap: {sitemap_url}\n', mimetype='text/plain')
+
+# STATIC EXPORT (per-visitor state for pages pre-rendered by export_static.py)
+@app.route('/api/session')
+def api_session():
+    """Login state, favorites, a CSRF token and pending flash messages of the current visitor"""
+    user = None
+    if session.get('user_id'):
+        user = {'id': session['user_id'], 'name': session.get('user_name', ''), 'email': session.get('user_email', '')}
+    response = jsonify({
+        'user': user,
+        'admin': bool(session.get('admin_logged_in')) and user is None,
+        'favorite_ids': sorted(current_favorite_ids()),
+        'csrf_token': generate_csrf(),
+        'messages': get_flashed_messages(with_categories=True)
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/api/property/<int:id>/view', methods=['POST'])
+@limiter.limit('30/minute', as_json=True)
+def api_property_view(id):
+    """View beacon sent by pre-rendered property pages"""
+    record_view(id)
+    row = db.session.query(Property.views).filter(Property.id == id).first()
+    if row is None:
+        return jsonify({'error': 'Property not found'}), 404
+    return jsonify({'views': row.views})
+
 # MAP VIEW ROUTES
 @app.route('/map')
 def map_view():
@@ -645,13 +757,28 @@ def api_properties():
 @app.route('/compare')
 def compare_properties():
     """Property comparison page"""
-    return render_template('compare.html')
+    return render_template('compare.html', max_compare=app.config['COMPARE_MAX_PROPERTIES'])
+
+@app.route('/api/compare')
+def api_compare():
+    """Current data and derived metrics for up to COMPARE_MAX_PROPERTIES properties"""
+    ids = requested_ids()
+    if not ids:
+        return jsonify({'error': 'Pass property ids as ?ids=1,2,3'}), 400
+    try:
+        return jsonify(get_comparison(ids))
+    except Exception as e:
+        print(f"Error in API compare: {e}")
+        return jsonify({'error': 'Could not load comparison'}), 500
 
 # SOCIAL SHARING ROUTES
 @app.route('/share/<int:property_id>')
+@limiter.limit('20/hour', as_json=True)
 def share_property(property_id):
     property = Property.query.get_or_404(property_id)
-    property.shares += 1
+    # Counter only: keep updated_at, which versions every cache of the property
+    db.session.execute(db.update(Property).where(Property.id == property_id).values(
+        shares=db.func.coalesce(Property.shares, 0) + 1, updated_at=Property.updated_at))
     db.session.commit()
     
     log_activity('share_property', f'Shared property: {property.title}')
@@ -672,13 +799,16 @@ def download_document(doc_id):
 
 # ADMIN ROUTES
 @app.route('/admin/login', methods=['GET', 'POST'])
+@limiter.limit('5/minute', methods=('POST',))
 def admin_login():
     if 'admin_logged_in' in session:
         return redirect(url_for('admin_dashboard'))
     
     form = LoginForm()
     if form.validate_on_submit():
-        if form.username.data == app.config['ADMIN_USERNAME'] and form.password.data == app.config['ADMIN_PASSWORD']:
+        if hmac.compare_digest(form.username.data.encode(), app.config['ADMIN_USERNAME'].encode()) and \
+                hmac.compare_digest(form.password.data.encode(), app.config['ADMIN_PASSWORD'].encode()):
+            rotate_session()
             session['admin_logged_in'] = True
             session['admin_username'] = form.username.data
             
@@ -760,6 +890,58 @@ def admin_test_email():
 
 
 
+@app.route('/admin/perf')
+@admin_login_required
+def admin_perf():
+    """Per-endpoint query counts, DB/render time and recent slow statements"""
+    if request.args.get('format') == 'json':
+        return jsonify(perf.snapshot())
+    return render_template('admin/perf.html', perf=perf.snapshot(),
+                           enabled=app.config['PERF_INSTRUMENTATION'],
+                           slow_query_ms=app.config['SLOW_QUERY_MS'],
+                           profiles=profiler.summary(),
+                           profile_rate=app.config['PROFILE_SAMPLE_RATE'],
+                           profile_header=PROFILE_HEADER,
+                           profile_token=request.args.get('profile_token'),
+                           jobs=scheduler.status())
+
+@app.route('/admin/perf/reset', methods=['POST'])
+@admin_login_required
+def admin_perf_reset():
+    perf.reset()
+    profiler.reset()
+    flash('Performance counters reset.', 'success')
+    return redirect(url_for('admin_perf'))
+
+@app.route('/admin/perf/profile-token', methods=['POST'])
+@admin_login_required
+def admin_profile_token():
+    """Issue a signed token that forces profiling of requests sending it as a header"""
+    log_activity('profile_token', 'Issued request profiling token', 'admin')
+    return redirect(url_for('admin_perf', profile_token=profiler.make_token()))
+
+@app.route('/admin/perf/profiles.folded')
+@app.route('/admin/perf/profiles/<name>.folded')
+@admin_login_required
+def admin_download_profile(name=None):
+    """Collapsed stacks for flamegraph.pl / speedscope"""
+    filename = f"{name or 'all'}.folded"
+    return Response(profiler.collapsed(name), mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text endpoint (admin session or METRICS_TOKEN bearer token)"""
+    token = app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    authorized = 'admin_logged_in' in session or (
+        token and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:], token)
+    )
+    if not authorized:
+        return 'Unauthorized', 401
+    return Response(perf.prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/admin/seed-database')
 @admin_login_required
 def admin_seed_database():
@@ -970,7 +1152,74 @@ def admin_seed_database():
 def admin_properties():
     page = request.args.get('page', 1, type=int)
     properties = Property.query.order_by(Property.created_at.desc()).paginate(page=page, per_page=10, error_out=False)
-    return render_template('admin/properties.html', properties=properties)
+    return render_template('admin/properties.html', properties=properties, import_form=PropertyImportForm())
+
+@app.route('/admin/properties/export')
+@admin_login_required
+def admin_export_properties():
+    """Stream all properties with media as CSV or JSONL"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'jsonl'):
+        fmt = 'csv'
+    generator = export_csv() if fmt == 'csv' else export_jsonl()
+    log_activity('export_properties', f'Exported properties as {fmt.upper()}', 'admin')
+    filename = f"properties_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(generator),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/admin/properties/brochures')
+@admin_login_required
+def admin_export_brochures():
+    """Stream brochure PDFs as a ZIP: ?ids=1,2,3, or every property (optionally ?status=Available)"""
+    if not pdf_enabled():
+        flash('Brochure PDFs need WeasyPrint installed on the server.', 'error')
+        return redirect(url_for('admin_properties'))
+    ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip().isdigit()]
+    if not ids:
+        query = db.session.query(Property.id).order_by(Property.id)
+        if request.args.get('status'):
+            query = query.filter(Property.status == request.args['status'])
+        ids = [row.id for row in query]
+    log_activity('export_brochures', f'Exported {len(ids)} property brochures', 'admin')
+    filename = f"brochures_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return Response(
+        stream_with_context(stream_brochures_zip(ids)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/admin/properties/import', methods=['POST'])
+@admin_login_required
+def admin_import_properties():
+    form = PropertyImportForm()
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error, 'error')
+        return redirect(url_for('admin_properties'))
+    
+    upload = form.file.data
+    fmt = detect_format(upload.filename)
+    # Spool the upload to disk so the background job can stream it after this request ends
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}')
+    with os.fdopen(fd, 'wb') as f:
+        upload.save(f)
+    job_id = start_import(app, path, fmt)
+    
+    log_activity('import_properties', f'Started property import {job_id} ({upload.filename})', 'admin')
+    flash(f'Import started (job {job_id}). Progress is shown below.', 'success')
+    return redirect(url_for('admin_properties', import_job=job_id))
+
+@app.route('/admin/properties/import/<job_id>')
+@admin_login_required
+def admin_import_status(job_id):
+    job = import_job_status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown import job'}), 404
+    return jsonify(job)
 
 @app.route('/admin/property/add', methods=['GET', 'POST'])
 @admin_login_required
@@ -999,14 +1248,33 @@ def admin_add_property():
             if form.images.data:
                 for i, image in enumerate(form.images.data):
                     if image and allowed_file(image.filename):
-                        image_path = save_uploaded_file(image, 'images')
-                        if image_path:
+                        width, height, placeholder = upload_placeholder(image) or (None, None, '')
+                        stored = save_uploaded_file(image, 'images')
+                        if stored:
                             prop_image = PropertyImage(
                                 property_id=property.id,
-                                image_url=image_path,
+                                image_url=stored.url,
+                                content_hash=stored.content_hash,
+                                width=width,
+                                height=height,
+                                placeholder=placeholder,
                                 is_primary=(i == 0)
                             )
                             db.session.add(prop_image)
+
+            # Handle video uploads; renditions are rendered after the commit, off the request thread
+            if form.videos.data:
+                for video in form.videos.data:
+                    if video and allowed_file(video.filename):
+                        stored = save_uploaded_file(video, 'videos')
+                        if stored:
+                            db.session.add(PropertyVideo(
+                                property_id=property.id,
+                                video_url=stored.url,
+                                video_type='upload',
+                                content_hash=stored.content_hash,
+                                status='pending'
+                            ))
             
             # Handle video URLs
             if form.video_urls.data:
@@ -1026,27 +1294,23 @@ def admin_add_property():
             if form.documents.data:
                 for document in form.documents.data:
                     if document and allowed_file(document.filename):
-                        doc_path = save_uploaded_file(document, 'documents')
-                        if doc_path:
-                            file_size = os.path.getsize(os.path.join('static', doc_path))
-                            file_size_str = f"{file_size / 1024:.2f} KB" if file_size < 1024*1024 else f"{file_size / (1024*1024):.2f} MB"
-                            
+                        stored = save_uploaded_file(document, 'documents')
+                        if stored:
                             prop_doc = PropertyDocument(
                                 property_id=property.id,
                                 document_name=secure_filename(document.filename),
-                                document_url=doc_path,
+                                document_url=stored.url,
                                 document_type=document.filename.rsplit('.', 1)[1].upper(),
-                                file_size=file_size_str
+                                size_bytes=stored.size_bytes,
+                                content_hash=stored.content_hash
                             )
                             db.session.add(prop_doc)
             
             db.session.commit()
+            start_video_processing(app)
             
             log_activity('add_property', f'Added property: {property.title}', 'admin')
             
-            # Notify alerts
-            check_and_send_alerts(property)
-            
             flash('Property added successfully!', 'success')
             return redirect(url_for('admin_properties'))
         except Exception as e:
@@ -1081,17 +1345,37 @@ def admin_edit_property(id):
             if form.images.data:
                 for image in form.images.data:
                     if image and allowed_file(image.filename):
-                        image_path = save_uploaded_file(image, 'images')
-                        if image_path:
+                        width, height, placeholder = upload_placeholder(image) or (None, None, '')
+                        stored = save_uploaded_file(image, 'images')
+                        if stored:
                             prop_image = PropertyImage(
                                 property_id=property.id,
-                                image_url=image_path
+                                image_url=stored.url,
+                                content_hash=stored.content_hash,
+                                width=width,
+                                height=height,
+                                placeholder=placeholder
                             )
                             db.session.add(prop_image)
+
+            # Handle video uploads; renditions are rendered after the commit, off the request thread
+            if form.videos.data:
+                for video in form.videos.data:
+                    if video and allowed_file(video.filename):
+                        stored = save_uploaded_file(video, 'videos')
+                        if stored:
+                            db.session.add(PropertyVideo(
+                                property_id=property.id,
+                                video_url=stored.url,
+                                video_type='upload',
+                                content_hash=stored.content_hash,
+                                status='pending'
+                            ))
             
-            # Handle video URLs (replace existing)
+            # Handle video URLs (replace existing links; uploads are deleted individually)
             if form.video_urls.data is not None:
-                PropertyVideo.query.filter_by(property_id=property.id).delete()
+                PropertyVideo.query.filter(PropertyVideo.property_id == property.id,
+                                           PropertyVideo.video_type != 'upload').delete()
                 if form.video_urls.data.strip():
                     video_urls = form.video_urls.data.strip().split('\n')
                     for url in video_urls:
@@ -1109,21 +1393,20 @@ def admin_edit_property(id):
             if form.documents.data:
                 for document in form.documents.data:
                     if document and allowed_file(document.filename):
-                        doc_path = save_uploaded_file(document, 'documents')
-                        if doc_path:
-                            file_size = os.path.getsize(os.path.join('static', doc_path))
-                            file_size_str = f"{file_size / 1024:.2f} KB" if file_size < 1024*1024 else f"{file_size / (1024*1024):.2f} MB"
-                            
+                        stored = save_uploaded_file(document, 'documents')
+                        if stored:
                             prop_doc = PropertyDocument(
                                 property_id=property.id,
                                 document_name=secure_filename(document.filename),
-                                document_url=doc_path,
+                                document_url=stored.url,
                                 document_type=document.filename.rsplit('.', 1)[1].upper(),
-                                file_size=file_size_str
+                                size_bytes=stored.size_bytes,
+                                content_hash=stored.content_hash
                             )
                             db.session.add(prop_doc)
             
             db.session.commit()
+            start_video_processing(app)
             
             log_activity('edit_property', f'Edited property: {property.title}', 'admin')
             
@@ -1136,7 +1419,7 @@ def admin_edit_property(id):
     
     # Pre-fill video URLs
     if property.videos:
-        form.video_urls.data = '\n'.join([v.video_url for v in property.videos])
+        form.video_urls.data = '\n'.join([v.video_url for v in property.videos if not v.is_upload])
     
     return render_template('admin/edit_property.html', form=form, property=property)
 
@@ -1145,19 +1428,7 @@ def admin_edit_property(id):
 def admin_delete_property(id):
     property = Property.query.get_or_404(id)
     
-    # Delete associated files
-    for image in property.images:
-        try:
-            os.remove(os.path.join('static', image.image_url))
-        except Exception:
-            pass
-    
-    for document in property.documents:
-        try:
-            os.remove(os.path.join('static', document.document_url))
-        except Exception:
-            pass
-    
+    # Uploaded files may be shared with other rows; the media_gc job removes them once unused
     property_title = property.title
     db.session.delete(property)
     db.session.commit()
@@ -1171,10 +1442,6 @@ def admin_delete_property(id):
 @admin_login_required
 def admin_delete_image(id):
     image = PropertyImage.query.get_or_404(id)
-    try:
-        os.remove(os.path.join('static', image.image_url))
-    except Exception:
-        pass
     db.session.delete(image)
     db.session.commit()
     
@@ -1186,10 +1453,6 @@ def admin_delete_image(id):
 @admin_login_required
 def admin_delete_document(id):
     document = PropertyDocument.query.get_or_404(id)
-    try:
-        os.remove(os.path.join('static', document.document_url))
-    except Exception:
-        pass
     db.session.delete(document)
     db.session.commit()
     
@@ -1197,6 +1460,36 @@ def admin_delete_document(id):
     
     return jsonify({'success': True})
 
+@app.route('/admin/video/delete/<int:id>', methods=['POST'])
+@admin_login_required
+def admin_delete_video(id):
+    video = PropertyVideo.query.get_or_404(id)
+    db.session.delete(video)
+    db.session.commit()
+    
+    log_activity('delete_video', f'Deleted video {id} of property {video.property_id}', 'admin')
+    
+    return jsonify({'success': True})
+
+@app.route('/admin/hero-video', methods=['GET', 'POST'])
+@admin_login_required
+def admin_hero_video():
+    """Upload the home page hero video; the pipeline renders its poster and renditions"""
+    if request.method == 'POST':
+        video = request.files.get('video')
+        stored = save_uploaded_file(video, 'videos') if video and video.filename else None
+        if stored is None:
+            flash('Please choose an MP4, WebM, MOV or OGG video.', 'error')
+        else:
+            db.session.add(SiteVideo(slot='hero', video_url=stored.url, content_hash=stored.content_hash, status='pending'))
+            db.session.commit()
+            start_video_processing(app)
+            log_activity('upload_hero_video', 'Uploaded a new hero video', 'admin')
+            flash('Hero video uploaded. It replaces the current one once processing finishes.', 'success')
+        return redirect(url_for('admin_hero_video'))
+    videos = SiteVideo.query.filter_by(slot='hero').order_by(SiteVideo.id.desc()).limit(10).all()
+    return render_template('admin/hero_video.html', videos=videos, current=hero_video())
+
 @app.route('/admin/enquiries')
 @admin_login_required
 def admin_enquiries():
@@ -1261,7 +1554,17 @@ def update_booking_status(id):
     if status in ['Pending', 'Confirmed', 'Cancelled', 'Completed']:
         old = booking.status
         booking.status = status
-        db.session.commit()
+        if status == 'Cancelled':
+            release_slot(booking)
+        elif booking.slot is None:
+            reserve_slot(booking)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('That time slot is already taken by another booking.', 'error')
+            return redirect(url_for('admin_bookings', **request.args))
+        invalidate_user_dashboard(booking.user_id)
         log_activity('update_booking_status', f'Updated booking #{id} {old} -> {status}', 'admin')
 
         # Notify user on booking status change
@@ -1281,8 +1584,10 @@ def update_booking_status(id):
 @admin_login_required
 def delete_booking(id):
     booking = Booking.query.get_or_404(id)
+    user_id = booking.user_id
     db.session.delete(booking)
     db.session.commit()
+    invalidate_user_dashboard(user_id)
     log_activity('delete_booking', f'Deleted booking #{id}', 'admin')
     flash('Booking deleted.', 'success')
     return redirect(url_for('admin_bookings', **request.args))
@@ -1294,6 +1599,18 @@ def admin_users():
     users = User.query.order_by(User.created_at.desc()).paginate(page=page, per_page=20, error_out=False)
     return render_template('admin/users.html', users=users)
 
+@app.route('/admin/user/<int:id>/revoke-sessions', methods=['POST'])
+@admin_login_required
+def admin_revoke_user_sessions(id):
+    user = User.query.get_or_404(id)
+    if sessions is None:
+        flash('Sessions are stored in cookies and cannot be revoked.', 'warning')
+        return redirect(url_for('admin_users'))
+    count = sessions.revoke_user(user.id)
+    log_activity('revoke_sessions', f'Revoked {count} session(s) of {user.email}', 'admin')
+    flash(f'Signed {user.name} out of {count} session(s).', 'success')
+    return redirect(url_for('admin_users'))
+
 @app.route('/admin/analytics')
 @admin_login_required
 def admin_analytics():
@@ -1330,6 +1647,64 @@ def admin_analytics():
                            monthly_properties=monthly_properties,
                            top_properties=top_properties)
 
+# SCHEDULED JOBS (run by run_scheduler.py, or in-process with SCHEDULER_THREAD)
+@scheduler.job('alert_digests_hourly', every=3600, request_context=True)
+def job_alert_digests_hourly():
+    send_alert_digests('hourly')
+
+@scheduler.job('alert_digests_daily', every=86400, request_context=True)
+def job_alert_digests_daily():
+    send_alert_digests('daily')
+
+@scheduler.job('sweep_sessions', every=app.config['SESSION_SWEEP_INTERVAL'])
+def job_sweep_sessions():
+    if sessions is not None:
+        sessions.sweep()
+
+@scheduler.job('recount_favorites', every=86400)
+def job_recount_favorites():
+    # toggle_favorite keeps the counters in step; this repairs any drift
+    recount_favorites()
+
+@scheduler.job('prune_activity_logs', every=86400)
+def job_prune_activity_logs():
+    """Delete activity logs and job runs older than ACTIVITY_LOG_RETENTION_DAYS, 5000 rows per statement."""
+    cutoff = datetime.utcnow() - timedelta(days=app.config['ACTIVITY_LOG_RETENTION_DAYS'])
+    for model, column in ((ActivityLog, ActivityLog.created_at), (JobRun, JobRun.started_at)):
+        while True:
+            expired = db.select(model.id).where(column < cutoff).limit(5000).scalar_subquery()
+            deleted = db.session.execute(db.delete(model).where(model.id.in_(expired))).rowcount
+            db.session.commit()
+            if deleted < 5000:
+                break
+
+@scheduler.job('media_gc', every=3600)
+def job_media_gc():
+    stats = collect_garbage()
+    if stats['deleted']:
+        log_activity('media_gc', f"Removed {stats['deleted']} unused uploads ({stats['bytes']} bytes)", 'system')
+
+@scheduler.job('backfill_image_placeholders', every=600)
+def job_backfill_image_placeholders():
+    # Images from before placeholders were computed at upload, and imported image URLs
+    backfill_image_placeholders()
+
+@scheduler.job('backfill_document_sizes', every=3600)
+def job_backfill_document_sizes():
+    # Documents uploaded before size_bytes was recorded
+    backfill_document_sizes()
+
+@scheduler.job('refresh_sitemaps', every=900)
+def job_refresh_sitemaps():
+    # Keeps crawler requests from paying for regeneration; a no-op when nothing changed
+    refresh_sitemaps()
+
+@scheduler.job('process_videos', every=60)
+def job_process_videos():
+    # Uploads are normally rendered by the thread start_video_processing() starts;
+    # this catches the ones it missed and videos whose worker died mid-render
+    process_pending_videos()
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Bytes on the wire and CPU per request with and without response compression.
+
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --level 9 --save-baseline
+    python benchmarks/bench_compression.py --compare
+
+Runs in-process through the WSGI stack, so the numbers include the
+middleware but not the network. CPU is process time per request; "br" rows
+only appear when the optional brotli package is installed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Never send real email from a benchmark (load_dotenv does not override these)
+os.environ['MAIL_USERNAME'] = ''
+os.environ['MAIL_PASSWORD'] = ''
+
+from common import summarize, print_table, save_baseline, compare_baseline
+
+ROUTES = [
+    ('api_properties', '/api/properties'),
+    ('properties', '/properties'),
+    ('property_detail', '/property/{property_id}'),
+    ('index', '/'),
+    ('export_jsonl', '/admin/properties/export?format=jsonl'),
+]
+ENCODINGS = [('identity', 'identity'), ('gzip', 'gzip'), ('br', 'br, gzip')]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--level', type=int, help='gzip level (default: COMPRESS_LEVEL)')
+    parser.add_argument('--brotli-quality', type=int, help='brotli quality (default: COMPRESS_BROTLI_QUALITY)')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='exit 1 if CPU per request regressed')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+    from models import Property
+    from helpers import compression
+
+    app.config.update(TESTING=True, MAIL_SUPPRESS_SEND=True, MAIL_USERNAME=None, HTTP_CACHE_ENABLED=False)
+    if args.level is not None:
+        app.config['COMPRESS_LEVEL'] = args.level
+    if args.brotli_quality is not None:
+        app.config['COMPRESS_BROTLI_QUALITY'] = args.brotli_quality
+    with app.app_context():
+        property_id = db.session.query(db.func.min(Property.id)).scalar() or 1
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+
+    encodings = [e for e in ENCODINGS if e[0] != 'br' or compression.brotli is not None]
+    results, rows = {}, []
+    for name, path in ROUTES:
+        url = path.format(property_id=property_id)
+        identity_bytes = None
+        for label, accept in encodings:
+            client.get(url, headers={'Accept-Encoding': accept})  # warm up
+            wall, cpu, size, applied = [], [], 0, None
+            for _ in range(args.requests):
+                started, started_cpu = time.perf_counter(), time.process_time()
+                response = client.get(url, headers={'Accept-Encoding': accept})
+                body = response.get_data()
+                wall.append((time.perf_counter() - started) * 1000)
+                cpu.append((time.process_time() - started_cpu) * 1000)
+                size, applied = len(body), response.headers.get('Content-Encoding', 'identity')
+                response.close()
+            if label == 'identity':
+                identity_bytes = size
+            key = f'{name}:{label}'
+            results[key] = dict(summarize(cpu), bytes=size, wall_p50_ms=summarize(wall)['p50_ms'])
+            rows.append({'route': name, 'encoding': applied, 'bytes': size,
+                         'ratio': round(size / identity_bytes, 3) if identity_bytes else None,
+                         'cpu_p50_ms': results[key]['p50_ms'], 'cpu_p95_ms': results[key]['p95_ms'],
+                         'wall_p50_ms': results[key]['wall_p50_ms']})
+
+    print_table(rows, ['route', 'encoding', 'bytes', 'ratio', 'cpu_p50_ms', 'cpu_p95_ms', 'wall_p50_ms'])
+    if args.save_baseline:
+        save_baseline('compression', results)
+    if args.compare and compare_baseline('compression', results, tolerance=args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Login throughput versus browse latency while logins are running.
+
+    python generate_data.py --scale 0.01          # users log in with loadtest123
+    python benchmarks/bench_login.py              # pool sizes 1, 2 and 4
+    python benchmarks/bench_login.py --pool-sizes 2 --executor process
+    python benchmarks/bench_login.py --save-baseline / --compare
+
+Runs in-process: login threads post to /user/login while browse threads
+request /properties. The first row is browsing with no logins at all; each
+further row repeats the mix with PASSWORD_HASH_WORKERS set to the pool size.
+Rate limiting and CSRF are disabled for the run.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Never send real email from a benchmark (load_dotenv does not override these)
+os.environ['MAIL_USERNAME'] = ''
+os.environ['MAIL_PASSWORD'] = ''
+
+from common import summarize, print_table, save_baseline, compare_baseline
+
+PASSWORD = 'loadtest123'
+
+def run_mix(app, emails, args, login_threads):
+    stop = threading.Event()
+    browse_ms, login_ms, failures = [], [], [0]
+
+    def browse():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/properties')
+            browse_ms.append((time.perf_counter() - started) * 1000)
+
+    def login(n):
+        i = n
+        while not stop.is_set():
+            client = app.test_client()  # fresh session, otherwise login short-circuits
+            started = time.perf_counter()
+            response = client.post('/user/login', data={'email': emails[i % len(emails)], 'password': PASSWORD})
+            login_ms.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 302:
+                failures[0] += 1
+            i += login_threads
+
+    threads = [threading.Thread(target=browse) for _ in range(args.browse_threads)]
+    threads += [threading.Thread(target=login, args=(n,)) for n in range(login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return browse_ms, login_ms, failures[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--browse-threads', type=int, default=2)
+    parser.add_argument('--pool-sizes', default='1,2,4', help='PASSWORD_HASH_WORKERS values to try')
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='exit 1 if browse p95 regressed')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+    from models import User
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, RATELIMIT_ENABLED=False, HTTP_CACHE_ENABLED=False,
+                      MAIL_SUPPRESS_SEND=True, MAIL_USERNAME=None, PASSWORD_HASH_EXECUTOR=args.executor)
+    with app.app_context():
+        emails = [email for (email,) in db.session.query(User.email).filter(User.email.like('loaduser%')).limit(500)]
+    if not emails:
+        sys.exit('No load-test users found; run generate_data.py first.')
+
+    results, rows = {}, []
+    scenarios = [('browse_only', None)] + [(f'pool_{n}', int(n)) for n in args.pool_sizes.split(',')]
+    for name, pool_size in scenarios:
+        if pool_size:
+            app.config['PASSWORD_HASH_WORKERS'] = pool_size
+        browse_ms, login_ms, failures = run_mix(app, emails, args, args.login_threads if pool_size else 0)
+        browse = summarize(browse_ms)
+        login = summarize(login_ms) if login_ms else {}
+        results[name] = dict(browse, logins_per_s=round(len(login_ms) / args.duration, 2),
+                             login_p50_ms=login.get('p50_ms'), login_failures=failures)
+        rows.append({'scenario': name, 'logins/s': results[name]['logins_per_s'],
+                     'login_p50_ms': login.get('p50_ms'), 'login_p95_ms': login.get('p95_ms'),
+                     'failed': failures, 'browse_n': browse['n'],
+                     'browse_p50_ms': browse['p50_ms'], 'browse_p95_ms': browse['p95_ms']})
+
+    print_table(rows, ['scenario', 'logins/s', 'login_p50_ms', 'login_p95_ms', 'failed',
+                       'browse_n', 'browse_p50_ms', 'browse_p95_ms'])
+    if args.save_baseline:
+        save_baseline('login', results)
+    if args.compare and compare_baseline('login', results, tolerance=args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
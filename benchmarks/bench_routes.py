@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Latency, query-count and memory benchmark for the public and admin routes.
+
+    python generate_data.py --scale 0.1                       # seed a scratch database first
+    python benchmarks/bench_routes.py                         # in-process Flask test client
+    python benchmarks/bench_routes.py --gunicorn --workers 2  # real gunicorn on localhost
+    python benchmarks/bench_routes.py --save-baseline         # store results as the baseline
+    python benchmarks/bench_routes.py --compare               # fail on p95 regressions
+
+Both modes use DATABASE_URL. Outgoing mail is always disabled.
+"""
+
+import argparse
+import http.cookiejar
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Never send real email from a benchmark (load_dotenv does not override these)
+os.environ['MAIL_USERNAME'] = ''
+os.environ['MAIL_PASSWORD'] = ''
+
+from common import ROOT, summarize, rss_kb, print_table, save_baseline, compare_baseline
+
+# (name, path, needs admin session); {property_id} is filled from the database
+ROUTES = [
+    ('index', '/', False),
+    ('properties', '/properties', False),
+    ('properties_filtered', '/properties?type=Residential+Plot&min_price=3000000&sort=price_low', False),
+    ('properties_deep_page', '/properties?page=50', False),
+    ('property_detail', '/property/{property_id}', False),
+    ('property_brochure', '/property/{property_id}/brochure', False),
+    ('map_view', '/map', False),
+    ('api_properties', '/api/properties', False),
+    ('api_properties_filtered', '/api/properties?type=Commercial+Plot&max_price=10000000', False),
+    ('admin_dashboard', '/admin/dashboard', True),
+    ('admin_analytics', '/admin/analytics', True),
+    ('admin_properties', '/admin/properties', True),
+]
+
+def sample_property_id(app, db):
+    from models import Property
+    with app.app_context():
+        return db.session.query(db.func.min(Property.id)).scalar() or 1
+
+# IN-PROCESS (Flask test client)
+
+def run_inprocess(args):
+    from sqlalchemy import event
+    from app import app, db
+    from models import Property, PropertyChange
+    from helpers.alerts import deliver_property_alerts
+
+    app.config.update(TESTING=True, MAIL_SUPPRESS_SEND=True, MAIL_USERNAME=None)
+    property_id = sample_property_id(app, db)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_logged_in'] = True
+        sess['admin_username'] = 'benchmark'
+
+    queries = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: queries.__setitem__(0, queries[0] + 1))
+
+    results = {}
+    for name, path, _ in ROUTES:
+        url = path.format(property_id=property_id)
+        for _ in range(args.warmup):
+            client.get(url)
+        samples, counts, status = [], [], None
+        rss_before = rss_kb()
+        for _ in range(args.requests):
+            queries[0] = 0
+            started = time.perf_counter()
+            response = client.get(url)
+            samples.append((time.perf_counter() - started) * 1000)
+            counts.append(queries[0])
+            status = response.status_code
+        rss_after = rss_kb()
+        results[name] = dict(summarize(samples), status=status,
+                             queries=round(sum(counts) / len(counts), 1),
+                             rss_mb=round(rss_after / 1024, 1) if rss_after else None,
+                             rss_delta_mb=round((rss_after - rss_before) / 1024, 1) if rss_after and rss_before else None)
+
+    # Alert delivery runs after requests that commit new or repriced listings; time it as a job
+    with app.test_request_context():
+        property = db.session.get(Property, property_id)
+        samples, counts = [], []
+        for _ in range(max(1, args.requests // 10)):
+            queries[0] = 0
+            started = time.perf_counter()
+            db.session.info['committed_property_changes'] = [
+                PropertyChange(property.id, None, property.price, None, property.status)]
+            deliver_property_alerts()
+            samples.append((time.perf_counter() - started) * 1000)
+            counts.append(queries[0])
+        rss = rss_kb()
+        results['job:deliver_property_alerts'] = dict(summarize(samples), status='-',
+                                                       queries=round(sum(counts) / len(counts), 1),
+                                                       rss_mb=round(rss / 1024, 1) if rss else None)
+    return results
+
+# HTTP (real gunicorn)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2)
+            return True
+        except Exception:
+            time.sleep(0.25)
+    return False
+
+def process_tree_rss_kb(pid):
+    total = rss_kb(pid) or 0
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = f.read().split()
+    except OSError:
+        children = []
+    return total + sum(rss_kb(child) or 0 for child in children)
+
+def admin_opener(base_url, username, password):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    page = opener.open(base_url + '/admin/login').read().decode()
+    match = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page)
+    data = {'username': username, 'password': password}
+    if match:
+        data['csrf_token'] = match.group(1)
+    response = opener.open(base_url + '/admin/login', urllib.parse.urlencode(data).encode())
+    if response.geturl().endswith('/admin/login'):
+        print('Warning: admin login failed; admin routes will measure the login page')
+    return opener
+
+def run_http(args):
+    from app import app, db
+    property_id = sample_property_id(app, db)
+
+    server = None
+    base_url = args.url
+    if args.gunicorn:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}', 'app:app'],
+            cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if not wait_for(base_url + '/map'):
+            server.terminate()
+            sys.exit('gunicorn did not start')
+
+    try:
+        public = urllib.request.build_opener()
+        admin = admin_opener(base_url, app.config['ADMIN_USERNAME'], app.config['ADMIN_PASSWORD'])
+
+        def fetch(opener, url):
+            started = time.perf_counter()
+            try:
+                with opener.open(url, timeout=60) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            return (time.perf_counter() - started) * 1000, status
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for name, path, needs_admin in ROUTES:
+                opener = admin if needs_admin else public
+                url = base_url + path.format(property_id=property_id)
+                for _ in range(args.warmup):
+                    fetch(opener, url)
+                timed = list(pool.map(lambda _: fetch(opener, url), range(args.requests)))
+                rss = process_tree_rss_kb(server.pid) if server else None
+                results[name] = dict(summarize([ms for ms, _ in timed]), status=timed[-1][1],
+                                     queries=None, rss_mb=round(rss / 1024, 1) if rss else None)
+        return results
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--gunicorn', action='store_true', help='start a local gunicorn and benchmark over HTTP')
+    parser.add_argument('--url', help='benchmark an already running server over HTTP')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=4, help='parallel HTTP clients')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='exit 1 if p95 regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    http_mode = args.gunicorn or args.url
+    results = run_http(args) if http_mode else run_inprocess(args)
+    baseline_name = 'routes_http' if http_mode else 'routes'
+
+    print_table([dict(route=name, **stats) for name, stats in results.items()],
+                ['route', 'status', 'n', 'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'rss_mb'])
+    if args.save_baseline:
+        save_baseline(baseline_name, results)
+    if args.compare and compare_baseline(baseline_name, results, tolerance=args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+First-render latency per template, with and without the Jinja bytecode cache.
+
+    python precompile_templates.py                      # build the cache first
+    python benchmarks/bench_templates.py                # compile vs cached load per template
+    python benchmarks/bench_templates.py --save-baseline
+    python benchmarks/bench_templates.py --compare      # fail on regressions
+
+"Cold" parses and compiles the template source (a serverless cold start
+without the cache); "cached" loads the precompiled bytecode. Both start from
+an empty in-memory template cache. The route section times the first request
+to a page after the in-memory cache is dropped, which includes its base and
+included templates.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Never send real email from a benchmark (load_dotenv does not override these)
+os.environ['MAIL_USERNAME'] = ''
+os.environ['MAIL_PASSWORD'] = ''
+
+from common import summarize, print_table, save_baseline, compare_baseline
+
+ROUTES = [
+    ('index', '/'),
+    ('properties', '/properties'),
+    ('property_detail', '/property/{property_id}'),
+    ('property_brochure', '/property/{property_id}/brochure'),
+    ('map_view', '/map'),
+]
+
+def time_load(env, name, bytecode_cache, repeat):
+    env.bytecode_cache = bytecode_cache
+    samples = []
+    for _ in range(repeat):
+        env.cache.clear()
+        started = time.perf_counter()
+        env.get_template(name)
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+def time_first_request(app, client, url, bytecode_cache, repeat):
+    app.jinja_env.bytecode_cache = bytecode_cache
+    samples, status = [], None
+    for _ in range(repeat):
+        app.jinja_env.cache.clear()
+        started = time.perf_counter()
+        status = client.get(url).status_code
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples), status
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='timed loads per template')
+    parser.add_argument('--skip-routes', action='store_true', help='only time template loading')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true', help='exit 1 if cached p95 regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+    from models import Property
+    from helpers.templating import precompile_templates
+
+    bytecode_cache = app.jinja_env.bytecode_cache
+    if bytecode_cache is None:
+        sys.exit('TEMPLATE_BYTECODE_CACHE is disabled; nothing to compare against.')
+    precompile_templates(app)
+    env = app.jinja_env
+
+    results, rows = {}, []
+    for name in env.list_templates(filter_func=lambda n: n.endswith('.html')):
+        cold = time_load(env, name, None, args.repeat)
+        cached = time_load(env, name, bytecode_cache, args.repeat)
+        results[f'template:{name}'] = dict(cached, cold_p50_ms=cold['p50_ms'])
+        rows.append({'name': name, 'cold_p50_ms': cold['p50_ms'], 'cached_p50_ms': cached['p50_ms'],
+                     'cached_p95_ms': cached['p95_ms'],
+                     'speedup': round(cold['p50_ms'] / cached['p50_ms'], 1) if cached['p50_ms'] else None})
+    rows.sort(key=lambda r: r['cold_p50_ms'], reverse=True)
+    print_table(rows, ['name', 'cold_p50_ms', 'cached_p50_ms', 'cached_p95_ms', 'speedup'])
+
+    if not args.skip_routes:
+        app.config.update(TESTING=True, MAIL_SUPPRESS_SEND=True, MAIL_USERNAME=None)
+        with app.app_context():
+            property_id = db.session.query(db.func.min(Property.id)).scalar() or 1
+        client = app.test_client()
+        rows = []
+        for name, path in ROUTES:
+            url = path.format(property_id=property_id)
+            client.get(url)  # warm everything except templates
+            cold, status = time_first_request(app, client, url, None, max(1, args.repeat // 4))
+            cached, _ = time_first_request(app, client, url, bytecode_cache, max(1, args.repeat // 4))
+            results[f'route:{name}'] = dict(cached, cold_p50_ms=cold['p50_ms'])
+            rows.append({'route': name, 'status': status, 'cold_p50_ms': cold['p50_ms'],
+                         'cached_p50_ms': cached['p50_ms'], 'cached_p95_ms': cached['p95_ms']})
+        print()
+        print_table(rows, ['route', 'status', 'cold_p50_ms', 'cached_p50_ms', 'cached_p95_ms'])
+
+    env.bytecode_cache = bytecode_cache
+    if args.save_baseline:
+        save_baseline('templates', results)
+    if args.compare and compare_baseline('templates', results, tolerance=args.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+import json
+import math
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+def summarize(samples_ms):
+    return {
+        'n': len(samples_ms),
+        'mean_ms': round(statistics.fmean(samples_ms), 3) if samples_ms else None,
+        'p50_ms': round(percentile(samples_ms, 50), 3) if samples_ms else None,
+        'p95_ms': round(percentile(samples_ms, 95), 3) if samples_ms else None,
+        'p99_ms': round(percentile(samples_ms, 99), 3) if samples_ms else None,
+    }
+
+def rss_kb(pid='self'):
+    """Resident set size of a process in KB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def print_table(rows, columns):
+    widths = [max(len(str(c)), *(len(str(r.get(c, ''))) for r in rows)) for c in columns]
+    print('  '.join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    print('  '.join('-' * w for w in widths))
+    for row in rows:
+        print('  '.join(str(row.get(c, '') if row.get(c) is not None else '-').ljust(w) for c, w in zip(columns, widths)))
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f'{name}.json')
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nBaseline saved to {path}")
+
+def compare_baseline(name, results, metric='p95_ms', tolerance=1.25):
+    """
+    Compare results against a saved baseline; returns the list of regressions,
+    i.e. keys whose metric grew by more than the tolerance factor.
+    """
+    path = os.path.join(BASELINE_DIR, f'{name}.json')
+    if not os.path.exists(path):
+        print(f"\nNo baseline at {path}; run with --save-baseline first.")
+        return []
+    with open(path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key, {}).get(metric)
+        after = current.get(metric)
+        if before and after and after > before * tolerance:
+            regressions.append((key, before, after))
+    if regressions:
+        print(f"\nREGRESSIONS ({metric} > {tolerance:.2f}x baseline):")
+        for key, before, after in regressions:
+            print(f"   {key}: {before} -> {after}")
+    else:
+        print(f"\nNo regressions against {path} ({metric}, tolerance {tolerance:.2f}x)")
+    return regressions
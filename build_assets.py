@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, minified and precompressed static assets.
+
+    python build_assets.py                  # write static/dist and its manifest
+    python build_assets.py --extract-inline # first move inline <style> blocks out of templates
+
+Templates link assets through asset_url() and css_bundle(), which pick up the
+manifest on the next start. Install the optional `brotli` package to also
+write .br files; .gz files are always written.
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from helpers.assets import build, extract_inline_css, brotli, DIST_DIR
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_FOLDER = os.path.join(ROOT, 'static')
+TEMPLATE_FOLDER = os.path.join(ROOT, 'templates')
+
+def extract_all():
+    for folder, _, files in os.walk(TEMPLATE_FOLDER):
+        for name in sorted(files):
+            if not name.endswith('.html'):
+                continue
+            template = os.path.relpath(os.path.join(folder, name), TEMPLATE_FOLDER).replace(os.sep, '/')
+            filename = extract_inline_css(TEMPLATE_FOLDER, STATIC_FOLDER, template)
+            if filename:
+                print(f"   {template} -> static/{filename}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--extract-inline', action='store_true',
+                        help='move <style> blocks in {% block extra_css %} to static/css/pages')
+    args = parser.parse_args(argv)
+
+    if args.extract_inline:
+        print("Extracting inline CSS...")
+        extract_all()
+
+    manifest = build(STATIC_FOLDER)
+    total = raw = 0
+    for logical, hashed in sorted(manifest.items()):
+        path = os.path.join(STATIC_FOLDER, hashed)
+        size = os.path.getsize(path)
+        gz = os.path.getsize(path + '.gz')
+        raw += size
+        total += gz
+        print(f"   {logical:40} {hashed:50} {size / 1024:7.1f} KB  gz {gz / 1024:6.1f} KB")
+    print(f"✅ Built {len(manifest)} assets into static/{DIST_DIR} ({raw / 1024:.0f} KB, {total / 1024:.0f} KB gzipped)")
+    if brotli is None:
+        print("   brotli not installed; skipped .br files")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -51,7 +51,74 @@ class Config:
     # File Upload Settings
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'webm', 'ogg', 'pdf', 'doc', 'docx'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp4', 'webm', 'ogg', 'mov', 'pdf', 'doc', 'docx'}
+    # The media_gc job leaves unreferenced uploads younger than this alone (their rows may not be committed yet)
+    MEDIA_GC_GRACE_SECONDS = int(os.getenv('MEDIA_GC_GRACE_SECONDS', 3600))
+    
+    # Video pipeline (helpers/video.py): poster, preview and MP4/WebM renditions of uploaded videos
+    FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+    FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+    VIDEO_PROCESSING_TIMEOUT = int(os.getenv('VIDEO_PROCESSING_TIMEOUT', 1800))  # seconds per ffmpeg run; a claim lasts 5x this
+    # Start rendering right after an upload in a background thread (serverless: leave it to the process_videos job)
+    VIDEO_PIPELINE_THREAD = os.getenv('VIDEO_PIPELINE_THREAD', str(not IS_VERCEL)).lower() == 'true'
+    
+    # Cached sitemap shards and Atom feed (helpers/sitemap.py); a shard lists properties with ids in one
+    # SITEMAP_SHARD_SIZE range, kept below the 50,000 URLs a sitemap file may hold
+    SITEMAP_CACHE_DIR = os.getenv('SITEMAP_CACHE_DIR', '/tmp/sitemaps' if IS_VERCEL else 'instance/sitemaps')
+    SITEMAP_SHARD_SIZE = int(os.getenv('SITEMAP_SHARD_SIZE', 45000))
+    
+    # Server-rendered brochure PDFs, cached per property version (needs WeasyPrint)
+    BROCHURE_CACHE_DIR = os.getenv('BROCHURE_CACHE_DIR', '/tmp/brochures' if IS_VERCEL else 'instance/brochures')
+    BROCHURE_WORKERS = int(os.getenv('BROCHURE_WORKERS', 0))  # processes for bulk exports (0 = one per CPU)
+    
+    # Pre-rendered public pages for CDN hosting (export_static.py)
+    STATIC_EXPORT_DIR = os.getenv('STATIC_EXPORT_DIR', 'instance/static-site')
+    STATIC_EXPORT_WORKERS = int(os.getenv('STATIC_EXPORT_WORKERS', 0))  # rendering processes (0 = one per CPU)
+    
+    # Jinja bytecode cache, built at deploy time by precompile_templates.py or filled at runtime
+    # (under the temp dir when this one cannot be created); empty to disable
+    TEMPLATE_BYTECODE_CACHE = os.getenv('TEMPLATE_BYTECODE_CACHE', 'template_cache')
+    
+    # ETag/Cache-Control headers on public pages (policies in helpers/http_cache.py)
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'True').lower() == 'true'
+    
+    # gzip/brotli response compression (brotli needs the optional `brotli` package)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))  # bytes
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))  # brotli 0-11
+    
+    # Rate limits on write endpoints: memory:// (per process) or redis://host:6379/0
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    # Number of proxies in front of the app that append to X-Forwarded-For (Vercel: 1). ProxyFix
+    # takes the client IP from that many hops from the right; 0 ignores the header
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 1 if IS_VERCEL else 0))
+    
+    # Password hashing: any Werkzeug method string, e.g. scrypt:32768:8:1. Stored
+    # hashes made with other settings are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    # Hashing runs in a bounded pool ("thread" or "process") so logins cannot take every core
+    PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))  # seconds
+    
+    # Periodic jobs (app.py, SCHEDULED JOBS) run by `python run_scheduler.py`. SCHEDULER_THREAD
+    # also polls from every app process; a DB lease keeps each run to one process. Not for
+    # serverless, where there is no process between requests.
+    SCHEDULER_THREAD = os.getenv('SCHEDULER_THREAD', 'False').lower() == 'true'
+    SCHEDULER_TICK_SECONDS = int(os.getenv('SCHEDULER_TICK_SECONDS', 30))
+    SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', 900))  # renewed while a job runs; a crashed run's lease lapses after this
+    ACTIVITY_LOG_RETENTION_DAYS = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', 90))
+    
+    # Session storage: "sql" (sessions table), "memory" (per process, development)
+    # or "cookie" (Flask's signed cookie). Vercel instances each get their own
+    # /tmp SQLite file, so there sessions stay in the cookie unless DATABASE_URL is set.
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie' if IS_VERCEL and database_url.startswith('sqlite') else 'sql')
+    SESSION_CACHE_TTL = int(os.getenv('SESSION_CACHE_TTL', 30))  # seconds an anonymous session read is reused in-process
+    SESSION_SWEEP_INTERVAL = int(os.getenv('SESSION_SWEEP_INTERVAL', 300))  # seconds between expired-session sweeps
+    SESSION_SWEEP_BATCH_SIZE = int(os.getenv('SESSION_SWEEP_BATCH_SIZE', 500))
     
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
@@ -64,6 +131,22 @@ class Config:
     ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', 20))
     USER_PAGE_SIZE = int(os.getenv('USER_PAGE_SIZE', 12))
     
+    # Most properties /api/compare returns at once
+    COMPARE_MAX_PROPERTIES = int(os.getenv('COMPARE_MAX_PROPERTIES', 4))
+    
+    # Seconds the per-user dashboard JSON pages stay cached in-process
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 60))
+    
+    # Performance instrumentation (per-request SQL/render timing on /admin/perf and /metrics)
+    PERF_INSTRUMENTATION = os.getenv('PERF_INSTRUMENTATION', 'true').lower() == 'true'
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+    # Lets Prometheus scrape /metrics with "Authorization: Bearer <token>"; admins can always view it
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # Sampling profiler: fraction of requests to profile (0 = only requests with a signed X-Profile-Request token)
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = int(os.getenv('PROFILE_INTERVAL_MS', 5))
+    PROFILE_TOKEN_MAX_AGE = int(os.getenv('PROFILE_TOKEN_MAX_AGE', 3600))
+    
     # Admin Credentials
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
@@ -75,4 +158,6 @@ class Config:
     MAIL_USE_SSL = os.getenv('MAIL_USE_SSL', 'false').lower() == 'true'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
-    MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    # Public address used for links in emails sent outside a request (alert digests)
+    SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
\ No newline at end of file
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Pre-render the public pages to static HTML for hosting on a CDN.
+
+    python export_static.py                        # into STATIC_EXPORT_DIR, only pages that changed
+    python export_static.py -o site/ --workers 4
+    python export_static.py --full                 # re-render every page
+
+Writes the home page, the listing pages (all available properties, each
+property type and each price bucket, every page of each), every property
+page and every HTML brochure. Each page has a key built from the versions of
+the properties it shows, so a re-run after an edit only renders the pages
+that edit touched. manifest.json maps each URL to its file; URLs with a
+query string are stored under hashed names, so the CDN needs the manifest
+(or its own rewrites) to serve them. Everything else - /static, /api/*,
+form posts, logins and admin - stays on the app.
+
+The pages are the same for every visitor: login state, favorites, CSRF
+tokens and flash messages are filled in by js/session-state.js from
+/api/session, and property views are counted by a beacon.
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from helpers.static_export import export_site
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help='output directory (default: STATIC_EXPORT_DIR)')
+    parser.add_argument('--workers', type=int, help='rendering processes (default: STATIC_EXPORT_WORKERS or one per CPU)')
+    parser.add_argument('--full', action='store_true', help='render every page, not just the changed ones')
+    args = parser.parse_args(argv)
+
+    output = args.output or app.config['STATIC_EXPORT_DIR']
+    started = time.perf_counter()
+    with app.app_context():
+        summary = export_site(output, workers=args.workers, full=args.full)
+    elapsed = time.perf_counter() - started
+
+    for url, error in sorted(summary['errors'].items()):
+        print(f"   ⚠️  {url}: {error}")
+    print(f"✅ {summary['pages']} pages in {output}: {summary['rendered']} rendered, "
+          f"{summary['removed']} removed, {len(summary['errors'])} failed ({elapsed:.1f}s)")
+    return 1 if summary['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
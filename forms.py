@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from flask_wtf.file import FileField, FileAllowed
+from flask_wtf.file import FileField, FileAllowed, FileRequired
 from wtforms import StringField, TextAreaField, FloatField, SelectField, BooleanField, PasswordField, MultipleFileField, DateField, TimeField, IntegerField
 from wtforms.validators import DataRequired, Email, Length, NumberRange, Optional, EqualTo
 
@@ -25,9 +25,13 @@ class PropertyForm(FlaskForm):
                         validators=[DataRequired()])
     featured = BooleanField('Featured Property')
     images = MultipleFileField('Property Images', validators=[FileAllowed(['jpg', 'jpeg', 'png', 'gif'], 'Images only!')])
+    videos = MultipleFileField('Upload Videos', validators=[FileAllowed(['mp4', 'webm', 'mov', 'ogg'], 'Videos only!')])
     video_urls = TextAreaField('Video URLs (one per line, YouTube or Vimeo)', validators=[Optional()])
     documents = MultipleFileField('Property Documents', validators=[FileAllowed(['pdf', 'doc', 'docx'], 'Documents only!')])
 
+class PropertyImportForm(FlaskForm):
+    file = FileField('CSV or JSONL File', validators=[FileRequired(), FileAllowed(['csv', 'jsonl', 'ndjson', 'json'], 'CSV or JSONL files only!')])
+
 class EnquiryForm(FlaskForm):
     name = StringField('Full Name', validators=[DataRequired(), Length(min=2, max=100)])
     email = StringField('Email Address', validators=[DataRequired(), Email()])
@@ -50,6 +54,16 @@ class UserLoginForm(FlaskForm):
     password = PasswordField('Password', validators=[DataRequired()])
 
 class PropertyAlertForm(FlaskForm):
+    alert_type = SelectField('Notify Me About',
+                             choices=[('new_property', 'New listings'),
+                                      ('price_drop', 'Price drops'),
+                                      ('back_on_market', 'Listings back on the market')],
+                             default='new_property')
+    frequency = SelectField('Delivery',
+                            choices=[('instant', 'Right away'),
+                                     ('hourly', 'Hourly digest'),
+                                     ('daily', 'Daily digest')],
+                            default='instant')
     property_type = SelectField('Property Type', 
                                choices=[('', 'Any Type'),
                                        ('Residential Plot', 'Residential Plot'),
@@ -62,18 +76,20 @@ class PropertyAlertForm(FlaskForm):
     max_price = FloatField('Max Price (₹)', validators=[Optional(), NumberRange(min=0)])
     location = StringField('Location', validators=[Optional(), Length(max=200)])
 
+VISIT_TIME_SLOTS = [
+    ('09:00-10:00', '09:00 AM - 10:00 AM'),
+    ('10:00-11:00', '10:00 AM - 11:00 AM'),
+    ('11:00-12:00', '11:00 AM - 12:00 PM'),
+    ('12:00-13:00', '12:00 PM - 01:00 PM'),
+    ('14:00-15:00', '02:00 PM - 03:00 PM'),
+    ('15:00-16:00', '03:00 PM - 04:00 PM'),
+    ('16:00-17:00', '04:00 PM - 05:00 PM'),
+    ('17:00-18:00', '05:00 PM - 06:00 PM'),
+]
+
 class BookingForm(FlaskForm):
     booking_date = DateField('Visit Date', validators=[DataRequired()], format='%Y-%m-%d')
-    booking_time = SelectField('Visit Time',
-                              choices=[('09:00-10:00', '09:00 AM - 10:00 AM'),
-                                      ('10:00-11:00', '10:00 AM - 11:00 AM'),
-                                      ('11:00-12:00', '11:00 AM - 12:00 PM'),
-                                      ('12:00-13:00', '12:00 PM - 01:00 PM'),
-                                      ('14:00-15:00', '02:00 PM - 03:00 PM'),
-                                      ('15:00-16:00', '03:00 PM - 04:00 PM'),
-                                      ('16:00-17:00', '04:00 PM - 05:00 PM'),
-                                      ('17:00-18:00', '05:00 PM - 06:00 PM')],
-                              validators=[DataRequired()])
+    booking_time = SelectField('Visit Time', choices=VISIT_TIME_SLOTS, validators=[DataRequired()])
     visitor_name = StringField('Your Name', validators=[DataRequired(), Length(min=2, max=100)])
     visitor_email = StringField('Email Address', validators=[DataRequired(), Email()])
     visitor_phone = StringField('Phone Number', validators=[DataRequired(), Length(min=10, max=20)])
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic data generator for load testing.
+
+Examples:
+    python generate_data.py                      # 100k properties, 1M activity logs, 50k alerts
+    python generate_data.py --scale 0.01         # same shape at 1% size
+    python generate_data.py --reset --seed 7     # wipe all tables first
+
+Point DATABASE_URL at a scratch database; the same seed always produces the same rows.
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, db
+from models import (Property, PropertyImage, User, Favorite, PropertyAlert, Booking, BookingSlot,
+                    Enquiry, ActivityLog)
+from forms import VISIT_TIME_SLOTS
+from helpers.passwords import hash_password
+
+BATCH_SIZE = 5000
+BASE_DATE = datetime(2024, 1, 1)
+
+PROPERTY_TYPES = {
+    # type: (min price, max price, min area, max area)
+    'Residential Plot': (2_000_000, 20_000_000, 1_200, 8_000),
+    'Commercial Plot': (5_000_000, 40_000_000, 2_000, 15_000),
+    'Agricultural Land': (800_000, 6_000_000, 10_000, 200_000),
+    'Industrial Plot': (4_000_000, 30_000_000, 5_000, 50_000),
+}
+LOCATIONS = {
+    'Mumbai': (19.0760, 72.8777), 'Pune': (18.5204, 73.8567), 'Nashik': (19.9975, 73.7898),
+    'Thane': (19.2183, 72.9781), 'Lonavala': (18.7537, 73.4076), 'Alibaug': (18.6414, 72.8722),
+    'Nagpur': (21.1458, 79.0882), 'Aurangabad': (19.8762, 75.3433), 'Kolhapur': (16.7050, 74.2433),
+    'Satara': (17.6805, 74.0183),
+}
+STATUSES = ['Available'] * 7 + ['Reserved'] * 2 + ['Sold']
+ADJECTIVES = ['Prime', 'Scenic', 'Premium', 'Spacious', 'Strategic', 'Lakeside', 'Hilltop', 'Corner', 'Gated', 'Riverside']
+AREAS = ['Road', 'Nagar', 'Park', 'Colony', 'Enclave', 'Heights', 'Vihar', 'Estate']
+IMAGE_POOL = [
+    'https://images.unsplash.com/photo-1613490493576-7fde63acd811?w=800',
+    'https://images.unsplash.com/photo-1512917774080-9991f1c4c750?w=800',
+    'https://images.unsplash.com/photo-1486406146926-c627a92ad1ab?w=800',
+    'https://images.unsplash.com/photo-1500382017468-9049fed747ef?w=800',
+    'https://images.unsplash.com/photo-1564013799919-ab600027ffc6?w=800',
+    'https://images.unsplash.com/photo-1497366216548-37526070297c?w=800',
+    'https://images.unsplash.com/photo-1542314831-068cd1dbfeeb?w=800',
+    'https://images.unsplash.com/photo-1565008576549-57569a49371d?w=800',
+    'https://images.unsplash.com/photo-1600585154340-be6161a56a0c?w=800',
+]
+ACTIONS = ['view_property', 'view_property', 'view_property', 'share_property', 'add_favorite',
+           'user_login', 'submit_enquiry', 'create_booking', 'download_document']
+
+def next_id(model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+def insert_batches(model, rows, label):
+    """Insert an iterable of dicts in BATCH_SIZE executemany chunks."""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(db.insert(model), batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+            print(f"\r   {label}: {count:,}", end='', flush=True)
+    if batch:
+        db.session.execute(db.insert(model), batch)
+        db.session.commit()
+        count += len(batch)
+    print(f"\r   {label}: {count:,}")
+    return count
+
+def property_rows(rng, start_id, count):
+    for i in range(count):
+        ptype = rng.choice(list(PROPERTY_TYPES))
+        min_price, max_price, min_area, max_area = PROPERTY_TYPES[ptype]
+        city = rng.choice(list(LOCATIONS))
+        lat, lng = LOCATIONS[city]
+        created = BASE_DATE + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60))
+        yield {
+            'id': start_id + i,
+            'title': f"{rng.choice(ADJECTIVES)} {ptype} in {city} #{start_id + i}",
+            'description': f"Synthetic {ptype.lower()} listing in {city} generated for load testing. "
+                           f"Clear title, road access and utilities nearby.",
+            'property_type': ptype,
+            'price': float(rng.randrange(min_price, max_price, 10_000)),
+            'area': float(rng.randrange(min_area, max_area, 50)),
+            'location': city,
+            'address': f"{rng.randint(1, 999)} {rng.choice(ADJECTIVES)} {rng.choice(AREAS)}, {city}, Maharashtra",
+            'latitude': round(lat + rng.uniform(-0.2, 0.2), 6),
+            'longitude': round(lng + rng.uniform(-0.2, 0.2), 6),
+            'status': rng.choice(STATUSES),
+            'featured': rng.random() < 0.05,
+            'views': rng.randint(0, 2000),
+            'shares': rng.randint(0, 200),
+            'favorites_count': 0,
+            'created_at': created,
+            'updated_at': created,
+        }
+
+def image_rows(rng, property_ids, per_property):
+    for property_id in property_ids:
+        for n in range(per_property):
+            yield {'property_id': property_id, 'image_url': rng.choice(IMAGE_POOL), 'is_primary': n == 0,
+                   'created_at': BASE_DATE}
+
+def user_rows(start_id, count, password_hash):
+    for i in range(count):
+        uid = start_id + i
+        yield {'id': uid, 'name': f"Load User {uid}", 'email': f"loaduser{uid}@example.com",
+               'phone': f"9{uid:09d}"[:10], 'password_hash': password_hash, 'created_at': BASE_DATE}
+
+def alert_rows(rng, user_ids, count):
+    for _ in range(count):
+        ptype = rng.choice([None] + list(PROPERTY_TYPES))
+        low = rng.choice([None, 1_000_000, 3_000_000, 5_000_000])
+        yield {
+            'user_id': rng.choice(user_ids),
+            'alert_type': 'new_property',
+            'property_type': ptype,
+            'min_price': low,
+            'max_price': low * 4 if low else rng.choice([None, 10_000_000]),
+            'location': rng.choice([None, None] + list(LOCATIONS)),
+            'is_active': rng.random() < 0.9,
+            'created_at': BASE_DATE,
+        }
+
+def activity_rows(rng, user_ids, count):
+    for _ in range(count):
+        user_id = rng.choice(user_ids) if rng.random() < 0.3 else None
+        yield {
+            'action': rng.choice(ACTIONS),
+            'description': 'Synthetic activity',
+            'user_type': 'user' if user_id else 'guest',
+            'user_id': user_id,
+            'ip_address': f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            'created_at': BASE_DATE + timedelta(seconds=rng.randrange(0, 2 * 365 * 24 * 3600)),
+        }
+
+def favorite_rows(rng, user_ids, property_ids, count):
+    seen = set()
+    while len(seen) < count:
+        key = (rng.choice(user_ids), rng.choice(property_ids))
+        if key not in seen:
+            seen.add(key)
+            yield {'user_id': key[0], 'property_id': key[1], 'created_at': BASE_DATE}
+
+def booking_rows(rng, start_id, user_ids, property_ids, count):
+    # Booking n uses property n % P on day n // P, so slots never collide
+    for n in range(count):
+        property_id = property_ids[n % len(property_ids)]
+        day = BASE_DATE + timedelta(days=n // len(property_ids))
+        yield {
+            'id': start_id + n,
+            'user_id': rng.choice(user_ids),
+            'property_id': property_id,
+            'booking_date': day,
+            'booking_time': VISIT_TIME_SLOTS[n % len(VISIT_TIME_SLOTS)][0],
+            'visitor_name': 'Load Visitor',
+            'visitor_email': 'visitor@example.com',
+            'visitor_phone': '9000000000',
+            'number_of_visitors': rng.randint(1, 4),
+            'status': rng.choice(['Pending', 'Confirmed', 'Completed']),
+            'created_at': day - timedelta(days=rng.randint(1, 20)),
+        }
+
+def enquiry_rows(rng, property_ids, count):
+    for n in range(count):
+        yield {
+            'name': f"Enquirer {n}",
+            'email': f"enquirer{n}@example.com",
+            'phone': '9000000000',
+            'property_id': rng.choice(property_ids),
+            'message': 'Is this plot still available? Please share more details.',
+            'status': rng.choice(['New', 'Contacted', 'Closed']),
+            'created_at': BASE_DATE + timedelta(hours=n),
+        }
+
+def generate(args):
+    rng = random.Random(args.seed)
+    scaled = lambda n: max(1, int(n * args.scale))
+
+    with app.app_context():
+        if args.reset:
+            print("Dropping and recreating all tables...")
+            db.drop_all()
+            db.create_all()
+
+        started = time.perf_counter()
+        print(f"Generating synthetic data (seed={args.seed}, scale={args.scale})...")
+
+        first_property = next_id(Property)
+        n_properties = scaled(args.properties)
+        insert_batches(Property, property_rows(rng, first_property, n_properties), 'properties')
+        property_ids = list(range(first_property, first_property + n_properties))
+        insert_batches(PropertyImage, image_rows(rng, property_ids, args.images_per_property), 'property images')
+
+        first_user = next_id(User)
+        n_users = scaled(args.users)
+        # One shared hash: hashing per user would dominate generation time
+        password_hash = hash_password('loadtest123')
+        insert_batches(User, user_rows(first_user, n_users, password_hash), 'users')
+        user_ids = list(range(first_user, first_user + n_users))
+
+        insert_batches(PropertyAlert, alert_rows(rng, user_ids, scaled(args.alerts)), 'alerts')
+        n_favorites = min(scaled(args.favorites), n_users * n_properties)
+        insert_batches(Favorite, favorite_rows(rng, user_ids, property_ids, n_favorites), 'favorites')
+        first_booking = next_id(Booking)
+        n_bookings = scaled(args.bookings)
+        bookings = list(booking_rows(rng, first_booking, user_ids, property_ids, n_bookings))
+        insert_batches(Booking, bookings, 'bookings')
+        insert_batches(BookingSlot, (
+            {'property_id': b['property_id'], 'booking_id': b['id'], 'slot_date': b['booking_date'].date(),
+             'slot_time': b['booking_time'], 'created_at': b['created_at']}
+            for b in bookings
+        ), 'booking slots')
+        insert_batches(Enquiry, enquiry_rows(rng, property_ids, scaled(args.enquiries)), 'enquiries')
+        insert_batches(ActivityLog, activity_rows(rng, user_ids, scaled(args.activity_logs)), 'activity logs')
+
+        from helpers.favorites import recount_favorites
+        recount_favorites()
+
+        print(f"\nDone in {time.perf_counter() - started:.1f}s")
+        print("   Users log in with password: loadtest123")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate deterministic synthetic data for load testing.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every count by this factor')
+    parser.add_argument('--properties', type=int, default=100_000)
+    parser.add_argument('--images-per-property', type=int, default=3)
+    parser.add_argument('--users', type=int, default=20_000)
+    parser.add_argument('--alerts', type=int, default=50_000)
+    parser.add_argument('--favorites', type=int, default=200_000)
+    parser.add_argument('--bookings', type=int, default=20_000)
+    parser.add_argument('--enquiries', type=int, default=20_000)
+    parser.add_argument('--activity-logs', type=int, default=1_000_000)
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    generate(parser.parse_args(argv))
+
+if __name__ == '__main__':
+    main()
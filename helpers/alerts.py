@@ -0,0 +1,156 @@
+from flask import current_app, url_for
+from flask_mail import Message
+from models import db, Property, PropertyAlert, AlertMatch, User, ActivityLog, pop_committed_property_changes
+from helpers.notifications import send_bulk_email
+
+DIGEST_FREQUENCIES = ('hourly', 'daily')
+# Longer digests list the first properties and link to the dashboard for the rest
+MAX_DIGEST_ITEMS = 50
+
+SUBJECTS = {
+    'new_property': 'New property matches your alert',
+    'price_drop': 'Price drop on a property matching your alert',
+    'back_on_market': 'A property matching your alert is available again',
+}
+
+def change_events(change):
+    """Alert types a PropertyChange triggers: new_property, price_drop and/or back_on_market."""
+    if change.old_price is None and change.old_status is None:
+        return ['new_property'] if change.new_status == 'Available' else []
+    events = []
+    if change.new_status == 'Available':
+        if change.old_price is not None and change.new_price < change.old_price:
+            events.append('price_drop')
+        if change.old_status in ('Reserved', 'Sold'):
+            events.append('back_on_market')
+    return events
+
+def matching_alerts(property, alert_types):
+    """
+    Active alerts of the given types whose criteria match this one property,
+    with their users. Type and price criteria are filtered in SQL; the
+    location substring match is checked here.
+    """
+    rows = db.session.query(PropertyAlert, User).join(User, User.id == PropertyAlert.user_id).filter(
+        PropertyAlert.is_active.is_(True),
+        PropertyAlert.alert_type.in_(alert_types),
+        db.or_(PropertyAlert.property_type.is_(None), PropertyAlert.property_type == '',
+               PropertyAlert.property_type == property.property_type),
+        db.or_(PropertyAlert.min_price.is_(None), PropertyAlert.min_price <= property.price),
+        db.or_(PropertyAlert.max_price.is_(None), PropertyAlert.max_price <= 0,
+               PropertyAlert.max_price >= property.price),
+    ).all()
+    location = (property.location or '').lower()
+    return [(alert, user) for alert, user in rows if not alert.location or alert.location.lower() in location]
+
+def _describe(property, event, old_price, old_status):
+    if event == 'price_drop' and old_price is not None:
+        note = f'Price dropped from ₹{old_price:,.0f} to ₹{property.price:,.0f}'
+    elif event == 'back_on_market':
+        note = f'Available again (was {old_status})' if old_status else 'Available again'
+    else:
+        note = 'New listing'
+    return f"""{note}
+Title: {property.title}
+Type: {property.property_type}
+Location: {property.location}
+Area: {property.area} sq ft
+Price: ₹{property.price:,.0f}
+View: {url_for('property_detail', id=property.id, _external=True)}
+"""
+
+def build_message(user, items):
+    """
+    One email for a user's matches; items are (property, event, old_price,
+    old_status) tuples. A single match reads like an individual alert.
+    """
+    if len(items) == 1:
+        subject = SUBJECTS[items[0][1]]
+        intro = 'A property matching your alert:'
+    else:
+        subject = f'{len(items)} properties match your alerts'
+        intro = f'{len(items)} properties match your alerts:'
+    listed = '\n'.join(_describe(*item) for item in items[:MAX_DIGEST_ITEMS])
+    more = f'\n...and {len(items) - MAX_DIGEST_ITEMS} more.\n' if len(items) > MAX_DIGEST_ITEMS else ''
+    body = f"""Hi {user.name},
+
+{intro}
+
+{listed}{more}
+You can manage alerts in your dashboard.
+"""
+    return Message(subject=subject, recipients=[user.email], body=body)
+
+def deliver_property_alerts():
+    """
+    Handle alerts for properties changed by committed transactions of the
+    current session. Only the changed properties are loaded and each is
+    matched against the alerts on its own, so the cost is independent of the
+    number of listings and alerts. Instant alerts are emailed right away,
+    one email per user however many properties matched (a bulk import
+    does not send 200 emails); hourly and daily alerts queue an AlertMatch
+    for send_alert_digests().
+    """
+    changes = pop_committed_property_changes(db.session)
+    if not changes:
+        return 0
+    properties = {p.id: p for p in Property.query.filter(Property.id.in_({c.property_id for c in changes}))}
+    instant, seen, matched = {}, set(), 0
+    for change in changes:
+        property = properties.get(change.property_id)
+        events = change_events(change)
+        if property is None or not events:
+            continue
+        for alert, user in matching_alerts(property, events):
+            if (user.id, property.id) in seen:
+                continue
+            seen.add((user.id, property.id))
+            matched += 1
+            if alert.frequency in DIGEST_FREQUENCIES:
+                db.session.add(AlertMatch(alert_id=alert.id, user_id=user.id, property_id=property.id,
+                                          event=alert.alert_type, old_price=change.old_price,
+                                          old_status=change.old_status))
+            elif user.email:
+                instant.setdefault(user.id, (user, []))[1].append(
+                    (property, alert.alert_type, change.old_price, change.old_status))
+            db.session.add(ActivityLog(action='alert_triggered', user_type='system', user_id=user.id,
+                                       description=f'{alert.alert_type} alert {alert.id} for user {user.id}: {property.title}'))
+    if matched:
+        # Queued matches and logs are committed before sending: email logging commits on its own
+        db.session.commit()
+        send_bulk_email(current_app.extensions.get('mail'),
+                        [build_message(user, items) for user, items in instant.values()], category='alert')
+    return matched
+
+def send_alert_digests(frequency):
+    """
+    Email every user one digest of the pending matches of their `frequency`
+    alerts, all over one SMTP connection. A user's matches are deleted once
+    their digest went out (or cannot be sent: no email address, property
+    gone); if sending stops partway, the remaining users' matches are kept
+    for the next run, and users already emailed do not get theirs twice.
+    Returns the number of emails.
+    """
+    matches = AlertMatch.query.join(PropertyAlert).filter(
+        PropertyAlert.frequency == frequency
+    ).order_by(AlertMatch.user_id, AlertMatch.created_at).all()
+    if not matches:
+        return 0
+    users = {u.id: u for u in User.query.filter(User.id.in_({m.user_id for m in matches}))}
+    properties = {p.id: p for p in Property.query.filter(Property.id.in_({m.property_id for m in matches}))}
+    digests, seen = {}, set()
+    for match in matches:
+        user, property = users.get(match.user_id), properties.get(match.property_id)
+        if user is None or property is None or not user.email or (user.id, property.id) in seen:
+            continue
+        seen.add((user.id, property.id))
+        digests.setdefault(user.id, (user, []))[1].append((property, match.event, match.old_price, match.old_status))
+    recipients = list(digests)
+    sent = send_bulk_email(current_app.extensions.get('mail'),
+                           [build_message(user, items) for user, items in digests.values()], category='alert_digest')
+    pending = set(recipients[sent:])
+    handled = [m.id for m in matches if m.user_id not in pending]
+    if handled:
+        AlertMatch.query.filter(AlertMatch.id.in_(handled)).delete(synchronize_session=False)
+        db.session.commit()
+    return sent
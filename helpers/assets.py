@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import request, send_from_directory, url_for
+from markupsafe import Markup, escape
+from helpers.compression import negotiate
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Stylesheets served as one file once built; sources are linked one by one until then
+CSS_BUNDLES = {
+    'site': ['css/main.css', 'css/animations.css', 'css/responsive.css'],
+}
+# Inline <style> blocks moved out of templates by `build_assets.py --extract-inline`
+PAGE_CSS_DIR = 'css/pages'
+SINGLE_ASSETS = ['css/admin.css', 'js/main.js', 'js/admin.js', 'js/gallery.js', 'js/session-state.js']
+
+# MINIFICATION
+
+# Strings and url(...) are kept verbatim; comments outside them are dropped
+_CSS_VERBATIM = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*)\s*\))|/\*.*?\*/""",
+    re.S | re.I
+)
+_CSS_PLACEHOLDER = re.compile(r'\x00(\d+)\x00')
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCT = re.compile(r'\s*([{};,>~])\s*')
+
+def minify_css(css):
+    """
+    Strip comments and insignificant whitespace. Spaces around + and -
+    (calc()) are kept, and quoted strings and url(...) are left untouched.
+    """
+    verbatim = []
+
+    def stash(match):
+        if match.group(1) is None:
+            return ''
+        verbatim.append(match.group(1))
+        return f'\x00{len(verbatim) - 1}\x00'
+
+    css = _CSS_VERBATIM.sub(stash, css)
+    css = _CSS_SPACE.sub(' ', css)
+    css = _CSS_PUNCT.sub(r'\1', css)
+    # Only the space after ":" is safe to drop; before it, "a :hover" differs from "a:hover"
+    css = css.replace(': ', ':')
+    css = css.replace(';}', '}').strip()
+    return _CSS_PLACEHOLDER.sub(lambda match: verbatim[int(match.group(1))], css)
+
+def minify_js(js):
+    """
+    Conservative JS minification: drops indentation, blank lines and
+    whole-line // comments. Statements are never joined, so ASI is unaffected.
+    """
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+# BUILD
+
+def page_css_files(static_folder):
+    directory = os.path.join(static_folder, PAGE_CSS_DIR)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(f'{PAGE_CSS_DIR}/{name}' for name in os.listdir(directory) if name.endswith('.css'))
+
+def _read(static_folder, filename):
+    with open(os.path.join(static_folder, filename), encoding='utf-8') as f:
+        return f.read()
+
+def _write_fingerprinted(static_folder, logical, content):
+    """Write content as dist/<name>.<hash>.<ext> plus .gz/.br siblings; returns the static-relative path."""
+    data = content.encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(logical)
+    relative = f'{DIST_DIR}/{stem}.{digest}{ext}'
+    path = os.path.join(static_folder, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    return relative
+
+def build(static_folder):
+    """
+    Minify, concatenate and fingerprint every bundle into static/dist and
+    write the manifest mapping logical names to hashed files.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    for name, sources in CSS_BUNDLES.items():
+        content = '\n'.join(minify_css(_read(static_folder, source)) for source in sources)
+        manifest[f'bundle:{name}.css'] = _write_fingerprinted(static_folder, f'css/{name}.css', content)
+    for filename in SINGLE_ASSETS + page_css_files(static_folder):
+        minify = minify_css if filename.endswith('.css') else minify_js
+        manifest[filename] = _write_fingerprinted(static_folder, filename, minify(_read(static_folder, filename)))
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+_INLINE_STYLE = re.compile(
+    r'({%\s*block extra_css\s*%}(?:(?!{%\s*endblock).)*?)<style>\n?(.*?)</style>((?:(?!{%\s*endblock).)*?{%\s*endblock\s*%})',
+    re.S
+)
+
+def extract_inline_css(template_folder, static_folder, template_name):
+    """
+    Move the <style> block inside a template's extra_css block into
+    static/css/pages/<name>.css and link it with asset_url(). Blocks
+    containing Jinja syntax are left alone. Returns the new filename or None.
+    """
+    path = os.path.join(template_folder, template_name)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    match = _INLINE_STYLE.search(source)
+    if not match or '{{' in match.group(2) or '{%' in match.group(2):
+        return None
+
+    filename = f"{PAGE_CSS_DIR}/{template_name[:-len('.html')].replace('/', '_')}.css"
+    css_path = os.path.join(static_folder, filename)
+    os.makedirs(os.path.dirname(css_path), exist_ok=True)
+    with open(css_path, 'w', encoding='utf-8') as f:
+        f.write(match.group(2))
+    link = f"<link rel=\"stylesheet\" href=\"{{{{ asset_url('{filename}') }}}}\">"
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source[:match.start()] + match.group(1) + link + match.group(3) + source[match.end():])
+    return filename
+
+# RUNTIME
+
+class AssetPipeline:
+    """
+    Resolves logical asset names to the fingerprinted files listed in
+    static/dist/manifest.json and serves those files with year-long immutable
+    Cache-Control, preferring a precompressed .br/.gz sibling when the client
+    accepts it. Without a manifest (or in debug mode) templates get the
+    unbuilt source files, so the app works before build_assets.py has run.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['asset_pipeline'] = self
+        self.static_folder = app.static_folder
+        manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        if not app.debug and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'dist_asset', self.serve)
+        app.jinja_env.globals.update(asset_url=self.asset_url, css_bundle=self.css_bundle)
+
+    def asset_url(self, filename):
+        hashed = self.manifest.get(filename)
+        if hashed:
+            return url_for('static', filename=hashed)
+        return url_for('static', filename=filename)
+
+    def css_bundle(self, name):
+        hashed = self.manifest.get(f'bundle:{name}.css')
+        sources = [hashed] if hashed else CSS_BUNDLES[name]
+        return Markup('\n'.join(
+            f'<link rel="stylesheet" href="{escape(url_for("static", filename=source))}">' for source in sources
+        ))
+
+    def serve(self, filename):
+        directory = os.path.join(self.static_folder, DIST_DIR)
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''),
+                             os.path.isfile(os.path.join(directory, filename + '.br')))
+        if encoding == 'gzip' and not os.path.isfile(os.path.join(directory, filename + '.gz')):
+            encoding = None
+
+        if encoding:
+            response = send_from_directory(directory, filename + ('.br' if encoding == 'br' else '.gz'),
+                                           mimetype=mimetypes.guess_type(filename)[0],
+                                           max_age=IMMUTABLE_MAX_AGE)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(directory, filename, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
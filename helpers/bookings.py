@@ -0,0 +1,60 @@
+from datetime import datetime
+from models import db, Booking, BookingSlot
+from forms import VISIT_TIME_SLOTS
+
+def _slot_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+def reserve_slot(booking):
+    """
+    Claim the booking's visit slot. The unique constraint on booking_slots makes
+    the commit fail with IntegrityError if another request took it first.
+    """
+    booking.slot = BookingSlot(
+        property_id=booking.property_id,
+        slot_date=_slot_date(booking.booking_date),
+        slot_time=booking.booking_time
+    )
+
+def release_slot(booking):
+    """Free the booking's visit slot (delete-orphan removes the row on commit)."""
+    booking.slot = None
+
+def get_slot_availability(property_id, day):
+    """Availability of every visit slot for a property on a given date."""
+    taken = {
+        slot_time for (slot_time,) in db.session.query(BookingSlot.slot_time)
+        .filter_by(property_id=property_id, slot_date=day)
+    }
+    return [
+        {'time': value, 'label': label, 'available': value not in taken}
+        for value, label in VISIT_TIME_SLOTS
+    ]
+
+def backfill_booking_slots():
+    """
+    Create slots for active bookings made before slot tracking existed.
+    The earliest booking wins when legacy rows share a slot.
+    """
+    pending = Booking.query.outerjoin(BookingSlot).filter(
+        BookingSlot.id.is_(None),
+        Booking.status != 'Cancelled'
+    ).order_by(Booking.created_at).all()
+    if not pending:
+        return 0
+
+    property_ids = {b.property_id for b in pending}
+    seen = {
+        (s.property_id, s.slot_date, s.slot_time)
+        for s in BookingSlot.query.filter(BookingSlot.property_id.in_(property_ids))
+    }
+    count = 0
+    for booking in pending:
+        key = (booking.property_id, _slot_date(booking.booking_date), booking.booking_time)
+        if key in seen:
+            continue
+        seen.add(key)
+        reserve_slot(booking)
+        count += 1
+    db.session.commit()
+    return count
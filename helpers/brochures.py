@@ -0,0 +1,179 @@
+import glob
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit, unquote
+from flask import current_app, render_template
+from slugify import slugify
+from werkzeug.security import safe_join
+from models import db, Property
+try:
+    import weasyprint
+except (ImportError, OSError):  # OSError: the Pango libraries WeasyPrint needs are missing
+    weasyprint = None
+
+# Base URL brochures are rendered against; its paths are served from disk, never over HTTP
+LOCAL_BASE = 'http://brochure.local/'
+REMOTE_TIMEOUT = 10
+
+def pdf_enabled():
+    return weasyprint is not None
+
+def download_name(property):
+    return f"{property.id}-{slugify(property.title or '')[:60] or 'property'}.pdf"
+
+def cache_path(property_id, updated_at):
+    """Cached PDF for this version of the property; an edit changes updated_at and so the path."""
+    version = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+    return os.path.join(current_app.config['BROCHURE_CACHE_DIR'], f'{property_id}-{version}.pdf')
+
+def _fetch(url):
+    """
+    Resolve brochure resources. Uploads and static files are read from disk
+    (including UPLOAD_FOLDER outside static/); remote images such as Vercel
+    Blob URLs are fetched with a timeout.
+    """
+    if not url.startswith(LOCAL_BASE):
+        return weasyprint.default_url_fetcher(url, timeout=REMOTE_TIMEOUT)
+    path = unquote(urlsplit(url).path).lstrip('/')
+    if path.startswith('static/'):
+        path = path[len('static/'):]
+    if path.startswith('uploads/'):
+        filename = safe_join(os.path.abspath(current_app.config['UPLOAD_FOLDER']), path[len('uploads/'):])
+    else:
+        filename = safe_join(current_app.static_folder, path)
+    if filename is None or not os.path.isfile(filename):
+        raise ValueError(f'Brochure resource not found: {url}')
+    return {'file_obj': open(filename, 'rb'), 'redirected_url': url}
+
+def render_pdf(property):
+    html = render_template('brochure.html', property=property, pdf=True)
+    return weasyprint.HTML(string=html, base_url=LOCAL_BASE, url_fetcher=_fetch).write_pdf()
+
+def get_brochure(property):
+    """
+    Path of the property's brochure PDF, rendered with WeasyPrint on a cache
+    miss. Files are keyed by id and updated_at, written atomically, and older
+    versions of the same property are removed once the new one is in place.
+    """
+    path = cache_path(property.id, property.updated_at)
+    if os.path.exists(path):
+        return path
+    pdf = render_pdf(property)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp, path)
+    for stale in glob.glob(os.path.join(os.path.dirname(path), f'{property.id}-*.pdf')):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return path
+
+# BULK
+
+# Set in the parent before the pool forks; workers inherit the app from it
+_pool_app = None
+
+def _init_worker():
+    with _pool_app.app_context():
+        # Pooled connections came from the parent and must not be shared with it
+        db.engine.dispose(close=False)
+
+def _render(property_id):
+    """(property_id, pdf path, download name, error) for one brochure, inside a request context for url_for."""
+    with _pool_app.test_request_context(base_url=_pool_app.config['SITE_URL']):
+        try:
+            property = db.session.get(Property, property_id)
+            if property is None:
+                return property_id, None, None, 'not found'
+            return property_id, get_brochure(property), download_name(property), None
+        except Exception as e:
+            return property_id, None, None, f'{type(e).__name__}: {e}'
+        finally:
+            db.session.remove()
+
+def iter_brochures(property_ids, workers=None):
+    """
+    Yield (property_id, path, download name, error) for each property as its
+    brochure becomes available. Cached brochures come first; the rest are
+    rendered across a pool of forked worker processes (in this process where
+    fork is unavailable or workers is 1).
+    """
+    global _pool_app
+    workers = workers or current_app.config['BROCHURE_WORKERS'] or os.cpu_count() or 1
+    ids = list(dict.fromkeys(property_ids))
+    missing = []
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        rows = {row.id: row for row in db.session.query(Property.id, Property.title, Property.updated_at).filter(Property.id.in_(batch))}
+        for property_id in batch:
+            row = rows.get(property_id)
+            if row is None:
+                yield property_id, None, None, 'not found'
+            elif os.path.exists(cache_path(row.id, row.updated_at)):
+                yield property_id, cache_path(row.id, row.updated_at), download_name(row), None
+            else:
+                missing.append(property_id)
+    if not missing:
+        return
+
+    _pool_app = current_app._get_current_object()
+    if workers > 1 and len(missing) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing)), mp_context=context,
+                                 initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, property_id) for property_id in missing]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # A client that disconnects mid-download stops the remaining renders
+                for future in futures:
+                    future.cancel()
+    else:
+        for property_id in missing:
+            yield _render(property_id)
+
+class _ZipStream:
+    """Write-only file object for zipfile; zipfile writes data descriptors when it cannot seek."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def stream_brochures_zip(property_ids, workers=None):
+    """
+    Generate a ZIP of brochure PDFs chunk by chunk as each one is rendered,
+    so the first bytes go out before the last brochure exists. PDFs are
+    already compressed and are stored as-is. Failures are listed in
+    errors.txt at the end of the archive.
+    """
+    stream = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as zf:
+        for property_id, path, name, error in iter_brochures(property_ids, workers):
+            if error:
+                errors.append(f'{property_id}: {error}')
+                continue
+            zf.write(path, arcname=name)
+            yield stream.drain()
+        if errors:
+            zf.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield stream.drain()
@@ -0,0 +1,358 @@
+import csv
+import io
+import json
+import os
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from werkzeug.datastructures import MultiDict
+from sqlalchemy.orm import selectinload
+from models import db, Property, PropertyImage, PropertyVideo, PropertyDocument, ActivityLog, ImportJob, PropertyChange, note_property_changes
+from forms import PropertyForm
+from helpers.alerts import deliver_property_alerts
+
+PROPERTY_FIELDS = ['id', 'title', 'description', 'property_type', 'price', 'area', 'location',
+                   'address', 'latitude', 'longitude', 'status', 'featured']
+MEDIA_FIELDS = ['images', 'videos', 'documents']
+EXPORT_FIELDS = PROPERTY_FIELDS + MEDIA_FIELDS
+
+# CSV cells hold media lists as "a|b|c"; documents may be "name::url"
+LIST_SEPARATOR = '|'
+DOCUMENT_SEPARATOR = '::'
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+# Progress is written to import_jobs at least this often (rows), so any process can report it
+PROGRESS_EVERY = 100
+# A queued or running job without progress for this long lost its process (restart, serverless freeze)
+STALE_AFTER = timedelta(minutes=10)
+JOB_COUNTERS = ('processed', 'inserted', 'updated', 'unchanged', 'failed')
+
+def detect_format(filename):
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if ext == 'csv':
+        return 'csv'
+    if ext in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    return None
+
+# EXPORT
+
+def _serialize(property):
+    row = {field: getattr(property, field) for field in PROPERTY_FIELDS}
+    row['images'] = [image.image_url for image in sorted(property.images, key=lambda i: (not i.is_primary, i.id))]
+    row['videos'] = [video.video_url for video in property.videos]
+    row['documents'] = [{'name': d.document_name, 'url': d.document_url, 'type': d.document_type,
+                         'size': d.size_bytes or d.file_size}
+                        for d in property.documents]
+    return row
+
+def iter_properties():
+    """
+    Yield every property as a plain dict, EXPORT_BATCH_SIZE rows at a time.
+    Each batch is expunged once written so a full dump runs in bounded memory.
+    """
+    stmt = db.select(Property).options(
+        selectinload(Property.images),
+        selectinload(Property.videos),
+        selectinload(Property.documents),
+    ).order_by(Property.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for partition in db.session.execute(stmt).scalars().partitions():
+        rows = [_serialize(property) for property in partition]
+        # expunge_all() would swap out the identity map the open result is still loading into
+        for property in partition:
+            db.session.expunge(property)  # cascades to the media collections
+        yield from rows
+
+def export_jsonl():
+    for row in iter_properties():
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+def export_csv():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in iter_properties():
+        row['images'] = LIST_SEPARATOR.join(row['images'])
+        row['videos'] = LIST_SEPARATOR.join(row['videos'])
+        row['documents'] = LIST_SEPARATOR.join(f"{d['name']}{DOCUMENT_SEPARATOR}{d['url']}" for d in row['documents'])
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+# IMPORT
+
+def _read_rows(path, fmt):
+    """Yield (row number, row, errors); a malformed JSONL line is reported on its own row."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            for row_no, row in enumerate(csv.DictReader(f), start=1):
+                yield row_no, row, None
+            return
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, {'row': [f'Invalid JSON: {e.msg} (column {e.colno}).']}
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, {'row': ['Expected a JSON object.']}
+                continue
+            yield line_no, row, None
+
+def _as_list(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return value
+    value = str(value).strip()
+    return [part.strip() for part in value.split(LIST_SEPARATOR) if part.strip()] if value else []
+
+def _document_row(property_id, doc):
+    if isinstance(doc, dict):
+        name, url = doc.get('name'), doc.get('url')
+        doc_type, size = doc.get('type'), doc.get('size')
+    else:
+        name, _, url = doc.rpartition(DOCUMENT_SEPARATOR)
+        doc_type = size = None
+    name = name or os.path.basename(url)
+    if not doc_type:
+        doc_type = url.rsplit('.', 1)[-1].upper() if '.' in url else 'FILE'
+    size_bytes = int(size) if isinstance(size, int) or str(size or '').strip().isdigit() else None
+    return {'property_id': property_id, 'document_name': name, 'document_url': url, 'document_type': doc_type,
+            'file_size': None if size_bytes is not None else size, 'size_bytes': size_bytes}
+
+def validate_row(row):
+    """Validate one import row with PropertyForm's rules. Returns (values, media, errors)."""
+    formdata = MultiDict()
+    for field in PROPERTY_FIELDS[1:]:
+        value = row.get(field)
+        if field == 'featured':
+            value = 'y' if str(value).strip().lower() in ('1', 'true', 'yes', 'y') else ''
+        formdata[field] = '' if value is None else str(value)
+    form = PropertyForm(formdata=formdata, meta={'csrf': False})
+    if not form.validate():
+        return None, None, {name: msgs for name, msgs in form.errors.items()}
+
+    values = {field: form[field].data for field in PROPERTY_FIELDS[1:]}
+    property_id = row.get('id')
+    if property_id not in (None, ''):
+        try:
+            values['id'] = int(property_id)
+        except (TypeError, ValueError):
+            return None, None, {'id': ['Not a valid integer.']}
+    media = {field: _as_list(row.get(field)) for field in MEDIA_FIELDS}
+    return values, media, None
+
+def _reject(job, row_no, errors):
+    job['failed'] += 1
+    if len(job['errors']) < MAX_REPORTED_ERRORS:
+        job['errors'].append({'row': row_no, 'errors': errors})
+
+def _current_media(ids):
+    """{property id: {field: comparable list}} of the media stored for ids."""
+    media = {pid: {'images': [], 'videos': [], 'documents': []} for pid in ids}
+    for pid, url in db.session.query(PropertyImage.property_id, PropertyImage.image_url).filter(
+            PropertyImage.property_id.in_(ids)).order_by(PropertyImage.is_primary.desc(), PropertyImage.id):
+        media[pid]['images'].append(url)
+    for pid, url in db.session.query(PropertyVideo.property_id, PropertyVideo.video_url).filter(
+            PropertyVideo.property_id.in_(ids)).order_by(PropertyVideo.id):
+        media[pid]['videos'].append(url)
+    for pid, name, url in db.session.query(PropertyDocument.property_id, PropertyDocument.document_name,
+                                           PropertyDocument.document_url).filter(
+            PropertyDocument.property_id.in_(ids)).order_by(PropertyDocument.id):
+        media[pid]['documents'].append((name, url))
+    return media
+
+def _comparable(field, items):
+    if field == 'documents':
+        return [(doc['document_name'], doc['document_url']) for doc in (_document_row(None, item) for item in items)]
+    return list(items)
+
+def _flush(batch, job):
+    """
+    Upsert one validated batch with executemany statements, then replace
+    supplied media. Rows with an id that is not stored yet are inserted under
+    that id, so an export re-imports into an empty database; rows without one
+    get a new id. Rows identical to the stored property are skipped, so
+    updated_at (and every cache keyed on it) only moves for real changes.
+    """
+    ids = [values['id'] for _, values, _ in batch if 'id' in values]
+    existing, stored_media = {}, {}
+    if ids:
+        columns = [getattr(Property, field) for field in PROPERTY_FIELDS]
+        existing = {row.id: row._asdict() for row in db.session.query(*columns).filter(Property.id.in_(ids))}
+        stored_media = _current_media(list(existing))
+
+    now = datetime.utcnow()
+    inserts, keyed_inserts, updates, replace, seen = [], [], [], [], set()
+    for row_no, values, media in batch:
+        if 'id' not in values:
+            inserts.append((values, media))
+            continue
+        if values['id'] in seen:
+            _reject(job, row_no, {'id': [f"Property {values['id']} already appears on an earlier row."]})
+            continue
+        seen.add(values['id'])
+        current = existing.get(values['id'])
+        if current is None:
+            keyed_inserts.append((values, media))
+            continue
+        changed_fields = any(values[field] != current[field] for field in PROPERTY_FIELDS[1:])
+        changed_media = {field: items for field, items in media.items()
+                         if items is not None and _comparable(field, items) != stored_media[values['id']][field]}
+        if not changed_fields and not changed_media:
+            job['unchanged'] += 1
+            continue
+        updates.append((dict(values, updated_at=now), changed_media))
+
+    if updates:
+        db.session.execute(db.update(Property), [values for values, _ in updates])
+    if keyed_inserts:
+        db.session.execute(db.insert(Property), [values for values, _ in keyed_inserts])
+        if db.engine.dialect.name == 'postgresql':
+            # Explicit ids do not advance the sequence; move it past them before inserting rows without one
+            db.session.execute(db.text(
+                "SELECT setval(pg_get_serial_sequence('properties', 'id'), (SELECT MAX(id) FROM properties))"))
+    if inserts:
+        new_ids = db.session.execute(
+            db.insert(Property).returning(Property.id, sort_by_parameter_order=True),
+            [values for values, _ in inserts]
+        ).scalars().all()
+        for (values, _), new_id in zip(inserts, new_ids):
+            values['id'] = new_id
+    for values, media in keyed_inserts + inserts:
+        replace.append((values, {field: items for field, items in media.items() if items is not None}))
+    replace += updates
+
+    images, videos, documents = [], [], []
+    replaced = {field: [] for field in MEDIA_FIELDS}
+    for values, media in replace:
+        property_id = values['id']
+        if 'images' in media:
+            replaced['images'].append(property_id)
+            images += [{'property_id': property_id, 'image_url': url, 'is_primary': i == 0}
+                       for i, url in enumerate(media['images'])]
+        if 'videos' in media:
+            replaced['videos'].append(property_id)
+            videos += [{'property_id': property_id, 'video_url': url,
+                        'video_type': 'youtube' if 'youtube.com' in url or 'youtu.be' in url else 'vimeo'}
+                       for url in media['videos']]
+        if 'documents' in media:
+            replaced['documents'].append(property_id)
+            documents += [_document_row(property_id, doc) for doc in media['documents']]
+
+    for model, field, rows in ((PropertyImage, 'images', images),
+                               (PropertyVideo, 'videos', videos),
+                               (PropertyDocument, 'documents', documents)):
+        if replaced[field]:
+            db.session.execute(db.delete(model).where(model.property_id.in_(replaced[field])))
+        if rows:
+            db.session.execute(db.insert(model), rows)
+
+    # Bulk statements skip the flush events, so record price history and alert changes here
+    changes = []
+    for values, _ in replace:
+        current = existing.get(values['id'], {})
+        changes.append(PropertyChange(values['id'], current.get('price'), values['price'],
+                                      current.get('status'), values['status']))
+    note_property_changes(db.session, changes)
+    db.session.commit()
+    deliver_property_alerts()
+    job['inserted'] += len(inserts) + len(keyed_inserts)
+    job['updated'] += len(updates)
+
+def _save_job(job, **extra):
+    """Write the job's progress on its own connection, like the session store does."""
+    values = {field: job[field] for field in JOB_COUNTERS}
+    values.update(status=job['status'], message=job.get('message'), errors=json.dumps(job['errors']),
+                  updated_at=datetime.utcnow(), **extra)
+    table = ImportJob.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.id == job['id']).values(**values))
+
+def _run_import(app, job_id, path, fmt):
+    job = dict({field: 0 for field in JOB_COUNTERS}, id=job_id, status='running', errors=[], message=None)
+    # PropertyForm needs a request context; validation never reads the request itself
+    with app.test_request_context():
+        try:
+            _save_job(job)
+            batch = []
+            for row_no, row, errors in _read_rows(path, fmt):
+                job['processed'] += 1
+                if errors is None:
+                    values, media, errors = validate_row(row)
+                if errors:
+                    _reject(job, row_no, errors)
+                else:
+                    batch.append((row_no, values, media))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    _flush(batch, job)
+                    batch = []
+                if job['processed'] % PROGRESS_EVERY == 0:
+                    _save_job(job)
+            if batch:
+                _flush(batch, job)
+            job['status'] = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            job['status'] = 'failed'
+            job['message'] = str(e)
+            app.logger.error(f"Property import {job_id} failed: {e}\n{traceback.format_exc()}")
+        finally:
+            try:
+                _save_job(job, finished_at=datetime.utcnow())
+            except Exception as e:
+                app.logger.error(f"Could not record the end of property import {job_id}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            try:
+                db.session.add(ActivityLog(
+                    action='import_properties',
+                    description=f"Import {job_id} {job['status']}: {job['inserted']} added, "
+                                f"{job['updated']} updated, {job['unchanged']} unchanged, {job['failed']} rejected",
+                    user_type='admin'
+                ))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            db.session.remove()
+
+def start_import(app, path, fmt):
+    """Import the saved upload at path in a background thread; returns the job id."""
+    job_id = uuid.uuid4().hex[:12]
+    with db.engine.begin() as conn:
+        conn.execute(ImportJob.__table__.insert().values(
+            id=job_id, format=fmt, status='queued', errors='[]', started_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(), **{field: 0 for field in JOB_COUNTERS}))
+    threading.Thread(target=_run_import, args=(app, job_id, path, fmt), daemon=True).start()
+    return job_id
+
+def import_job_status(job_id):
+    """Progress of an import as a dict, from whichever process ran it; None for an unknown id."""
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return None
+    status, message = job.status, job.message
+    if status in ('queued', 'running') and job.updated_at < datetime.utcnow() - STALE_AFTER:
+        status, message = 'failed', 'The import stopped making progress (its server process ended).'
+    data = {field: getattr(job, field) or 0 for field in JOB_COUNTERS}
+    data.update({
+        'id': job.id,
+        'format': job.format,
+        'status': status,
+        'message': message,
+        'errors': json.loads(job.errors or '[]'),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+    return data
@@ -0,0 +1,55 @@
+import threading
+import time
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Small in-process cache with per-entry expiry. Every gunicorn worker or
+    serverless instance keeps its own copy, so entries must be safe to serve
+    slightly stale until they expire.
+    """
+
+    def __init__(self, ttl=60, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING or entry[0] < time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._evict()
+            self._data[key] = (expires, value)
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *prefix):
+        """Drop every tuple key starting with prefix (all keys when no prefix is given)."""
+        with self._lock:
+            if not prefix:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if isinstance(k, tuple) and k[:len(prefix)] == prefix]:
+                del self._data[key]
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires < now]:
+            del self._data[key]
+        # Still full: drop the oldest quarter (dicts keep insertion order)
+        if len(self._data) >= self.max_entries:
+            for key in list(self._data)[:max(1, self.max_entries // 4)]:
+                del self._data[key]
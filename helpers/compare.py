@@ -0,0 +1,101 @@
+import math
+from itertools import combinations
+from flask import current_app, request, url_for
+from sqlalchemy.orm import selectinload
+from models import db, Property, Favorite
+from helpers.cache import TTLCache
+
+# Comparison payloads keyed by (sorted ids, newest updated_at, row count, favorites),
+# so an edited, deleted or (un)favorited listing produces a new key instead of a stale hit
+compare_cache = TTLCache(ttl=300, max_entries=512)
+
+def parse_ids(raw, limit):
+    """Parse "3,1,2" into a sorted, de-duplicated tuple of at most limit ids."""
+    ids = set()
+    for part in (raw or '').split(','):
+        part = part.strip()
+        if part.isdigit():
+            ids.add(int(part))
+    return tuple(sorted(ids))[:limit]
+
+def requested_ids():
+    return parse_ids(request.args.get('ids'), current_app.config['COMPARE_MAX_PROPERTIES'])
+
+def _version(ids):
+    """Newest updated_at and row count of the given properties, and (total favorites_count, newest favorite id)."""
+    newest_favorite = db.select(db.func.max(Favorite.id)).where(Favorite.property_id.in_(ids)).scalar_subquery()
+    last_modified, count, favorites, newest = db.session.query(
+        db.func.max(Property.updated_at), db.func.count(Property.id), db.func.sum(Property.favorites_count), newest_favorite
+    ).filter(Property.id.in_(ids)).one()
+    return last_modified, count, (favorites, newest)
+
+def compare_validator():
+    """HTTP cache validator for /api/compare."""
+    ids = requested_ids()
+    if not ids:
+        return None
+    last_modified, count, favorites = _version(ids)
+    return last_modified, (ids, count, favorites)
+
+def distance_km(a, b):
+    """Great-circle (haversine) distance between two properties, or None without coordinates."""
+    if None in (a.latitude, a.longitude, b.latitude, b.longitude):
+        return None
+    lat1, lng1, lat2, lng2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return round(6371.0 * 2 * math.asin(math.sqrt(h)), 2)
+
+def _serialize(property):
+    images = sorted(property.images, key=lambda i: (not i.is_primary, i.id))
+    return {
+        'id': property.id,
+        'title': property.title,
+        'property_type': property.property_type,
+        'location': property.location,
+        'address': property.address,
+        'price': property.price,
+        'area': property.area,
+        'price_per_sqft': round(property.price / property.area, 2) if property.area else None,
+        'status': property.status,
+        'latitude': property.latitude,
+        'longitude': property.longitude,
+        'favorites_count': property.favorites_count,
+        'image_url': images[0].image_url if images else '',
+        'images': [image.image_url for image in images],
+        'documents': [{'name': d.document_name, 'url': d.document_url, 'type': d.document_type}
+                      for d in property.documents],
+        'url': url_for('property_detail', id=property.id),
+        'updated_at': property.updated_at.isoformat() if property.updated_at else None,
+    }
+
+def _best(items, key, lowest=True):
+    candidates = [item for item in items if item[key] is not None]
+    if not candidates:
+        return None
+    pick = min if lowest else max
+    return pick(candidates, key=lambda item: item[key])['id']
+
+def build_comparison(ids):
+    """
+    Load the properties with images and documents in a fixed number of
+    queries and compute the derived metrics: price per sq ft, pairwise
+    distances and which listing wins on price, price per sq ft and area.
+    """
+    properties = db.session.execute(
+        db.select(Property).options(selectinload(Property.images), selectinload(Property.documents))
+        .where(Property.id.in_(ids)).order_by(Property.id)
+    ).scalars().all()
+    items = [_serialize(p) for p in properties]
+    return {
+        'properties': items,
+        'missing': sorted(set(ids) - {p.id for p in properties}),
+        'distances': [{'from': a.id, 'to': b.id, 'km': distance_km(a, b)} for a, b in combinations(properties, 2)],
+        'best': {
+            'price': _best(items, 'price'),
+            'price_per_sqft': _best(items, 'price_per_sqft'),
+            'area': _best(items, 'area', lowest=False),
+        },
+    }
+
+def get_comparison(ids):
+    return compare_cache.get_or_set((ids,) + tuple(_version(ids)), lambda: build_comparison(ids))
@@ -0,0 +1,145 @@
+import zlib
+from werkzeug.datastructures import Headers
+from werkzeug.wsgi import ClosingIterator
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/x-ndjson',
+                      'application/xml', 'application/atom+xml', 'application/rss+xml', 'image/svg+xml')
+# Streamed responses are flushed to the client after this many input bytes, not after every chunk
+STREAM_FLUSH_SIZE = 16 * 1024
+
+def negotiate(accept_encoding, brotli_available=True):
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+    if brotli_available and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', accepted.get('*', 0)) > 0:
+        return 'gzip'
+    return None
+
+class _Compressor:
+    def __init__(self, encoding, level, brotli_quality):
+        if encoding == 'br':
+            self._impl = brotli.Compressor(quality=brotli_quality)
+            self.compress, self._flush, self._finish = self._impl.process, self._impl.flush, self._impl.finish
+        else:
+            self._impl = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+            self.compress = self._impl.compress
+            self._flush = lambda: self._impl.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._impl.flush
+
+    def flush(self):
+        return self._flush()
+
+    def finish(self):
+        return self._finish()
+
+class ResponseCompression:
+    """
+    WSGI middleware compressing text responses with brotli (when the optional
+    package is installed) or gzip, negotiated from Accept-Encoding.
+
+    Responses with a Content-Length are compressed in one go and skipped below
+    COMPRESS_MIN_SIZE. Streamed responses (no Content-Length) are compressed
+    as they are produced, with a sync flush every STREAM_FLUSH_SIZE bytes of
+    input, so clients still receive rows progressively without a flush block
+    per row. Archives, images, PDFs and anything already
+    carrying a Content-Encoding pass through untouched.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        app.extensions['response_compression'] = self
+        self.config = app.config
+        if app.config['COMPRESS_ENABLED']:
+            self.wsgi_app = app.wsgi_app
+            app.wsgi_app = self
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''), brotli is not None)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            return self._write_unsupported
+
+        body = self.wsgi_app(environ, capture)
+        headers = Headers(captured['headers'])
+        if not self._should_compress(captured['status'], headers):
+            start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+            return body
+
+        headers['Content-Encoding'] = encoding
+        vary = headers.get('Vary')
+        headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # The bytes differ from the identity encoding, so a strong validator no longer holds
+            headers['ETag'] = 'W/' + etag
+        compressor = _Compressor(encoding, self.config['COMPRESS_LEVEL'], self.config['COMPRESS_BROTLI_QUALITY'])
+
+        if 'Content-Length' in headers:
+            try:
+                data = compressor.compress(b''.join(body)) + compressor.finish()
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            headers['Content-Length'] = str(len(data))
+            start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+            return [data]
+
+        start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+        return ClosingIterator(self._stream(body, compressor), getattr(body, 'close', None))
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise RuntimeError('ResponseCompression does not support the WSGI write() callable')
+
+    def _should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if 'Content-Encoding' in headers or 'no-transform' in headers.get('Cache-Control', ''):
+            return False
+        content_type = headers.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = headers.get('Content-Length')
+        return length is None or int(length) >= self.config['COMPRESS_MIN_SIZE']
+
+    def _stream(self, body, compressor):
+        pending = 0
+        for chunk in body:
+            if not chunk:
+                continue
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_SIZE:
+                data += compressor.flush()
+                pending = 0
+            if data:
+                yield data
+        yield compressor.finish()
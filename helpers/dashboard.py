@@ -0,0 +1,88 @@
+from flask import current_app, url_for
+from sqlalchemy.orm import selectinload
+from models import db, User, Favorite, Booking, Property
+from helpers.cache import TTLCache
+from helpers.http_cache import listing_validator
+
+# Paginated dashboard JSON, keyed by (user_id, kind, page) plus the listing version, so
+# admin edits and deletes of properties produce new keys instead of stale rows
+dashboard_cache = TTLCache(ttl=60)
+
+def load_user_dashboard(user_id):
+    """
+    Load a user with favorites, alerts and bookings (plus their properties and
+    images) using selectin eager loads, so the query count does not grow with
+    the number of rows.
+    """
+    user = db.session.get(User, user_id, options=[
+        selectinload(User.favorites).selectinload(Favorite.property).selectinload(Property.images),
+        selectinload(User.alerts),
+        selectinload(User.bookings).selectinload(Booking.property).selectinload(Property.images),
+    ])
+    if user is None:
+        return None
+    return {
+        'user': user,
+        'favorites': sorted(user.favorites, key=lambda f: f.created_at or f.id, reverse=True),
+        'alerts': user.alerts,
+        'bookings': sorted(user.bookings, key=lambda b: b.created_at or b.id, reverse=True),
+    }
+
+def _property_summary(property):
+    return {
+        'id': property.id,
+        'title': property.title,
+        'property_type': property.property_type,
+        'location': property.location,
+        'price': property.price,
+        'area': property.area,
+        'status': property.status,
+        'image_url': property.images[0].image_url if property.images else '',
+        'url': url_for('property_detail', id=property.id),
+    }
+
+def _page_payload(pagination, items):
+    return {
+        'items': items,
+        'page': pagination.page,
+        'pages': pagination.pages,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+    }
+
+def favorites_page(user_id, page):
+    def build():
+        pagination = Favorite.query.filter_by(user_id=user_id).options(
+            selectinload(Favorite.property).selectinload(Property.images)
+        ).order_by(Favorite.created_at.desc()).paginate(
+            page=page, per_page=current_app.config['USER_PAGE_SIZE'], error_out=False
+        )
+        items = [
+            dict(_property_summary(f.property), favorited_at=f.created_at.isoformat() if f.created_at else None)
+            for f in pagination.items
+        ]
+        return _page_payload(pagination, items)
+    return dashboard_cache.get_or_set((user_id, 'favorites', page) + tuple(listing_validator()), build,
+                                      current_app.config['DASHBOARD_CACHE_TTL'])
+
+def bookings_page(user_id, page):
+    def build():
+        pagination = Booking.query.filter_by(user_id=user_id).options(
+            selectinload(Booking.property).selectinload(Property.images)
+        ).order_by(Booking.created_at.desc()).paginate(
+            page=page, per_page=current_app.config['USER_PAGE_SIZE'], error_out=False
+        )
+        items = [{
+            'id': b.id,
+            'property': _property_summary(b.property),
+            'booking_date': b.booking_date.strftime('%Y-%m-%d'),
+            'booking_time': b.booking_time,
+            'number_of_visitors': b.number_of_visitors,
+            'status': b.status,
+        } for b in pagination.items]
+        return _page_payload(pagination, items)
+    return dashboard_cache.get_or_set((user_id, 'bookings', page) + tuple(listing_validator()), build,
+                                      current_app.config['DASHBOARD_CACHE_TTL'])
+
+def invalidate_user_dashboard(user_id):
+    dashboard_cache.invalidate(user_id)
@@ -0,0 +1,139 @@
+from models import db, Property
+from helpers.cache import TTLCache
+from helpers.http_cache import listing_validator
+
+# (key, label, lowest price, price below which the bucket ends)
+PRICE_BUCKETS = [
+    ('under-25l', 'Under ₹25 Lakh', None, 2500000),
+    ('25l-50l', '₹25 - 50 Lakh', 2500000, 5000000),
+    ('50l-1cr', '₹50 Lakh - 1 Crore', 5000000, 10000000),
+    ('1cr-2cr', '₹1 - 2 Crore', 10000000, 20000000),
+    ('above-2cr', 'Above ₹2 Crore', 20000000, None),
+]
+BUCKETS_BY_KEY = {bucket[0]: bucket for bucket in PRICE_BUCKETS}
+
+# Grouped rows and facet counts keyed by the normalized filters plus the listing
+# version, so any edit, insert or delete produces new keys instead of stale counts
+facet_cache = TTLCache(ttl=300, max_entries=1024)
+
+def _float(value):
+    try:
+        return float(value) if value not in (None, '') else None
+    except ValueError:
+        return None
+
+def normalize_filters(args):
+    """
+    Listing filters from query args as a hashable tuple of (name, value)
+    pairs. A missing `status` means Available; an empty one ("All Status")
+    means any status. A known `price` bucket replaces min_price/max_price.
+    """
+    price = args.get('price', '')
+    bucket = BUCKETS_BY_KEY.get(price)
+    return (
+        ('search', args.get('search', '').strip().lower()),
+        ('type', args.get('type', '').strip()),
+        ('location', args.get('location', '').strip()),
+        ('status', args.get('status', 'Available').strip()),
+        ('price', bucket[0] if bucket else ''),
+        ('min_price', None if bucket else _float(args.get('min_price'))),
+        ('max_price', None if bucket else _float(args.get('max_price'))),
+    )
+
+def _price_clauses(filters):
+    bucket = BUCKETS_BY_KEY.get(filters['price'])
+    clauses = []
+    if bucket:
+        _, _, low, high = bucket
+        if low is not None:
+            clauses.append(Property.price >= low)
+        if high is not None:
+            clauses.append(Property.price < high)
+    else:
+        if filters['min_price'] is not None:
+            clauses.append(Property.price >= filters['min_price'])
+        if filters['max_price'] is not None:
+            clauses.append(Property.price <= filters['max_price'])
+    return clauses
+
+def _search_clause(filters):
+    return db.or_(Property.title.icontains(filters['search']), Property.location.icontains(filters['search']))
+
+def apply_filters(query, filters):
+    """Restrict a Property query to the normalized filters."""
+    filters = dict(filters)
+    if filters['search']:
+        query = query.filter(_search_clause(filters))
+    if filters['type']:
+        query = query.filter(Property.property_type == filters['type'])
+    if filters['location']:
+        query = query.filter(Property.location.icontains(filters['location']))
+    if filters['status']:
+        query = query.filter(Property.status == filters['status'])
+    for clause in _price_clauses(filters):
+        query = query.filter(clause)
+    return query
+
+def _bucket_expression():
+    whens = [(Property.price < high, key) for key, _, _, high in PRICE_BUCKETS if high is not None]
+    return db.case(*whens, else_=PRICE_BUCKETS[-1][0])
+
+def _cube(filters):
+    """
+    One grouped query: row counts per (type, location, status, price bucket,
+    inside the min/max price filter). Only the search text is applied in SQL;
+    every other filter is applied in Python so each facet can leave out its
+    own filter and still be counted from the same rows.
+    """
+    price_clauses = _price_clauses(filters)
+    in_range = db.case((db.and_(*price_clauses), 1), else_=0) if price_clauses else db.literal(1)
+    bucket = _bucket_expression()
+    query = db.session.query(
+        Property.property_type, Property.location, Property.status, bucket, in_range, db.func.count(Property.id)
+    )
+    if filters['search']:
+        query = query.filter(_search_clause(filters))
+    return query.group_by(Property.property_type, Property.location, Property.status, bucket, in_range).all()
+
+def _matches(row, filters, skip):
+    property_type, location, status, _, in_range, _ = row
+    if skip != 'type' and filters['type'] and property_type != filters['type']:
+        return False
+    if skip != 'location' and filters['location'] and filters['location'].lower() not in (location or '').lower():
+        return False
+    if skip != 'status' and filters['status'] and status != filters['status']:
+        return False
+    if skip != 'price' and not in_range:
+        return False
+    return True
+
+def count_facets(rows, filters):
+    filters = dict(filters)
+    facets = {}
+    for name, column in (('type', 0), ('location', 1), ('status', 2), ('price', 3)):
+        counts = {}
+        for row in rows:
+            value = row[column]
+            counts.setdefault(value, 0)
+            if _matches(row, filters, skip=name):
+                counts[value] += row[5]
+        facets[name] = counts
+    facets['price'] = [(key, label, facets['price'].get(key, 0)) for key, label, _, _ in PRICE_BUCKETS]
+    for name in ('type', 'location', 'status'):
+        facets[name] = sorted((value, count) for value, count in facets[name].items() if value)
+    facets['total'] = sum(row[5] for row in rows if _matches(row, filters, skip=None))
+    return facets
+
+def get_facets(filters):
+    """
+    Counts per property type, location, status and price bucket for the
+    current filters; each facet ignores its own selection so the counts say
+    how many results picking that option would give.
+    """
+    version = tuple(listing_validator())
+    options = dict(filters)
+    # The grouped rows only depend on the search text and price range, so
+    # switching type, location or status reuses them
+    cube_key = ('cube', options['search'], options['price'], options['min_price'], options['max_price']) + version
+    rows = facet_cache.get_or_set(cube_key, lambda: [tuple(row) for row in _cube(options)])
+    return facet_cache.get_or_set(('facets', filters) + version, lambda: count_facets(rows, filters))
@@ -0,0 +1,38 @@
+from flask import g, session
+from models import db, Property, Favorite
+
+def favorited_ids(user_id, property_ids=None):
+    """Set of property IDs the user has favorited, optionally limited to property_ids, in one query."""
+    query = db.session.query(Favorite.property_id).filter(Favorite.user_id == user_id)
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        if not property_ids:
+            return set()
+        query = query.filter(Favorite.property_id.in_(property_ids))
+    return {property_id for (property_id,) in query}
+
+def current_favorite_ids():
+    """Favorited property IDs of the logged-in user, loaded at most once per request."""
+    if 'user_id' not in session:
+        return set()
+    if 'favorite_ids' not in g:
+        g.favorite_ids = favorited_ids(session['user_id'])
+    return g.favorite_ids
+
+def adjust_favorites_count(property_id, delta):
+    """
+    Atomically shift the denormalized Property.favorites_count (committed with
+    the caller). updated_at is kept: it versions the listing, not its counters.
+    """
+    Property.query.filter_by(id=property_id).update(
+        {Property.favorites_count: db.func.coalesce(Property.favorites_count, 0) + delta,
+         Property.updated_at: Property.updated_at},
+        synchronize_session=False
+    )
+    g.pop('favorite_ids', None)
+
+def recount_favorites():
+    """Rebuild favorites_count for every property from the favorites table."""
+    count = db.select(db.func.count(Favorite.id)).where(Favorite.property_id == Property.id).scalar_subquery()
+    db.session.execute(db.update(Property).values(favorites_count=count, updated_at=Property.updated_at))
+    db.session.commit()
@@ -0,0 +1,167 @@
+import hashlib
+import os
+from datetime import timezone
+from flask import current_app, g, request, session
+from models import db, Property, SiteVideo, Favorite
+from helpers.compare import compare_validator
+
+def listing_validator():
+    """(newest updated_at, row count) over all properties; deletions change the count."""
+    return db.session.query(db.func.max(Property.updated_at), db.func.count(Property.id)).one()
+
+def favorites_version(user_id=None):
+    """(count, highest id) of one user's favorites, or of all of them; adding or removing one changes it."""
+    query = db.session.query(db.func.count(Favorite.id), db.func.max(Favorite.id))
+    if user_id is not None:
+        query = query.filter(Favorite.user_id == user_id)
+    return tuple(query.one())
+
+def page_favorites():
+    """
+    Favorites a listing page shows: the logged-in user's hearts, and under
+    sort=popular the favorites_count order. Toggling a favorite leaves
+    Property.updated_at alone, so these go into the ETag separately.
+    """
+    versions = []
+    if session.get('user_id'):
+        versions.append(favorites_version(session['user_id']))
+    if request.args.get('sort') == 'popular':
+        versions.append(favorites_version())
+    return versions
+
+def properties_validator():
+    last_modified, count = listing_validator()
+    return last_modified, (count, page_favorites())
+
+def home_validator():
+    """listing_validator plus the live hero video, which the home page also shows, and page_favorites()."""
+    last_modified, count = listing_validator()
+    hero = db.session.query(SiteVideo.id, SiteVideo.processed_at).filter(
+        SiteVideo.slot == 'hero', SiteVideo.status == 'ready').order_by(SiteVideo.id.desc()).first()
+    if hero and hero.processed_at and (last_modified is None or hero.processed_at > last_modified):
+        last_modified = hero.processed_at
+    return last_modified, (f'{count}:{hero.id if hero else 0}', page_favorites())
+
+def property_validator(id):
+    row = db.session.query(Property.updated_at).filter(Property.id == id).first()
+    return (row[0], 1) if row else None
+
+# Declarative per-endpoint policies. "validator" returns (last_modified, discriminator)
+# before the view runs so conditional GETs skip the queries and rendering; without
+# one the ETag is a hash of the rendered body.
+CACHE_POLICIES = {
+    'index': {'max_age': 60, 'stale_while_revalidate': 300, 'validator': home_validator},
+    'properties': {'max_age': 60, 'stale_while_revalidate': 300, 'validator': properties_validator},
+    'property_brochure': {'max_age': 300, 'stale_while_revalidate': 3600, 'validator': property_validator},
+    'property_brochure_pdf': {'max_age': 300, 'stale_while_revalidate': 3600, 'validator': property_validator},
+    'sitemap': {'max_age': 3600, 'stale_while_revalidate': 86400, 'validator': listing_validator},
+    'sitemap_shard': {'max_age': 3600, 'stale_while_revalidate': 86400, 'validator': lambda number: listing_validator()},
+    'listings_feed': {'max_age': 600, 'stale_while_revalidate': 3600, 'validator': listing_validator},
+    'map_view': {'max_age': 3600, 'stale_while_revalidate': 86400},
+    'api_properties': {'max_age': 60, 'stale_while_revalidate': 300, 'validator': listing_validator},
+    'api_compare': {'max_age': 60, 'stale_while_revalidate': 300, 'validator': compare_validator},
+}
+
+class HttpCache:
+    """
+    Applies CACHE_POLICIES: weak ETag and Last-Modified validators,
+    Cache-Control with max-age and stale-while-revalidate, and a 304 returned
+    from before_request when the client's copy is still current.
+
+    Pages show the logged-in user's navigation and favorites, so responses to
+    sessions with a user or admin are marked private and their ETag includes
+    the identity (listing validators add the user's favorites, page_favorites). Responses carrying flashed messages are never cached.
+    """
+
+    def __init__(self, app=None):
+        self.release = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_ENABLED', True)
+        app.extensions['http_cache'] = self
+        # Templates change on deploy without touching the data, so they are part of the ETag
+        self.release = os.getenv('VERCEL_GIT_COMMIT_SHA') or self._template_fingerprint(app)
+        if app.config['HTTP_CACHE_ENABLED']:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    def _template_fingerprint(self, app):
+        digest = hashlib.sha1()
+        for folder, _, files in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(folder, name))
+                digest.update(f'{name}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+        return digest.hexdigest()[:12]
+
+    def _identity(self):
+        if session.get('admin_logged_in'):
+            return 'admin'
+        if session.get('user_id'):
+            return f"user:{session['user_id']}"
+        return None
+
+    def _etag(self, *parts):
+        return hashlib.sha1('|'.join(str(p) for p in (self.release, self._identity()) + parts).encode()).hexdigest()[:20]
+
+    def _before_request(self):
+        g.pop('_cache_etag', None)
+        g.pop('_cache_last_modified', None)
+        policy = CACHE_POLICIES.get(request.endpoint)
+        if policy is None or request.method not in ('GET', 'HEAD') or '_flashes' in session:
+            return None
+        g._cache_policy = policy
+        if 'validator' not in policy:
+            return None
+
+        validated = policy['validator'](**(request.view_args or {}))
+        if validated is None:
+            return None
+        last_modified, discriminator = validated
+        g._cache_etag = self._etag(last_modified, discriminator)
+        g._cache_last_modified = last_modified.replace(tzinfo=timezone.utc) if last_modified else None
+
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(g._cache_etag)
+        elif request.if_modified_since and g._cache_last_modified:
+            fresh = g._cache_last_modified.replace(microsecond=0) <= request.if_modified_since
+        else:
+            fresh = False
+        if fresh:
+            response = current_app.response_class(status=304)
+            self._apply(response, policy)
+            return response
+        return None
+
+    def _apply(self, response, policy):
+        etag = g.get('_cache_etag')
+        if etag:
+            response.set_etag(etag, weak=True)
+        last_modified = g.get('_cache_last_modified')
+        if last_modified:
+            response.last_modified = last_modified
+        # send_file() responses come with no-cache, which would contradict max-age
+        response.cache_control.no_cache = None
+        if self._identity() is None:
+            response.cache_control.public = True
+        else:
+            response.cache_control.private = True
+        response.cache_control.max_age = policy['max_age']
+        if policy.get('stale_while_revalidate'):
+            # Werkzeug 2.3 has no attribute for this directive
+            response.cache_control['stale-while-revalidate'] = str(policy['stale_while_revalidate'])
+        response.vary.add('Cookie')
+
+    def _after_request(self, response):
+        policy = g.pop('_cache_policy', None)
+        if policy is None or response.status_code == 304:
+            return response
+        if response.status_code != 200 or '_flashes' in session:
+            response.cache_control.no_store = True
+            return response
+        self._apply(response, policy)
+        if not g.get('_cache_etag') and not response.is_streamed:
+            response.set_etag(self._etag(hashlib.sha1(response.get_data()).hexdigest()), weak=True)
+            response.make_conditional(request)
+        return response
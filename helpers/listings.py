@@ -0,0 +1,40 @@
+from models import Property
+from helpers.facets import apply_filters
+
+# Listing queries shared by the public routes and the static export (helpers/static_export.py),
+# so a pre-rendered page and its change key always come from the same query
+HOME_LIMIT = 9
+RELATED_LIMIT = 3
+
+def listing_query(filters, sort_by='recent'):
+    """Properties matching normalized filters in the order picked on the listing page."""
+    query = apply_filters(Property.query, filters)
+    if sort_by == 'price_low':
+        return query.order_by(Property.price.asc())
+    if sort_by == 'price_high':
+        return query.order_by(Property.price.desc())
+    if sort_by == 'area_low':
+        return query.order_by(Property.area.asc())
+    if sort_by == 'area_high':
+        return query.order_by(Property.area.desc())
+    if sort_by == 'popular':
+        return query.order_by(Property.favorites_count.desc(), Property.created_at.desc())
+    return query.order_by(Property.created_at.desc())
+
+def featured_query():
+    return Property.query.filter_by(featured=True, status='Available').limit(HOME_LIMIT)
+
+def recent_query():
+    return Property.query.filter_by(status='Available').order_by(Property.created_at.desc()).limit(HOME_LIMIT)
+
+def related_query(property_id, property_type):
+    """Other available properties of the same type, shown under a property."""
+    return Property.query.filter(
+        Property.id != property_id,
+        Property.property_type == property_type,
+        Property.status == 'Available'
+    ).limit(RELATED_LIMIT)
+
+def version_rows(query):
+    """[(id, updated_at)] for the properties a listing query returns, without loading them."""
+    return [(row.id, row.updated_at) for row in query.with_entities(Property.id, Property.updated_at)]
@@ -0,0 +1,234 @@
+import hashlib
+import os
+import tempfile
+import time
+import urllib.request
+from collections import namedtuple
+from datetime import datetime, timezone
+from flask import current_app
+from werkzeug.utils import secure_filename
+from models import db, Property, PropertyImage, PropertyDocument, PropertyVideo, SiteVideo
+try:
+    import vercel_blob
+except ImportError:
+    vercel_blob = None
+
+# Folders under UPLOAD_FOLDER (and blob path prefixes) holding user uploads the GC owns
+MEDIA_FOLDERS = ('images', 'documents', 'videos')
+# Columns that keep a stored file alive
+REFERENCE_COLUMNS = [PropertyImage.image_url, PropertyDocument.document_url] + [
+    getattr(model, column) for model in (PropertyVideo, SiteVideo)
+    for column in ('video_url', 'poster_url', 'preview_url', 'mp4_url', 'webm_url')
+]
+CHUNK_SIZE = 64 * 1024
+GC_BATCH_SIZE = 500
+FETCH_TIMEOUT = 10
+
+StoredFile = namedtuple('StoredFile', 'url content_hash size_bytes')
+
+def blob_enabled():
+    return vercel_blob is not None and bool(os.environ.get('BLOB_READ_WRITE_TOKEN'))
+
+def _extension(filename):
+    name = secure_filename(filename or '')
+    return name.rsplit('.', 1)[1].lower() if '.' in name else 'bin'
+
+def _known_url(content_hash):
+    """URL of an existing upload with this content, if any."""
+    for column, hash_column in ((PropertyImage.image_url, PropertyImage.content_hash),
+                                (PropertyDocument.document_url, PropertyDocument.content_hash),
+                                (PropertyVideo.video_url, PropertyVideo.content_hash),
+                                (SiteVideo.video_url, SiteVideo.content_hash)):
+        url = db.session.query(column).filter(hash_column == content_hash).limit(1).scalar()
+        if url:
+            return url
+    return None
+
+def store_upload(file, subfolder='images'):
+    """
+    Store an uploaded file under its SHA-256: uploads/<subfolder>/ab/abcd....ext
+    locally, or the same path in Vercel Blob. The upload is hashed while it
+    is spooled to a temporary file in chunks, so memory stays flat for large
+    files. Content that is already stored is not stored again; a blob at the
+    same path holds the same bytes, so it is overwritten rather than refused,
+    and a reused local file is touched so the GC grace period starts over.
+    Returns a StoredFile, or None if it could not be saved.
+    """
+    digest, size = hashlib.sha256(), 0
+    spool = tempfile.NamedTemporaryFile(delete=False)
+    try:
+        with spool:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                spool.write(chunk)
+                size += len(chunk)
+        content_hash = digest.hexdigest()
+        relative = f'{subfolder}/{content_hash[:2]}/{content_hash}.{_extension(file.filename)}'
+
+        if blob_enabled():
+            url = _known_url(content_hash)
+            if url and url.startswith('http'):
+                return StoredFile(url, content_hash, size)
+            try:
+                with open(spool.name, 'rb') as f:
+                    response = vercel_blob.put(relative, f.read(), options={
+                        'access': 'public', 'addRandomSuffix': 'false', 'allowOverwrite': 'true'})
+                return StoredFile(response['url'], content_hash, size)
+            except Exception as e:
+                print(f"Vercel Blob upload failed: {e}")
+
+        target = os.path.join(current_app.config['UPLOAD_FOLDER'], relative)
+        try:
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(spool.name, target)
+                os.chmod(target, 0o644)
+            else:
+                # An orphan about to be referenced again; keep collect_garbage off it
+                os.utime(target)
+            return StoredFile(f'uploads/{relative}', content_hash, size)
+        except (OSError, PermissionError):
+            return None
+    finally:
+        if os.path.exists(spool.name):
+            os.remove(spool.name)
+
+def _stored_size(url, upload_folder):
+    """Size in bytes of a local upload or a remote file (from a HEAD request), or None."""
+    try:
+        if url.startswith('uploads/'):
+            return os.path.getsize(os.path.join(upload_folder, url[len('uploads/'):]))
+        request = urllib.request.Request(url, method='HEAD', headers={'User-Agent': 'PremiumEstate size backfill'})
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+            length = response.headers.get('Content-Length')
+            return int(length) if length and length.isdigit() else None
+    except Exception as e:
+        print(f"Document size backfill skipped {url}: {e}")
+        return None
+
+def backfill_document_sizes(batch_size=100, max_batches=10):
+    """
+    Fill size_bytes for documents stored before it was recorded: local files
+    are stat'ed, Vercel Blob and other remote URLs get a HEAD request.
+    Documents whose size cannot be read get 0, which the templates treat as
+    unknown, so they are not retried. Returns the number of rows handled.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    handled = 0
+    for _ in range(max_batches):
+        rows = db.session.query(PropertyDocument.id, PropertyDocument.property_id, PropertyDocument.document_url).filter(
+            PropertyDocument.size_bytes.is_(None)
+        ).order_by(PropertyDocument.id).limit(batch_size).all()
+        if not rows:
+            break
+        for row in rows:
+            db.session.query(PropertyDocument).filter(PropertyDocument.id == row.id).update(
+                {'size_bytes': _stored_size(row.document_url, upload_folder) or 0}, synchronize_session=False)
+        # The property page shows the size; bump updated_at for its validators
+        db.session.execute(db.update(Property).where(Property.id.in_({row.property_id for row in rows})).values(
+            updated_at=datetime.utcnow()))
+        db.session.commit()
+        handled += len(rows)
+    return handled
+
+def _referenced(urls):
+    """The subset of urls still used by an image, document or video row."""
+    referenced = set()
+    if urls:
+        for column in REFERENCE_COLUMNS:
+            referenced |= {url for (url,) in db.session.query(column).filter(column.in_(urls))}
+    return referenced
+
+def _collectable(relative):
+    # The hand-placed hero video and poster sit directly in videos/; only
+    # content-addressed files (videos/ab/<hash>.mp4) are the GC's to remove
+    folder, _, rest = relative.partition('/')
+    return folder != 'videos' or '/' in rest
+
+def _batches(items, size=GC_BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _local_files(upload_folder, cutoff):
+    """(url, path) of local uploads last modified before cutoff, streamed from the filesystem."""
+    for folder in MEDIA_FOLDERS:
+        for root, _, files in os.walk(os.path.join(upload_folder, folder)):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except OSError:
+                    continue
+                relative = os.path.relpath(path, upload_folder).replace(os.sep, '/')
+                if not _collectable(relative):
+                    continue
+                yield f'uploads/{relative}', path
+
+def _blob_files(cutoff):
+    """(url, url) of blobs under the media prefixes uploaded before cutoff, page by page."""
+    for folder in MEDIA_FOLDERS:
+        cursor = None
+        while True:
+            options = {'prefix': f'{folder}/', 'limit': str(GC_BATCH_SIZE)}
+            if cursor:
+                options['cursor'] = cursor
+            page = vercel_blob.list(options)
+            for blob in page.get('blobs', []):
+                if not _collectable(blob.get('pathname', f'{folder}/x/x')):
+                    continue
+                uploaded = blob.get('uploadedAt')
+                if uploaded:
+                    stamp = datetime.fromisoformat(uploaded.replace('Z', '+00:00')).astimezone(timezone.utc).timestamp()
+                    if stamp >= cutoff:
+                        continue
+                yield blob['url'], blob['url']
+            cursor = page.get('cursor')
+            if not page.get('hasMore') or not cursor:
+                break
+
+def collect_garbage(dry_run=False):
+    """
+    Delete uploaded files no image, document or video row refers to. Files are
+    streamed from disk and Vercel Blob and checked against the database
+    GC_BATCH_SIZE at a time, so memory stays bounded however many files
+    exist. Files younger than MEDIA_GC_GRACE_SECONDS are skipped; their rows
+    may not be committed yet. Returns {'checked', 'deleted', 'bytes'}.
+    """
+    cutoff = time.time() - current_app.config['MEDIA_GC_GRACE_SECONDS']
+    stats = {'checked': 0, 'deleted': 0, 'bytes': 0}
+
+    for batch in _batches(_local_files(current_app.config['UPLOAD_FOLDER'], cutoff)):
+        stats['checked'] += len(batch)
+        referenced = _referenced([url for url, _ in batch])
+        for url, path in batch:
+            if url in referenced:
+                continue
+            try:
+                size = os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+                stats['deleted'] += 1
+                stats['bytes'] += size
+            except OSError as e:
+                print(f"Media GC could not delete {path}: {e}")
+
+    if blob_enabled():
+        for batch in _batches(_blob_files(cutoff)):
+            stats['checked'] += len(batch)
+            referenced = _referenced([url for url, _ in batch])
+            orphans = [url for url, _ in batch if url not in referenced]
+            if orphans and not dry_run:
+                try:
+                    vercel_blob.delete(orphans)
+                except Exception as e:
+                    print(f"Media GC could not delete blobs: {e}")
+                    continue
+            stats['deleted'] += len(orphans)
+    return stats
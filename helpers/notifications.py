@@ -3,13 +3,13 @@ from flask import current_app
 from flask_mail import Message
 from models import db, ActivityLog
 
-def log_activity(action, description, actor_type='system', actor_id=None):
+def log_activity(action, description, user_type='system', user_id=None):
     try:
         act = ActivityLog(
             action=action,
             description=description,
-            actor_type=actor_type,
-            actor_id=actor_id
+            user_type=user_type,
+            user_id=user_id
         )
         db.session.add(act)
         db.session.commit()
@@ -42,4 +42,35 @@ def send_email(mail, subject, recipients, body, html=None, category='system'):
         tb = traceback.format_exc()
         current_app.logger.error(f"Email send failed: {e}\n{tb}")
         log_activity('email_error', f"Email failed: {subject} - {e}", 'system')
-        return False
\ No newline at end of file
+        return False
+
+def send_bulk_email(mail, messages, category='system'):
+    """
+    Send many prepared Messages, in order, over one reused SMTP connection.
+    Returns how many were handled: messages[:n] went out and the rest are
+    for the caller to retry. Missing credentials count as handled, like in
+    send_email.
+    """
+    if not messages:
+        return 0
+    if not mail:
+        current_app.logger.warning("Mail instance not initialized.")
+        return 0
+    if not current_app.config.get('MAIL_USERNAME') or not current_app.config.get('MAIL_PASSWORD'):
+        current_app.logger.warning("Email skipped: MAIL_USERNAME / MAIL_PASSWORD not configured.")
+        log_activity('email_skipped', f'{len(messages)} {category} emails skipped (missing credentials)', 'system')
+        return len(messages)
+
+    sent = 0
+    try:
+        with mail.connect() as connection:
+            for msg in messages:
+                connection.send(msg)
+                sent += 1
+        log_activity(f'email_{category}', f"Sent {sent} {category} emails", 'system')
+        return sent
+    except Exception as e:
+        tb = traceback.format_exc()
+        current_app.logger.error(f"Bulk email failed after {sent} of {len(messages)}: {e}\n{tb}")
+        log_activity('email_error', f"Bulk {category} email failed after {sent} of {len(messages)}: {e}", 'system')
+        return sent
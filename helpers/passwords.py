@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULTS = {
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:600000',
+    'PASSWORD_SALT_LENGTH': 16,
+    'PASSWORD_HASH_WORKERS': 2,
+    'PASSWORD_HASH_EXECUTOR': 'thread',
+    'PASSWORD_HASH_QUEUE_TIMEOUT': 5.0,
+}
+
+class HashingBusy(Exception):
+    """Every hashing slot stayed busy for PASSWORD_HASH_QUEUE_TIMEOUT seconds."""
+
+_executor = None
+_executor_config = None
+_slots = None
+_lock = threading.Lock()
+
+def _setting(name):
+    if has_app_context():
+        return current_app.config.get(name, DEFAULTS[name])
+    return DEFAULTS[name]
+
+def _pool():
+    """
+    Bounded pool shared by all request threads. pbkdf2 and scrypt release the
+    GIL, so threads hash in parallel with other requests; "process" isolates
+    hashing completely at the cost of worker processes. At most
+    PASSWORD_HASH_WORKERS hashes run at once and further callers wait for a
+    slot, so a burst of logins cannot take every core from browsing traffic.
+    """
+    global _executor, _executor_config, _slots
+    config = (_setting('PASSWORD_HASH_EXECUTOR'), _setting('PASSWORD_HASH_WORKERS'))
+    if _executor is None or _executor_config != config:
+        with _lock:
+            if _executor is None or _executor_config != config:
+                if _executor is not None:
+                    _executor.shutdown(wait=False)
+                kind, workers = config
+                executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+                _executor = executor_class(max_workers=workers)
+                _slots = threading.BoundedSemaphore(workers)
+                _executor_config = config
+    return _executor, _slots
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(timeout=_setting('PASSWORD_HASH_QUEUE_TIMEOUT')):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _setting('PASSWORD_HASH_METHOD'), _setting('PASSWORD_SALT_LENGTH'))
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with a different method or cost than configured."""
+    stored, method = password_hash.split('$', 1)[0], _setting('PASSWORD_HASH_METHOD')
+    # A method without cost parameters ("scrypt") matches whatever defaults Werkzeug filled in
+    return not (stored == method or stored.startswith(method + ':'))
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import g, has_app_context, request, request_started, request_finished, before_render_template, template_rendered
+from sqlalchemy import event
+
+# Request latency histogram buckets in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_PARAMS_REPR = 300
+
+class EndpointStats:
+    __slots__ = ('requests', 'errors', 'total_time', 'max_time', 'queries', 'db_time',
+                 'render_time', 'slow_queries', 'buckets')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.slow_queries = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def as_dict(self, endpoint):
+        n = self.requests or 1
+        return {
+            'endpoint': endpoint,
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.total_time / n * 1000, 2),
+            'max_ms': round(self.max_time * 1000, 2),
+            'avg_queries': round(self.queries / n, 1),
+            'avg_db_ms': round(self.db_time / n * 1000, 2),
+            'avg_render_ms': round(self.render_time / n * 1000, 2),
+            'slow_queries': self.slow_queries,
+        }
+
+class PerfMonitor:
+    """
+    Per-request SQL and template instrumentation.
+
+    Hooks SQLAlchemy cursor events and Flask request/template signals, keeps
+    per-endpoint counters in memory and remembers the slowest statements.
+    Each hook is a couple of perf_counter() calls and integer adds, so it is
+    cheap enough to leave on in production. Counters are per process: every
+    gunicorn worker reports its own numbers.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.endpoints = {}
+        self.slow_statements = deque(maxlen=50)
+        self.started_at = datetime.utcnow()
+        self.slow_query_seconds = 0.1
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('PERF_INSTRUMENTATION', True)
+        app.config.setdefault('SLOW_QUERY_MS', 100)
+        app.extensions['perf_monitor'] = self
+        if not app.config['PERF_INSTRUMENTATION']:
+            return
+        self.slow_query_seconds = app.config['SLOW_QUERY_MS'] / 1000.0
+        self.slow_statements = deque(maxlen=app.config.get('SLOW_QUERY_LOG_SIZE', 50))
+
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', self._after_cursor_execute)
+        request_started.connect(self._request_started, app)
+        request_finished.connect(self._request_finished, app)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+
+    # Request / template signals
+
+    def _request_started(self, sender, **extra):
+        g._perf = {'start': time.perf_counter(), 'queries': 0, 'db_time': 0.0,
+                   'render_time': 0.0, 'render_start': [], 'slow': 0}
+
+    def _before_render(self, sender, template, context, **extra):
+        state = g.get('_perf')
+        if state is not None:
+            state['render_start'].append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        state = g.get('_perf')
+        if state is not None and state['render_start']:
+            state['render_time'] += time.perf_counter() - state['render_start'].pop()
+
+    def _request_finished(self, sender, response, **extra):
+        state = g.pop('_perf', None)
+        if state is None:
+            return
+        elapsed = time.perf_counter() - state['start']
+        endpoint = request.endpoint or '<unmatched>'
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.requests += 1
+            if response.status_code >= 500:
+                stats.errors += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.queries += state['queries']
+            stats.db_time += state['db_time']
+            # Streamed responses render after this point; only count what ran in the view
+            stats.render_time += state['render_time']
+            stats.slow_queries += state['slow']
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    stats.buckets[i] += 1
+
+    # SQLAlchemy cursor events
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_perf_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_perf_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        state = g.get('_perf') if has_app_context() else None
+        if state is not None:
+            state['queries'] += 1
+            state['db_time'] += elapsed
+        if elapsed >= self.slow_query_seconds:
+            if state is not None:
+                state['slow'] += 1
+            params = repr(parameters)
+            self.slow_statements.appendleft({
+                'statement': statement,
+                'parameters': params if len(params) <= MAX_PARAMS_REPR else params[:MAX_PARAMS_REPR] + '...',
+                'duration_ms': round(elapsed * 1000, 2),
+                'executemany': executemany,
+                'endpoint': (request.endpoint if state is not None else None) or '<background>',
+                'at': datetime.utcnow().isoformat(timespec='seconds'),
+            })
+
+    # Reporting
+
+    def snapshot(self):
+        with self._lock:
+            rows = [stats.as_dict(endpoint) for endpoint, stats in self.endpoints.items()]
+        rows.sort(key=lambda r: r['avg_ms'] * r['requests'], reverse=True)
+        return {'since': self.started_at.isoformat(timespec='seconds'), 'endpoints': rows,
+                'slow_statements': list(self.slow_statements)}
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.slow_statements.clear()
+            self.started_at = datetime.utcnow()
+
+    def prometheus(self):
+        """Render the counters in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self.endpoints.items())
+            lines = []
+
+            def metric(name, kind, help_text, values):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.extend(values)
+
+            label = lambda endpoint: f'endpoint="{endpoint}"'
+            metric('app_requests_total', 'counter', 'Requests handled per endpoint.',
+                   [f'app_requests_total{{{label(e)}}} {s.requests}' for e, s in items])
+            metric('app_request_errors_total', 'counter', 'Responses with a 5xx status per endpoint.',
+                   [f'app_request_errors_total{{{label(e)}}} {s.errors}' for e, s in items])
+            histogram = []
+            for e, s in items:
+                # buckets are already cumulative: a request counts in every bucket it fits
+                for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                    histogram.append(f'app_request_duration_seconds_bucket{{{label(e)},le="{bound}"}} {count}')
+                histogram.append(f'app_request_duration_seconds_bucket{{{label(e)},le="+Inf"}} {s.requests}')
+                histogram.append(f'app_request_duration_seconds_sum{{{label(e)}}} {s.total_time:.6f}')
+                histogram.append(f'app_request_duration_seconds_count{{{label(e)}}} {s.requests}')
+            metric('app_request_duration_seconds', 'histogram', 'Request latency per endpoint.', histogram)
+            metric('app_db_queries_total', 'counter', 'SQL statements executed per endpoint.',
+                   [f'app_db_queries_total{{{label(e)}}} {s.queries}' for e, s in items])
+            metric('app_db_duration_seconds_total', 'counter', 'Time spent in SQL per endpoint.',
+                   [f'app_db_duration_seconds_total{{{label(e)}}} {s.db_time:.6f}' for e, s in items])
+            metric('app_render_duration_seconds_total', 'counter', 'Time spent rendering templates per endpoint.',
+                   [f'app_render_duration_seconds_total{{{label(e)}}} {s.render_time:.6f}' for e, s in items])
+            metric('app_slow_queries_total', 'counter', 'Statements slower than SLOW_QUERY_MS per endpoint.',
+                   [f'app_slow_queries_total{{{label(e)}}} {s.slow_queries}' for e, s in items])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,149 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from flask import g, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+PROFILE_HEADER = 'X-Profile-Request'
+MAX_STACKS_PER_ENDPOINT = 5000
+MAX_STACK_DEPTH = 128
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler for live requests.
+
+    A fraction of requests (PROFILE_SAMPLE_RATE), plus any request carrying a
+    signed X-Profile-Request token, is registered with one background thread
+    that reads the request thread's stack via sys._current_frames() every
+    PROFILE_INTERVAL_MS. Stacks are aggregated per endpoint as collapsed
+    "frame;frame;frame count" lines, the input format of flamegraph.pl and
+    speedscope. Unsampled requests pay one random() call.
+    """
+
+    def __init__(self, app=None):
+        self.stacks = {}
+        self.requests = Counter()
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_INTERVAL_MS', 5)
+        app.config.setdefault('PROFILE_TOKEN_MAX_AGE', 3600)
+        app.extensions['sampling_profiler'] = self
+        self.sample_rate = app.config['PROFILE_SAMPLE_RATE']
+        self.interval = app.config['PROFILE_INTERVAL_MS'] / 1000.0
+        self.serializer = URLSafeTimedSerializer(app.secret_key, salt='profile-request')
+        self.token_max_age = app.config['PROFILE_TOKEN_MAX_AGE']
+        app.before_request(self._start)
+        app.teardown_request(self._stop)
+
+    # Tokens for the signed header
+
+    def make_token(self):
+        return self.serializer.dumps('profile')
+
+    def _token_valid(self, token):
+        try:
+            return self.serializer.loads(token, max_age=self.token_max_age) == 'profile'
+        except BadSignature:
+            return False
+
+    # Request hooks
+
+    def _start(self):
+        token = request.headers.get(PROFILE_HEADER)
+        if not (token and self._token_valid(token)) and not (self.sample_rate and random.random() < self.sample_rate):
+            return
+        ident = threading.get_ident()
+        g._profiling = ident
+        with self._lock:
+            self._active[ident] = request.endpoint or '<unmatched>'
+            self.requests[self._active[ident]] += 1
+        self._ensure_thread()
+        self._wake.set()
+
+    def _stop(self, exc=None):
+        ident = g.pop('_profiling', None)
+        if ident is not None:
+            with self._lock:
+                self._active.pop(ident, None)
+
+    # Sampler thread
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='request-sampler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wake.clear()
+                # Re-check so a request registered between the test and clear() is not missed
+                if not self._active:
+                    self._wake.wait()
+            frames = sys._current_frames()
+            with self._lock:
+                active = list(self._active.items())
+            for ident, endpoint in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._record(endpoint, self._collapse(frame))
+            del frames
+            time.sleep(self.interval)
+
+    def _label(self, code):
+        filename = code.co_filename
+        if filename.startswith(self._root):
+            filename = os.path.relpath(filename, self._root)
+        else:
+            filename = os.path.basename(filename)
+        return f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _record(self, endpoint, stack):
+        with self._lock:
+            counter = self.stacks.setdefault(endpoint, Counter())
+            if stack in counter or len(counter) < MAX_STACKS_PER_ENDPOINT:
+                counter[stack] += 1
+            else:
+                counter['[truncated]'] += 1
+
+    # Reporting
+
+    def summary(self):
+        with self._lock:
+            return sorted(
+                ({'endpoint': e, 'requests': self.requests[e], 'samples': sum(c.values())}
+                 for e, c in self.stacks.items()),
+                key=lambda row: row['samples'], reverse=True
+            )
+
+    def collapsed(self, endpoint=None):
+        """Collapsed stacks for one endpoint, or all of them rooted at the endpoint name."""
+        with self._lock:
+            if endpoint is not None:
+                items = list(self.stacks.get(endpoint, Counter()).items())
+            else:
+                items = [(f'{e};{stack}', n) for e, c in self.stacks.items() for stack, n in c.items()]
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(items))
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.requests.clear()
@@ -0,0 +1,159 @@
+import math
+import re
+import time
+from functools import wraps
+from flask import current_app, jsonify, request, session
+try:
+    import redis
+except ImportError:
+    redis = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+MAX_MEMORY_KEYS = 50_000
+
+def parse_limit(spec):
+    """'5/minute', '20/hour' or '5/10minutes' -> (capacity, period in seconds)."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*', spec)
+    if not match:
+        raise ValueError(f'Invalid rate limit: {spec!r}')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+class MemoryStore:
+    """
+    Token buckets in a plain dict of immutable (tokens, timestamp) tuples.
+    No lock: each update is a single dict assignment, so concurrent requests
+    for the same key can at worst both spend the same token, which is fine
+    for abuse protection. Counters are per process.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def take(self, key, capacity, rate, now):
+        tokens, stamp = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        if len(self.buckets) >= MAX_MEMORY_KEYS and key not in self.buckets:
+            self._prune()
+        self.buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    def _prune(self):
+        # Drop the oldest half; an evicted bucket simply starts full again
+        for key, _ in sorted(self.buckets.items(), key=lambda item: item[1][1])[:len(self.buckets) // 2]:
+            self.buckets.pop(key, None)
+
+    def reset(self):
+        self.buckets.clear()
+
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 't', 's')
+local tokens = tonumber(bucket[1]) or capacity
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 's', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisStore:
+    """Token buckets shared by all workers and instances, updated atomically by a Lua script."""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def take(self, key, capacity, rate, now):
+        allowed, tokens = self.script(keys=[f'ratelimit:{key}'], args=[capacity, rate, now])
+        return bool(allowed), float(tokens)
+
+    def reset(self):
+        for key in self.client.scan_iter('ratelimit:*'):
+            self.client.delete(key)
+
+class RateLimiter:
+    """
+    Per-endpoint token buckets keyed by client IP or logged-in user.
+
+    Rejected requests get a 429 with Retry-After before the view runs, so
+    they never reach the database or send email. RATELIMIT_STORAGE_URL
+    selects the backend: memory:// (default, per process) or redis://...
+    (needs the optional redis package). If the shared backend fails the
+    request is let through.
+    """
+
+    def __init__(self, app=None):
+        self.store = MemoryStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE_URL', 'memory://')
+        app.extensions['rate_limiter'] = self
+        url = app.config['RATELIMIT_STORAGE_URL']
+        if url.startswith(('redis://', 'rediss://')):
+            if redis is None:
+                print("RATELIMIT_STORAGE_URL is Redis but the redis package is not installed; using memory")
+            else:
+                self.store = RedisStore(url)
+
+    def client_ip(self):
+        # Behind a proxy, ProxyFix (PROXY_FIX_X_FOR in app.py) has already set remote_addr
+        # from the hops it trusts; the rest of X-Forwarded-For is client-supplied
+        return request.remote_addr or 'unknown'
+
+    def limit(self, spec, scope='ip', methods=None, as_json=False):
+        """
+        Decorate a view with a token bucket of `spec` ('5/minute'). scope is
+        'ip' or 'user' (the session user, falling back to the IP). methods
+        restricts counting to those HTTP methods, e.g. only POSTs of a form.
+        as_json answers rejections with JSON for views called from fetch().
+        """
+        capacity, period = parse_limit(spec)
+        rate = capacity / period
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not current_app.config['RATELIMIT_ENABLED'] or (methods and request.method not in methods):
+                    return f(*args, **kwargs)
+                if scope == 'user' and session.get('user_id'):
+                    who = f"user:{session['user_id']}"
+                else:
+                    who = f'ip:{self.client_ip()}'
+                key = f'{request.endpoint}:{who}'
+                try:
+                    allowed, tokens = self.store.take(key, capacity, rate, time.time())
+                except Exception as e:
+                    print(f"Rate limit backend error: {e}")
+                    return f(*args, **kwargs)
+                if allowed:
+                    return f(*args, **kwargs)
+                return self._reject(math.ceil((1 - tokens) / rate), as_json)
+            return decorated_function
+        return decorator
+
+    def _reject(self, retry_after, as_json):
+        message = 'Too many requests. Please try again later.'
+        if as_json or request.is_json:
+            response = jsonify({'success': False, 'error': message, 'retry_after': retry_after})
+        else:
+            response = current_app.response_class(message, mimetype='text/plain')
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, retry_after))
+        return response
+
+    def reset(self):
+        self.store.reset()
@@ -0,0 +1,201 @@
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from models import db, ScheduledJob, JobRun
+
+class Job:
+    def __init__(self, name, func, every, request_context=False):
+        self.name = name
+        self.func = func
+        self.every = every
+        self.request_context = request_context
+
+class Scheduler:
+    """
+    Runs registered periodic jobs from a worker process (run_scheduler.py)
+    and, with SCHEDULER_THREAD, from a daemon thread inside each app process.
+
+    Every run first takes a lease on the job's row in scheduled_jobs with a
+    single conditional UPDATE, which only succeeds when the job is due and no
+    live lease exists. However many gunicorn workers or worker processes
+    poll, each run happens once. While a job runs, a heartbeat thread renews
+    the lease every third of SCHEDULER_LEASE_SECONDS, so long runs keep it; a
+    crashed runner's lease lapses after SCHEDULER_LEASE_SECONDS. Durations
+    and failures go to job_runs.
+    """
+
+    def __init__(self, app=None):
+        self.jobs = {}
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SCHEDULER_THREAD', False)
+        app.config.setdefault('SCHEDULER_TICK_SECONDS', 30)
+        app.config.setdefault('SCHEDULER_LEASE_SECONDS', 900)
+        app.extensions['scheduler'] = self
+        self.app = app
+        if app.config['SCHEDULER_THREAD']:
+            self.start()
+
+    def job(self, name, every, request_context=False):
+        """
+        Register the decorated function to run every `every` seconds.
+        request_context runs it inside a test request context for SITE_URL,
+        for jobs that build external URLs.
+        """
+        def decorator(f):
+            self.jobs[name] = Job(name, f, every, request_context)
+            return f
+        return decorator
+
+    def _acquire(self, job, force=False):
+        now = datetime.utcnow()
+        table = ScheduledJob.__table__
+        with db.engine.connect() as conn:
+            exists = conn.execute(db.select(table.c.name).where(table.c.name == job.name)).first()
+        if not exists:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(table.insert().values(name=job.name, run_count=0, failure_count=0))
+            except IntegrityError:
+                pass  # another process registered it first
+        with db.engine.begin() as conn:
+            conditions = [table.c.name == job.name,
+                          db.or_(table.c.lease_expires_at.is_(None), table.c.lease_expires_at < now)]
+            if not force:
+                conditions.append(db.or_(table.c.last_started_at.is_(None),
+                                         table.c.last_started_at <= now - timedelta(seconds=job.every)))
+            acquired = conn.execute(table.update().where(*conditions).values(
+                lease_owner=self.owner,
+                lease_expires_at=now + timedelta(seconds=self.app.config['SCHEDULER_LEASE_SECONDS']),
+                last_started_at=now,
+            )).rowcount
+        return acquired == 1, now
+
+    def _renew(self, job):
+        """Push this runner's lease forward; False when the lease is no longer ours."""
+        table = ScheduledJob.__table__
+        expires_at = datetime.utcnow() + timedelta(seconds=self.app.config['SCHEDULER_LEASE_SECONDS'])
+        with db.engine.begin() as conn:
+            return conn.execute(table.update().where(table.c.name == job.name, table.c.lease_owner == self.owner).values(
+                lease_expires_at=expires_at)).rowcount == 1
+
+    def _heartbeat(self, job, done):
+        interval = max(1, self.app.config['SCHEDULER_LEASE_SECONDS'] / 3)
+        with self.app.app_context():
+            while not done.wait(interval):
+                try:
+                    if not self._renew(job):
+                        print(f"Scheduled job {job.name} lost its lease to another runner")
+                        return
+                except Exception as e:
+                    print(f"Could not renew the lease of {job.name}: {e}")
+
+    def _record(self, job, started_at, duration_ms, error):
+        table = ScheduledJob.__table__
+        status = 'failed' if error else 'ok'
+        with db.engine.begin() as conn:
+            recorded = conn.execute(table.update().where(table.c.name == job.name, table.c.lease_owner == self.owner).values(
+                lease_owner=None,
+                lease_expires_at=None,
+                last_finished_at=datetime.utcnow(),
+                last_duration_ms=round(duration_ms, 2),
+                last_status=status,
+                last_error=error,
+                run_count=table.c.run_count + 1,
+                failure_count=table.c.failure_count + (1 if error else 0),
+            )).rowcount
+            if not recorded:
+                print(f"Scheduled job {job.name} no longer holds its lease; its run is kept in job_runs only")
+            conn.execute(JobRun.__table__.insert().values(
+                job_name=job.name, owner=self.owner, started_at=started_at,
+                duration_ms=round(duration_ms, 2), status=status, error=error,
+            ))
+
+    def _execute(self, job, started_at):
+        error = None
+        started = time.perf_counter()
+        if job.request_context:
+            context = self.app.test_request_context(base_url=self.app.config.get('SITE_URL', 'http://localhost'))
+        else:
+            context = self.app.app_context()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), name=f'lease-{job.name}', daemon=True)
+        with context:
+            heartbeat.start()
+            try:
+                job.func()
+            except Exception as e:
+                db.session.rollback()
+                error = f'{type(e).__name__}: {e}'
+                print(f"Scheduled job {job.name} failed: {error}\n{traceback.format_exc()}")
+            finally:
+                db.session.remove()
+                done.set()
+                heartbeat.join()
+            duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                self._record(job, started_at, duration_ms, error)
+            except Exception as e:
+                print(f"Could not record run of {job.name}: {e}")
+        return 'failed' if error else 'ok'
+
+    def run_job(self, name, force=False):
+        """Run one job if it is due (or regardless with force) and not leased elsewhere. Returns its status or None."""
+        job = self.jobs[name]
+        with self.app.app_context():
+            acquired, started_at = self._acquire(job, force)
+        if not acquired:
+            return None
+        return self._execute(job, started_at)
+
+    def run_pending(self):
+        """Run every due job this process can lease; returns {name: 'ok' | 'failed'}."""
+        results = {}
+        for name in list(self.jobs):
+            try:
+                status = self.run_job(name)
+            except Exception as e:
+                print(f"Scheduler could not lease {name}: {e}")
+                continue
+            if status:
+                results[name] = status
+        return results
+
+    def status(self):
+        """Registered jobs with their interval and last-run state."""
+        rows = {row.name: row for row in ScheduledJob.query.filter(ScheduledJob.name.in_(list(self.jobs)))}
+        return [{'name': name, 'every': job.every, 'state': rows.get(name)} for name, job in self.jobs.items()]
+
+    def run_forever(self, delay_first=False):
+        tick = self.app.config['SCHEDULER_TICK_SECONDS']
+        if delay_first:
+            self._stop.wait(tick)
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(tick)
+
+    def start(self):
+        """Poll for due jobs in a daemon thread of this process."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            # The first tick waits, so jobs registered after init_app are in place
+            self._thread = threading.Thread(target=self.run_forever, args=(True,), name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread, waiting for a running job to finish."""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+        self._stop.clear()
@@ -0,0 +1,283 @@
+import hashlib
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from flask import session
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+from helpers.cache import TTLCache
+
+SID_PATTERN = re.compile(r'[A-Za-z0-9_-]{43}')
+
+def _key(sid):
+    # Rows are keyed by a hash of the cookie value, so a copy of the table holds no live session ids
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data kept on the server; the cookie only carries `sid`."""
+
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+        super().__init__(initial, on_update)
+        self.new = sid is None
+        self.sid = sid or secrets.token_urlsafe(32)
+        self.expires_at = expires_at
+        self.previous_sid = None
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    def regenerate(self):
+        """Move the data to a fresh id (call on login to prevent session fixation)."""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class SQLSessionStore:
+    """Sessions in the `sessions` table of the application database."""
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def table(self):
+        from models import ServerSession
+        return ServerSession.__table__
+
+    def load(self, key):
+        # Core statements on their own connection, so a session write never
+        # commits or rolls back whatever the view left in db.session
+        with self.db.engine.connect() as conn:
+            row = conn.execute(
+                self.db.select(self.table.c.data, self.table.c.expires_at).where(self.table.c.id == key)
+            ).first()
+        return tuple(row) if row else None
+
+    def save(self, key, data, user_id, expires_at, create):
+        """Write a session row; False when an existing session (create=False) was deleted meanwhile."""
+        values = {'data': data, 'user_id': user_id, 'expires_at': expires_at, 'updated_at': datetime.utcnow()}
+        with self.db.engine.begin() as conn:
+            updated = conn.execute(self.table.update().where(self.table.c.id == key).values(**values))
+            if updated.rowcount == 0:
+                if not create:
+                    return False
+                conn.execute(self.table.insert().values(id=key, created_at=values['updated_at'], **values))
+        return True
+
+    def delete(self, key):
+        with self.db.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.id == key))
+
+    def delete_user(self, user_id):
+        with self.db.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.user_id == user_id)).rowcount
+
+    def sweep(self, now, batch_size):
+        expired = self.db.select(self.table.c.id).where(self.table.c.expires_at < now).limit(batch_size)
+        with self.db.engine.begin() as conn:
+            return conn.execute(self.table.delete().where(self.table.c.id.in_(expired.scalar_subquery()))).rowcount
+
+class MemorySessionStore:
+    """Process-local stand-in for development and tests; sessions vanish on restart."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def load(self, key):
+        row = self.rows.get(key)
+        return (row[0], row[2]) if row else None
+
+    def save(self, key, data, user_id, expires_at, create):
+        if not create and key not in self.rows:
+            return False
+        self.rows[key] = (data, user_id, expires_at)
+        return True
+
+    def delete(self, key):
+        self.rows.pop(key, None)
+
+    def delete_user(self, user_id):
+        keys = [key for key, row in list(self.rows.items()) if row[1] == user_id]
+        for key in keys:
+            self.rows.pop(key, None)
+        return len(keys)
+
+    def sweep(self, now, batch_size):
+        expired = [key for key, row in list(self.rows.items()) if row[2] < now][:batch_size]
+        for key in expired:
+            self.rows.pop(key, None)
+        return len(expired)
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask session interface storing session data server-side.
+
+    Anonymous sessions (CSRF tokens, compare lists) are read through a short
+    in-process cache, so most of their requests cost no query; sessions of a
+    logged-in user or admin are always read from the store, so a logout or
+    revoke_user() in one process ends them everywhere. A session that was
+    loaded is only ever updated: if its row is gone it is not written back,
+    and its cookie is dropped. A row is written only when the session
+    changed, or when less than half of its lifetime is left, and an empty
+    session never creates a row or a cookie. Expired rows are deleted in
+    batches at most every SESSION_SWEEP_INTERVAL seconds per process.
+    """
+
+    def __init__(self, store, cache_ttl=30, sweep_interval=300, sweep_batch_size=500):
+        self.store = store
+        self.cache = TTLCache(ttl=cache_ttl, max_entries=10000)
+        self.sweep_interval = sweep_interval
+        self.sweep_batch_size = sweep_batch_size
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+    @staticmethod
+    def _cacheable(data):
+        # Only anonymous sessions; login state must follow the store immediately
+        return not data.get('user_id') and not data.get('admin_logged_in')
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not SID_PATTERN.fullmatch(sid):
+            return ServerSideSession()
+        key = _key(sid)
+        row = self.cache.get((key,))
+        cached = row is not None
+        if not cached:
+            try:
+                row = self.store.load(key)
+            except Exception as e:
+                print(f"Session load error: {e}")
+                return ServerSideSession()
+        if row is None or row[1] < datetime.utcnow():
+            return ServerSideSession()
+        try:
+            data = session_json_serializer.loads(row[0])
+        except ValueError:
+            return ServerSideSession()
+        if not cached and self._cacheable(data):
+            self.cache.set((key,), row)
+        return ServerSideSession(data, sid=sid, expires_at=row[1])
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if session.previous_sid:
+            self._delete(_key(session.previous_sid))
+        if not session:
+            if not session.new:
+                self._delete(_key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app))
+            return
+
+        now = datetime.utcnow()
+        lifetime = app.permanent_session_lifetime
+        stale = session.expires_at is None or session.expires_at - now < lifetime / 2
+        if session.modified or stale:
+            key = _key(session.sid)
+            data = session_json_serializer.dumps(dict(session))
+            expires_at = now + lifetime
+            # A regenerated id is a new row; any other loaded session must still exist
+            create = session.new or session.previous_sid is not None
+            try:
+                saved = self.store.save(key, data, session.get('user_id'), expires_at, create)
+            except Exception as e:
+                print(f"Session save error: {e}")
+                return
+            if not saved:
+                # Logged out or revoked in another process while this request ran
+                self.cache.invalidate(key)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app))
+                return
+            if self._cacheable(session):
+                self.cache.set((key,), (data, expires_at))
+            else:
+                self.cache.invalidate(key)
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+            self._maybe_sweep()
+
+    def _delete(self, key):
+        self.cache.invalidate(key)
+        try:
+            self.store.delete(key)
+        except Exception as e:
+            print(f"Session delete error: {e}")
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep < self.sweep_interval or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = time.monotonic()
+            self.sweep()
+        except Exception as e:
+            print(f"Session sweep error: {e}")
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self, max_batches=10):
+        """Delete expired sessions in batches; returns the number removed."""
+        removed = 0
+        now = datetime.utcnow()
+        for _ in range(max_batches):
+            count = self.store.sweep(now, self.sweep_batch_size)
+            removed += count
+            if count < self.sweep_batch_size:
+                break
+        return removed
+
+    def revoke_user(self, user_id):
+        """End every session of a user, in every process (their sessions are never cached)."""
+        return self.store.delete_user(user_id)
+
+def init_sessions(app, db):
+    """Install the server-side session interface chosen by SESSION_BACKEND ('sql', 'memory' or 'cookie')."""
+    app.config.setdefault('SESSION_BACKEND', 'sql')
+    app.config.setdefault('SESSION_CACHE_TTL', 30)
+    app.config.setdefault('SESSION_SWEEP_INTERVAL', 300)
+    app.config.setdefault('SESSION_SWEEP_BATCH_SIZE', 500)
+    backend = app.config['SESSION_BACKEND']
+    if backend == 'cookie':
+        return None
+    store = MemorySessionStore() if backend == 'memory' else SQLSessionStore(db)
+    app.session_interface = ServerSessionInterface(
+        store,
+        cache_ttl=app.config['SESSION_CACHE_TTL'],
+        sweep_interval=app.config['SESSION_SWEEP_INTERVAL'],
+        sweep_batch_size=app.config['SESSION_SWEEP_BATCH_SIZE'],
+    )
+    return app.session_interface
+
+def rotate_session():
+    """Give the current session a new id after login; a no-op with cookie sessions."""
+    if isinstance(session._get_current_object(), ServerSideSession):
+        session.regenerate()
@@ -0,0 +1,178 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+from flask import current_app, url_for
+from models import db, Property
+from helpers.http_cache import listing_validator
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+# Pages listed in the first shard next to the properties
+STATIC_ENDPOINTS = ('index', 'properties', 'map_view', 'contact')
+FEED_SIZE = 50
+MANIFEST = 'manifest.json'
+
+def _w3c(value):
+    return value.replace(tzinfo=timezone.utc).isoformat(timespec='seconds') if value else None
+
+def _cache_dir():
+    path = current_app.config['SITEMAP_CACHE_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _site_context():
+    # Cached files are shared by every request and the scheduler, so links always use SITE_URL
+    return current_app.test_request_context(base_url=current_app.config['SITE_URL'])
+
+def _write_atomic(path, chunks):
+    """Write an iterable of text chunks to path via a temporary file and rename."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def shard_signatures(shard_size):
+    """
+    {shard number: [row count, newest updated_at]} for properties grouped by
+    id // shard_size, from one grouped query. Any insert, edit or delete
+    changes the signature of exactly the shard it falls in.
+    """
+    shard = (Property.id // shard_size).label('shard')
+    rows = db.session.query(shard, db.func.count(Property.id), db.func.max(Property.updated_at)).group_by(shard)
+    return {str(int(number)): [count, _w3c(updated)] for number, count, updated in rows}
+
+def _shard_urls(number, shard_size):
+    """(loc, lastmod) for one shard, streamed from the database in chunks."""
+    if number == 0:
+        for endpoint in STATIC_ENDPOINTS:
+            yield url_for(endpoint, _external=True), None
+    query = db.session.query(Property.id, Property.updated_at).filter(
+        Property.id >= number * shard_size, Property.id < (number + 1) * shard_size
+    ).order_by(Property.id).execution_options(yield_per=1000)
+    for property_id, updated_at in query:
+        yield url_for('property_detail', id=property_id, _external=True), _w3c(updated_at)
+
+def _urlset(urls):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for loc, lastmod in urls:
+        yield f'  <url><loc>{escape(loc)}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</url>\n'
+    yield '</urlset>\n'
+
+def _sitemap_index(shards):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for number, (_, lastmod) in sorted(shards.items(), key=lambda item: int(item[0])):
+        loc = url_for('sitemap_shard', number=int(number), _external=True)
+        yield f'  <sitemap><loc>{escape(loc)}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+def refresh_sitemaps():
+    """
+    Bring the cached sitemap files up to date and return the manifest.
+    Nothing is queried beyond listing_validator() when no property changed
+    since the last run; otherwise only shards whose signature changed are
+    rewritten, and sitemap.xml (an index once there is more than one shard,
+    else the single urlset) follows.
+    """
+    directory = _cache_dir()
+    shard_size = current_app.config['SITEMAP_SHARD_SIZE']
+    manifest = _read_manifest(directory)
+    last_modified, count = listing_validator()
+    version = [_w3c(last_modified), count, shard_size]
+    if manifest.get('version') == version and os.path.exists(os.path.join(directory, 'sitemap.xml')):
+        return manifest
+
+    signatures = shard_signatures(shard_size) or {'0': [0, None]}
+    previous = manifest.get('shards', {})
+    rewritten = 0
+    with _site_context():
+        for number, signature in signatures.items():
+            path = os.path.join(directory, f'sitemap-{number}.xml')
+            if previous.get(number) != signature or not os.path.exists(path):
+                _write_atomic(path, _urlset(_shard_urls(int(number), shard_size)))
+                rewritten += 1
+        index = list(_sitemap_index(signatures))
+    for number in set(previous) - set(signatures):
+        try:
+            os.remove(os.path.join(directory, f'sitemap-{number}.xml'))
+        except OSError:
+            pass
+
+    main = os.path.join(directory, 'sitemap.xml')
+    if len(signatures) == 1:
+        with open(os.path.join(directory, f'sitemap-{next(iter(signatures))}.xml'), encoding='utf-8') as f:
+            _write_atomic(main, iter(lambda: f.read(65536), ''))
+    else:
+        _write_atomic(main, index)
+
+    manifest = {'version': version, 'shards': signatures, 'rewritten': rewritten,
+                'generated_at': _w3c(datetime.utcnow())}
+    _write_atomic(os.path.join(directory, MANIFEST), [json.dumps(manifest)])
+    return manifest
+
+def sitemap_path(number=None):
+    """Cached sitemap.xml (or one shard), refreshed first; None for a shard that does not exist."""
+    manifest = refresh_sitemaps()
+    if number is None:
+        return os.path.join(_cache_dir(), 'sitemap.xml')
+    if str(number) not in manifest['shards']:
+        return None
+    return os.path.join(_cache_dir(), f'sitemap-{number}.xml')
+
+def _feed(properties, updated):
+    yield f'<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="{ATOM_NS}">\n'
+    yield '  <title>Premium Estate - New and Updated Listings</title>\n'
+    yield f'  <id>{escape(url_for("index", _external=True))}</id>\n'
+    yield f'  <link rel="self" href="{escape(url_for("listings_feed", _external=True))}"/>\n'
+    yield f'  <link rel="alternate" type="text/html" href="{escape(url_for("properties", _external=True))}"/>\n'
+    yield f'  <updated>{updated or _w3c(datetime.utcnow())}</updated>\n'
+    for property in properties:
+        link = url_for('property_detail', id=property.id, _external=True)
+        summary = f'{property.property_type} in {property.location} - ₹{property.price:,.0f}, {property.area:,.0f} sq ft, {property.status}'
+        yield (
+            '  <entry>\n'
+            f'    <title>{escape(property.title)}</title>\n'
+            f'    <id>{escape(link)}</id>\n'
+            f'    <link rel="alternate" type="text/html" href="{escape(link)}"/>\n'
+            f'    <published>{_w3c(property.created_at or property.updated_at)}</published>\n'
+            f'    <updated>{_w3c(property.updated_at or property.created_at)}</updated>\n'
+            '    <author><name>Premium Estate</name></author>\n'
+            f'    <summary>{escape(summary)}</summary>\n'
+            '  </entry>\n'
+        )
+    yield '</feed>\n'
+
+def feed_path():
+    """
+    Cached Atom feed of the FEED_SIZE most recently added or updated
+    listings, rewritten only when listing_validator() changes.
+    """
+    directory = _cache_dir()
+    path = os.path.join(directory, 'feed.atom')
+    last_modified, count = listing_validator()
+    version = f'{_w3c(last_modified)}|{count}'
+    stamp = os.path.join(directory, 'feed.version')
+    try:
+        with open(stamp, encoding='utf-8') as f:
+            current = f.read()
+    except OSError:
+        current = None
+    if current != version or not os.path.exists(path):
+        properties = Property.query.order_by(Property.updated_at.desc(), Property.id.desc()).limit(FEED_SIZE).all()
+        with _site_context():
+            _write_atomic(path, _feed(properties, _w3c(last_modified)))
+        _write_atomic(stamp, [version])
+    return path
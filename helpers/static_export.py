@@ -0,0 +1,195 @@
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlsplit
+from flask import current_app, has_request_context, request, url_for
+from markupsafe import Markup
+from models import db, Property
+from helpers.facets import PRICE_BUCKETS, normalize_filters, get_facets
+from helpers.listings import listing_query, featured_query, recent_query, related_query, version_rows
+from helpers.video import hero_video
+
+# Set on the WSGI environ of the exporter's own requests; no HTTP header can reach it
+ENVIRON_KEY = 'premiumestate.static_export'
+MANIFEST = 'manifest.json'
+
+def is_static_export():
+    """True while a page is being rendered for the static export."""
+    return has_request_context() and request.environ.get(ENVIRON_KEY, False)
+
+def auth_only(role):
+    """
+    Attributes for markup meant for one kind of visitor ('guest', 'user' or
+    'admin') on pre-rendered pages; js/session-state.js shows the right one.
+    Guest markup stays visible until then. Empty on normal requests, where
+    the templates pick the variant themselves.
+    """
+    if not is_static_export():
+        return Markup('')
+    return Markup(f' data-auth="{role}"' + ('' if role == 'guest' else ' hidden'))
+
+def page_file(url):
+    """Output file of a page: <path>/index.html, or a hashed name under <path>/q/ for URLs with a query string."""
+    parts = urlsplit(url)
+    path = parts.path.strip('/')
+    if parts.query:
+        return f"{path or 'index'}/q/{hashlib.sha1(parts.query.encode()).hexdigest()[:16]}.html"
+    return f'{path}/index.html' if path else 'index.html'
+
+def _release():
+    # Templates (HttpCache.release) and fingerprinted asset names change every page
+    assets = current_app.extensions['asset_pipeline'].manifest
+    return [current_app.extensions['http_cache'].release, json.dumps(assets, sort_keys=True), current_app.config['SITE_URL']]
+
+def _key(release, *parts):
+    return hashlib.sha1(json.dumps([release, *parts], default=str).encode()).hexdigest()[:20]
+
+def listing_presets():
+    """Query args of the pre-rendered listings: all available properties, each property type and each price bucket."""
+    types = [value for (value,) in db.session.query(Property.property_type).distinct().order_by(Property.property_type) if value]
+    return [{}] + [{'type': value} for value in types] + [{'price': bucket[0]} for bucket in PRICE_BUCKETS]
+
+def _listing_pages(release):
+    per_page = current_app.config['PROPERTIES_PER_PAGE']
+    for preset in listing_presets():
+        filters = normalize_filters(preset)
+        rows = version_rows(listing_query(filters))
+        facets = get_facets(filters)
+        for number in range(1, max(1, math.ceil(len(rows) / per_page)) + 1):
+            key = _key(release, rows[(number - 1) * per_page:number * per_page], len(rows), facets)
+            # The URL the pagination links of properties.html point to
+            yield url_for('properties', page=number, search='', type=preset.get('type', ''), location='',
+                          status='Available', price=preset.get('price', ''), sort='newest'), key
+            if number == 1:
+                yield url_for('properties', **preset), key
+
+def build_plan():
+    """
+    {url: key} of every public page to pre-render. A key covers exactly what
+    the page shows (the versions of its properties, facet counts, the hero
+    video, the release), so it changes only when the page would.
+    """
+    release = _release()
+    plan = {}
+    with current_app.test_request_context(base_url=current_app.config['SITE_URL']):
+        hero = hero_video()
+        plan[url_for('index')] = _key(release, version_rows(featured_query()), version_rows(recent_query()),
+                                      hero and [hero.id, hero.processed_at])
+        plan.update(_listing_pages(release))
+        query = db.session.query(Property.id, Property.property_type, Property.updated_at).order_by(Property.id)
+        for row in query:
+            related = version_rows(related_query(row.id, row.property_type))
+            plan[url_for('property_detail', id=row.id)] = _key(release, row.updated_at, related)
+            plan[url_for('property_brochure', id=row.id)] = _key(release, row.updated_at)
+    return plan
+
+def _read_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        os.remove(tmp)
+        raise
+
+# RENDERING
+
+# Set in the parent before the pool forks; workers inherit them
+_pool_app = None
+_output = None
+
+def _init_worker():
+    with _pool_app.app_context():
+        # Pooled connections came from the parent and must not be shared with it
+        db.engine.dispose(close=False)
+
+def _render(url, file):
+    """(url, error) after rendering one page through the app into the output directory."""
+    client = _pool_app.test_client()
+    try:
+        response = client.get(url, base_url=_pool_app.config['SITE_URL'], environ_overrides={ENVIRON_KEY: True})
+        if response.status_code != 200:
+            return url, f'HTTP {response.status_code}'
+        _write_atomic(os.path.join(_output, file), response.get_data())
+        return url, None
+    except Exception as e:
+        return url, f'{type(e).__name__}: {e}'
+
+def _render_all(pages, workers):
+    """Yield (url, error) for {url: file}, across forked worker processes when there is more than one."""
+    if workers > 1 and len(pages) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=min(workers, len(pages)), mp_context=context,
+                                 initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, url, file) for url, file in pages.items()]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for url, file in pages.items():
+            yield _render(url, file)
+
+def _remove(output, file):
+    path = os.path.join(output, file)
+    try:
+        os.remove(path)
+    except OSError:
+        return
+    # Drop the emptied property/<id>/... directories, never the output directory itself
+    directory = os.path.dirname(path)
+    while os.path.abspath(directory) != os.path.abspath(output):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+def export_site(output, workers=None, full=False):
+    """
+    Pre-render the public pages into output and return a summary. Only pages
+    whose key differs from the previous run's manifest (or whose file is
+    missing) are rendered, unless full is set; pages of deleted properties are
+    removed. Pages that fail keep their previous file and are retried next run.
+    The manifest maps every URL to its file for the CDN.
+    """
+    global _pool_app, _output
+    workers = workers or current_app.config['STATIC_EXPORT_WORKERS'] or os.cpu_count() or 1
+    previous = _read_manifest(output).get('pages', {})
+    pages = {url: {'file': page_file(url), 'key': key} for url, key in build_plan().items()}
+    stale = {url: page['file'] for url, page in pages.items()
+             if full or previous.get(url, {}).get('key') != page['key']
+             or not os.path.exists(os.path.join(output, page['file']))}
+
+    _pool_app = current_app._get_current_object()
+    _output = output
+    errors = {}
+    for url, error in _render_all(stale, workers):
+        if error:
+            errors[url] = error
+            if os.path.exists(os.path.join(output, pages[url]['file'])):
+                pages[url]['key'] = None
+            else:
+                del pages[url]
+
+    files = {page['file'] for page in pages.values()}
+    removed = [url for url, page in previous.items() if url not in pages and page['file'] not in files]
+    for url in removed:
+        _remove(output, previous[url]['file'])
+
+    manifest = {'generated_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'site_url': current_app.config['SITE_URL'], 'pages': pages}
+    _write_atomic(os.path.join(output, MANIFEST), json.dumps(manifest, indent=1).encode())
+    return {'pages': len(pages), 'rendered': len(stale) - len(errors), 'removed': len(removed), 'errors': errors}
@@ -0,0 +1,58 @@
+import os
+import tempfile
+from hashlib import sha1
+from jinja2 import FileSystemBytecodeCache
+
+class ShippedBytecodeCache(FileSystemBytecodeCache):
+    """
+    Jinja bytecode cache read from a directory built at deploy time by
+    precompile_templates.py, or filled as templates are first compiled. Entries are keyed by template name only, so a
+    cache built in one checkout is found at another path (/var/task on
+    Vercel); Jinja stores the source checksum with each entry, so edited
+    templates simply miss and recompile. Writes are best-effort: on
+    read-only filesystems (Vercel) new entries are skipped.
+    """
+
+    def get_cache_key(self, name, filename=None):
+        return sha1(name.encode('utf-8')).hexdigest()
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+def init_template_cache(app):
+    """
+    Attach the bytecode cache; must run before the first template is loaded.
+    When the configured directory was not built and cannot be created
+    (read-only deployments), the cache is filled lazily under the temp dir.
+    """
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE')
+    if not directory:
+        return None
+    if not os.path.isabs(directory):
+        directory = os.path.join(app.root_path, directory)
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        if not os.path.isdir(directory):
+            directory = os.path.join(tempfile.gettempdir(), 'premiumestate-template-cache')
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError:
+                return None
+    app.jinja_env.bytecode_cache = ShippedBytecodeCache(directory, pattern='%s.jinja.cache')
+    return directory
+
+def precompile_templates(app):
+    """Compile every template into the bytecode cache. Returns the template names."""
+    env = app.jinja_env
+    if env.bytecode_cache is None:
+        raise RuntimeError('TEMPLATE_BYTECODE_CACHE is not configured')
+    names = env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    if env.cache is not None:
+        env.cache.clear()
+    for name in names:
+        env.get_template(name)
+    return names
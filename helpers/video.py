@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.request
+from datetime import datetime, timedelta
+from flask import current_app
+from werkzeug.datastructures import FileStorage
+from models import db, Property, PropertyVideo, SiteVideo
+from helpers.media import store_upload
+
+VIDEO_MODELS = (PropertyVideo, SiteVideo)
+MAX_WIDTH = 1920
+PREVIEW_SECONDS = 8
+PREVIEW_HEIGHT = 360
+
+def ffmpeg_available():
+    return bool(shutil.which(current_app.config['FFMPEG_BINARY']) and shutil.which(current_app.config['FFPROBE_BINARY']))
+
+def _run(args):
+    timeout = current_app.config['VIDEO_PROCESSING_TIMEOUT']
+    result = subprocess.run(args, capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(args[0])} exited with {result.returncode}: {result.stderr.decode(errors='replace')[-500:]}")
+    return result.stdout
+
+def probe(path):
+    """Duration, size and whether there is an audio stream, from ffprobe."""
+    info = json.loads(_run([current_app.config['FFPROBE_BINARY'], '-v', 'error', '-print_format', 'json',
+                            '-show_format', '-show_streams', path]))
+    streams = info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video is None:
+        raise ValueError('The upload has no video stream')
+    return {
+        'duration': float(info.get('format', {}).get('duration') or video.get('duration') or 0),
+        'width': int(video.get('width') or 0),
+        'height': int(video.get('height') or 0),
+        'audio': any(s.get('codec_type') == 'audio' for s in streams),
+    }
+
+def _poster(src, dst, info):
+    # A frame a little way in; the first frame is often black or a fade-in
+    at = min(info['duration'] * 0.1, 3.0)
+    return ['-ss', f'{at:.2f}', '-i', src, '-frames:v', '1', '-vf', f"scale='min({MAX_WIDTH},iw)':-2", '-q:v', '3', dst]
+
+def _preview(src, dst, info):
+    return ['-i', src, '-t', str(PREVIEW_SECONDS), '-an', '-vf', f"scale=-2:'min({PREVIEW_HEIGHT},ih)',fps=24",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '30', '-maxrate', '400k', '-bufsize', '800k',
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart', dst]
+
+def _mp4(src, dst, info):
+    audio = ['-c:a', 'aac', '-b:a', '128k'] if info['audio'] else ['-an']
+    return ['-i', src, '-vf', f"scale='min({MAX_WIDTH},iw)':-2", '-c:v', 'libx264', '-preset', 'medium',
+            '-crf', '23', '-pix_fmt', 'yuv420p'] + audio + ['-movflags', '+faststart', dst]
+
+def _webm(src, dst, info):
+    audio = ['-c:a', 'libopus', '-b:a', '96k'] if info['audio'] else ['-an']
+    return ['-i', src, '-vf', f"scale='min({MAX_WIDTH},iw)':-2", '-c:v', 'libvpx-vp9', '-crf', '34', '-b:v', '0',
+            '-row-mt', '1', '-deadline', 'good', '-cpu-used', '4'] + audio + [dst]
+
+# (column, file name, ffmpeg arguments after the global options)
+RENDITIONS = [
+    ('poster_url', 'poster.jpg', _poster),
+    ('preview_url', 'preview.mp4', _preview),
+    ('mp4_url', 'video.mp4', _mp4),
+    ('webm_url', 'video.webm', _webm),
+]
+
+def _fetch_source(url, workdir):
+    """Local path of the original upload, downloading it first when it lives in Vercel Blob."""
+    if url.startswith('uploads/'):
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], url[len('uploads/'):])
+    path = os.path.join(workdir, 'source')
+    with urllib.request.urlopen(url, timeout=60) as response, open(path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+    return path
+
+def _store(path, name):
+    with open(path, 'rb') as f:
+        stored = store_upload(FileStorage(stream=f, filename=name), 'videos')
+    if stored is None:
+        raise OSError(f'Could not store {name}')
+    return stored.url
+
+def _lease():
+    # One claim covers the whole pipeline: the probe and every rendition may each take the full timeout
+    return timedelta(seconds=current_app.config['VIDEO_PROCESSING_TIMEOUT'] * (len(RENDITIONS) + 1))
+
+def _claimable(table, now):
+    return db.or_(table.c.status == 'pending',
+                  db.and_(table.c.status == 'processing', table.c.processing_started_at < now - _lease()))
+
+def _claim(model):
+    """
+    Take the oldest pending video of this model with a conditional UPDATE so
+    only one thread or process renders it; returns (id, claimed_at) or None.
+    A video stuck in 'processing' longer than the pipeline can take (its
+    worker died) is claimable again.
+    """
+    table = model.__table__
+    now = datetime.utcnow()
+    with db.engine.connect() as conn:
+        candidates = [row.id for row in conn.execute(
+            db.select(table.c.id).where(_claimable(table, now)).order_by(table.c.id).limit(10))]
+    for video_id in candidates:
+        with db.engine.begin() as conn:
+            claimed = conn.execute(table.update().where(table.c.id == video_id, _claimable(table, now)).values(
+                status='processing', processing_started_at=now)).rowcount
+        if claimed:
+            return video_id, now
+    return None
+
+def _record(model, video_id, claimed_at, **values):
+    """Write the outcome only while the claim is still ours; False when another worker has taken the video over."""
+    recorded = db.session.execute(db.update(model).where(
+        model.id == video_id, model.status == 'processing', model.processing_started_at == claimed_at
+    ).values(**values)).rowcount
+    if recorded and model is PropertyVideo:
+        # A bulk update skips the media flush hook; the property page shows the renditions
+        owner = db.select(PropertyVideo.property_id).where(PropertyVideo.id == video_id).scalar_subquery()
+        db.session.execute(db.update(Property).where(Property.id == owner).values(updated_at=datetime.utcnow()))
+    db.session.commit()
+    if not recorded:
+        print(f"Video pipeline lost its claim on {model.__name__} {video_id}; result discarded")
+    return bool(recorded)
+
+def process_video(model, video_id, claimed_at):
+    """Render poster, preview, MP4 and WebM for one claimed video and record them; returns True when ready."""
+    video = db.session.get(model, video_id)
+    if video is None:
+        return False
+    workdir = tempfile.mkdtemp(prefix='video-')
+    try:
+        source = _fetch_source(video.video_url, workdir)
+        info = probe(source)
+        outputs = {}
+        for column, name, arguments in RENDITIONS:
+            target = os.path.join(workdir, name)
+            _run([current_app.config['FFMPEG_BINARY'], '-y', '-v', 'error'] + arguments(source, target, info))
+            outputs[column] = _store(target, name)
+        # Files of a discarded result are left to the media_gc job
+        return _record(model, video_id, claimed_at, **outputs, duration=info['duration'], width=info['width'],
+                       height=info['height'], status='ready', error=None, processed_at=datetime.utcnow())
+    except Exception as e:
+        db.session.rollback()
+        print(f"Video pipeline failed for {model.__name__} {video_id}: {e}")
+        _record(model, video_id, claimed_at, status='failed', error=f'{type(e).__name__}: {e}'[:2000])
+        return False
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def process_pending_videos(limit=None):
+    """
+    Render pending uploads one at a time until none are left (or limit is
+    reached). Returns the number processed. Without ffmpeg the videos stay
+    pending and their original upload is what templates play.
+    """
+    if not ffmpeg_available():
+        return 0
+    processed = 0
+    while limit is None or processed < limit:
+        claimed = None
+        for model in VIDEO_MODELS:
+            claim = _claim(model)
+            if claim is not None:
+                claimed = (model, *claim)
+                break
+        if claimed is None:
+            break
+        process_video(*claimed)
+        processed += 1
+    return processed
+
+_worker_lock = threading.Lock()
+
+def start_video_processing(app):
+    """
+    Work through pending videos in a daemon thread so uploads return
+    immediately; at most one such thread runs per process. Anything it misses
+    (serverless freeze, crash, VIDEO_PIPELINE_THREAD off) is picked up by the
+    process_videos scheduled job.
+    """
+    if not app.config['VIDEO_PIPELINE_THREAD'] or not _worker_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            with app.app_context():
+                process_pending_videos()
+                db.session.remove()
+        except Exception as e:
+            print(f"Video pipeline thread failed: {e}")
+        finally:
+            _worker_lock.release()
+
+    threading.Thread(target=run, name='video-pipeline', daemon=True).start()
+    return True
+
+def hero_video():
+    """Latest ready home page hero video, or None to fall back to the bundled one."""
+    return SiteVideo.query.filter_by(slot='hero', status='ready').order_by(SiteVideo.id.desc()).first()
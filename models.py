@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
+from collections import namedtuple
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from helpers.passwords import hash_password, verify_password, needs_rehash
 
 db = SQLAlchemy()
 
@@ -21,6 +24,7 @@ class Property(db.Model):
     featured = db.Column(db.Boolean, default=False)
     views = db.Column(db.Integer, default=0)
     shares = db.Column(db.Integer, default=0)
+    favorites_count = db.Column(db.Integer, default=0, server_default='0')  # kept in sync by toggle_favorite
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -30,34 +34,92 @@ class Property(db.Model):
     documents = db.relationship('PropertyDocument', backref='property', lazy=True, cascade='all, delete-orphan')
     favorites = db.relationship('Favorite', backref='property', lazy=True, cascade='all, delete-orphan')
     bookings = db.relationship('Booking', backref='property', lazy=True, cascade='all, delete-orphan')
+    price_history = db.relationship('PropertyPriceHistory', backref='property', lazy=True, cascade='all, delete-orphan',
+                                    order_by='PropertyPriceHistory.recorded_at')
+    alert_matches = db.relationship('AlertMatch', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Property {self.title}>'
 
+class PropertyPriceHistory(db.Model):
+    """One row per change of a property's price or status, written by record_property_changes."""
+    __tablename__ = 'property_price_history'
+    __table_args__ = (db.Index('ix_price_history_property_recorded', 'property_id', 'recorded_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(50))
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PropertyPriceHistory Property:{self.property_id} {self.price} {self.status}>'
+
 class PropertyImage(db.Model):
     __tablename__ = 'property_images'
     
     id = db.Column(db.Integer, primary_key=True)
     property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of uploaded files
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    # Tiny WebP data URI painted until the image loads; '' when it could not be computed
+    placeholder = db.Column(db.Text)
     is_primary = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<PropertyImage {self.id}>'
 
-class PropertyVideo(db.Model):
+class VideoRenditions:
+    """
+    Pipeline state and outputs of an uploaded video (helpers/video.py).
+    video_url is the original upload; status goes pending -> processing ->
+    ready or failed. Linked YouTube/Vimeo videos are 'ready' with no renditions.
+    """
+    status = db.Column(db.String(20), default='ready', server_default='ready', index=True)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the original upload
+    poster_url = db.Column(db.String(500))
+    preview_url = db.Column(db.String(500))  # short, muted, low-bitrate loop
+    mp4_url = db.Column(db.String(500))  # H.264/AAC with faststart
+    webm_url = db.Column(db.String(500))  # VP9/Opus
+    duration = db.Column(db.Float)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    processing_started_at = db.Column(db.DateTime)
+    processed_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+
+    @property
+    def is_upload(self):
+        return self.video_type == 'upload'
+
+class PropertyVideo(VideoRenditions, db.Model):
     __tablename__ = 'property_videos'
     
     id = db.Column(db.Integer, primary_key=True)
     property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
     video_url = db.Column(db.String(500), nullable=False)
-    video_type = db.Column(db.String(50), default='youtube')
+    video_type = db.Column(db.String(50), default='youtube')  # youtube, vimeo or upload
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<PropertyVideo {self.id}>'
 
+class SiteVideo(VideoRenditions, db.Model):
+    """Videos that belong to the site rather than a property, such as the home page hero."""
+    __tablename__ = 'site_videos'
+
+    id = db.Column(db.Integer, primary_key=True)
+    slot = db.Column(db.String(50), nullable=False, index=True)  # 'hero'
+    video_url = db.Column(db.String(500), nullable=False)
+    video_type = db.Column(db.String(50), default='upload')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SiteVideo {self.slot} {self.id}>'
+
 class PropertyDocument(db.Model):
     __tablename__ = 'property_documents'
     
@@ -66,7 +128,9 @@ class PropertyDocument(db.Model):
     document_name = db.Column(db.String(200), nullable=False)
     document_url = db.Column(db.String(500), nullable=False)
     document_type = db.Column(db.String(50), nullable=False)  # PDF, DOC, etc.
-    file_size = db.Column(db.String(20))
+    file_size = db.Column(db.String(20))  # display text of older rows, e.g. "1.2 MB"
+    size_bytes = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of uploaded files
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -105,10 +169,15 @@ class User(db.Model):
     bookings = db.relationship('Booking', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify the password; on success, upgrade a hash made with old settings (caller commits)."""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
     
     def __repr__(self):
         return f'<User {self.email}>'
@@ -129,17 +198,36 @@ class PropertyAlert(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    alert_type = db.Column(db.String(50), nullable=False)  # new_property, price_drop, etc.
+    alert_type = db.Column(db.String(50), nullable=False)  # new_property, price_drop, back_on_market
     property_type = db.Column(db.String(100))
     min_price = db.Column(db.Float)
     max_price = db.Column(db.Float)
     location = db.Column(db.String(200))
+    frequency = db.Column(db.String(20), default='instant', server_default='instant')  # instant, hourly, daily
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    matches = db.relationship('AlertMatch', backref='alert', lazy=True, cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f'<PropertyAlert {self.alert_type} for User:{self.user_id}>'
 
+class AlertMatch(db.Model):
+    """A match waiting for the next hourly or daily digest of its alert."""
+    __tablename__ = 'alert_matches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('property_alerts.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    event = db.Column(db.String(50), nullable=False)  # alert_type that matched
+    old_price = db.Column(db.Float)
+    old_status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AlertMatch {self.event} User:{self.user_id} Property:{self.property_id}>'
+
 class Booking(db.Model):
     __tablename__ = 'bookings'
     
@@ -156,9 +244,29 @@ class Booking(db.Model):
     status = db.Column(db.String(50), default='Pending')  # Pending, Confirmed, Cancelled, Completed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Occupied visit slot (removed when the booking is cancelled)
+    slot = db.relationship('BookingSlot', backref='booking', uselist=False, lazy=True, cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f'<Booking {self.id} - {self.visitor_name}>'
 
+class BookingSlot(db.Model):
+    __tablename__ = 'booking_slots'
+    # One active booking per property, day and time slot
+    __table_args__ = (
+        db.UniqueConstraint('property_id', 'slot_date', 'slot_time', name='uq_booking_slot'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, db.ForeignKey('properties.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), unique=True, nullable=False)
+    slot_date = db.Column(db.Date, nullable=False)
+    slot_time = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BookingSlot Property:{self.property_id} {self.slot_date} {self.slot_time}>'
+
 class Admin(db.Model):
     __tablename__ = 'admins'
     
@@ -169,10 +277,15 @@ class Admin(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify the password; on success, upgrade a hash made with old settings (caller commits)."""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
     
     def __repr__(self):
         return f'<Admin {self.username}>'
@@ -189,4 +302,169 @@ class ActivityLog(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<ActivityLog {self.action}>'
\ No newline at end of file
+        return f'<ActivityLog {self.action}>'
+
+class ScheduledJob(db.Model):
+    """Lease and last-run state of a periodic job, shared by every process running the scheduler."""
+    __tablename__ = 'scheduled_jobs'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    lease_owner = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_duration_ms = db.Column(db.Float)
+    last_status = db.Column(db.String(20))  # ok, failed
+    last_error = db.Column(db.Text)
+    run_count = db.Column(db.Integer, default=0, server_default='0')
+    failure_count = db.Column(db.Integer, default=0, server_default='0')
+    
+    def __repr__(self):
+        return f'<ScheduledJob {self.name}>'
+
+class JobRun(db.Model):
+    __tablename__ = 'job_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(100), nullable=False, index=True)
+    owner = db.Column(db.String(100))
+    started_at = db.Column(db.DateTime, nullable=False, index=True)
+    duration_ms = db.Column(db.Float)
+    status = db.Column(db.String(20))  # ok, failed
+    error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<JobRun {self.job_name} {self.status}>'
+
+class ImportJob(db.Model):
+    """Progress of a background property import, readable from every process."""
+    __tablename__ = 'import_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    format = db.Column(db.String(10))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    processed = db.Column(db.Integer, default=0)
+    inserted = db.Column(db.Integer, default=0)
+    updated = db.Column(db.Integer, default=0)
+    unchanged = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)  # JSON list of the first rejected rows
+    message = db.Column(db.Text)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status}>'
+
+class ServerSession(db.Model):
+    __tablename__ = 'sessions'
+    
+    # sha256 of the opaque id in the session cookie
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ServerSession user:{self.user_id}>'
+
+def add_missing_columns():
+    """
+    Add columns introduced after a table was first created. db.create_all() only
+    creates missing tables, and deployments ship a pre-built SQLite database.
+    Returns the added columns as 'table.column' names.
+    """
+    inspector = db.inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=db.engine.dialect)}'
+            if column.server_default is not None:
+                default = str(column.server_default.arg)
+                ddl += f' DEFAULT {default}' if default.lstrip('-').isdigit() else " DEFAULT '{}'".format(default.replace("'", "''"))
+            with db.engine.begin() as conn:
+                conn.execute(db.text(ddl))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+@event.listens_for(Session, 'before_flush')
+def touch_property_on_media_change(session, flush_context, instances):
+    """
+    Bump Property.updated_at when an image, video or document is added,
+    changed or removed, so HTTP cache validators built from it see the change.
+    """
+    now = datetime.utcnow()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, (PropertyImage, PropertyVideo, PropertyDocument)):
+            continue
+        with session.no_autoflush:
+            property = obj.property or (obj.property_id and session.get(Property, obj.property_id))
+        if property is not None and property not in session.deleted:
+            property.updated_at = now
+
+# (property_id, old_price, new_price, old_status, new_status); old values are None for new listings
+PropertyChange = namedtuple('PropertyChange', 'property_id old_price new_price old_status new_status')
+
+def note_property_changes(session, changes):
+    """
+    Record PropertyChange tuples for rows written with bulk statements, which
+    bypass the flush events below. Adds their history rows and queues them
+    for delivery after the transaction commits.
+    """
+    changes = [c for c in changes if c.old_price != c.new_price or c.old_status != c.new_status]
+    if not changes:
+        return
+    now = datetime.utcnow()
+    session.execute(db.insert(PropertyPriceHistory), [
+        {'property_id': c.property_id, 'price': c.new_price, 'status': c.new_status, 'recorded_at': now}
+        for c in changes
+    ])
+    session.info.setdefault('property_changes', []).extend(changes)
+
+@event.listens_for(Session, 'before_flush')
+def record_property_changes(session, flush_context, instances):
+    """Append a PropertyPriceHistory row whenever a property is created or its price or status changes."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Property):
+            continue
+        if obj in session.new:
+            old_price = old_status = None
+        else:
+            attrs = db.inspect(obj).attrs
+            price, status = attrs.price.history, attrs.status.history
+            if not price.has_changes() and not status.has_changes():
+                continue
+            old_price = price.deleted[0] if price.deleted else obj.price
+            old_status = status.deleted[0] if status.deleted else obj.status
+        session.add(PropertyPriceHistory(property=obj, price=obj.price, status=obj.status or 'Available'))
+        session.info.setdefault('pending_property_changes', []).append((obj, old_price, old_status))
+
+@event.listens_for(Session, 'after_flush')
+def _resolve_property_changes(session, flush_context):
+    # Ids of new properties exist only once the flush has run
+    for obj, old_price, old_status in session.info.pop('pending_property_changes', []):
+        session.info.setdefault('property_changes', []).append(
+            PropertyChange(obj.id, old_price, obj.price, old_status, obj.status))
+
+@event.listens_for(Session, 'after_commit')
+def _commit_property_changes(session):
+    changes = session.info.pop('property_changes', None)
+    if changes:
+        session.info.setdefault('committed_property_changes', []).extend(changes)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_property_changes(session):
+    session.info.pop('pending_property_changes', None)
+    session.info.pop('property_changes', None)
+
+def pop_committed_property_changes(session):
+    """Committed PropertyChange tuples not yet handed to alert delivery."""
+    return session.info.pop('committed_property_changes', [])
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Precompile all Jinja templates into the bytecode cache shipped with a deployment.
+
+Run at deploy time (e.g. `python precompile_templates.py && npx vercel`) with
+the same Python version as the target runtime; Jinja ignores cache files made
+by another Python version. The output is not committed; without it templates
+are compiled and cached on first use.
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from helpers.templating import precompile_templates
+
+def main():
+    directory = app.jinja_env.bytecode_cache.directory if app.jinja_env.bytecode_cache else None
+    if not directory:
+        print("❌ TEMPLATE_BYTECODE_CACHE is disabled; nothing to do.")
+        return 1
+    for name in os.listdir(directory):
+        if name.endswith('.jinja.cache'):
+            os.remove(os.path.join(directory, name))
+
+    started = time.perf_counter()
+    names = precompile_templates(app)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"✅ Compiled {len(names)} templates into {directory} in {elapsed:.0f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
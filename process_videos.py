@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Render posters, previews and web-optimized MP4/WebM versions of uploaded videos.
+
+    python process_videos.py                       # process every pending video and exit
+    python process_videos.py --hero drone.mp4      # make a local file the home page hero video
+    python process_videos.py --retry-failed        # queue failed videos again, then process
+    python process_videos.py --list                # show video status
+
+Uploads from the admin pages are normally processed in a background thread
+and by the process_videos scheduled job; this is for one-off runs and for
+setting the hero video from the command line. Needs ffmpeg and ffprobe on
+PATH (or FFMPEG_BINARY / FFPROBE_BINARY).
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.datastructures import FileStorage
+from app import app
+from models import db, PropertyVideo, SiteVideo
+from helpers.media import store_upload
+from helpers.video import ffmpeg_available, process_pending_videos, VIDEO_MODELS
+
+def list_videos():
+    for model in VIDEO_MODELS:
+        for video in model.query.filter(model.video_type == 'upload').order_by(model.id):
+            owner = f'property {video.property_id}' if model is PropertyVideo else video.slot
+            size = f'{video.width}x{video.height} {video.duration:.1f}s' if video.duration else ''
+            print(f"   {model.__name__:<13} #{video.id:<5} {owner:<14} {video.status:<10} {size} {video.error or ''}")
+
+def add_hero(path):
+    with open(path, 'rb') as f:
+        stored = store_upload(FileStorage(stream=f, filename=os.path.basename(path)), 'videos')
+    if stored is None:
+        return False
+    db.session.add(SiteVideo(slot='hero', video_url=stored.url, content_hash=stored.content_hash, status='pending'))
+    db.session.commit()
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hero', metavar='PATH', help='video file to use as the home page hero')
+    parser.add_argument('--retry-failed', action='store_true', help='queue videos that failed before')
+    parser.add_argument('--list', action='store_true', help='show uploaded videos and exit')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if args.list:
+            list_videos()
+            return 0
+        if not ffmpeg_available():
+            print(f"❌ {app.config['FFMPEG_BINARY']} / {app.config['FFPROBE_BINARY']} not found")
+            return 1
+        if args.hero:
+            if not add_hero(args.hero):
+                print(f"❌ Could not store {args.hero}")
+                return 1
+            print(f"📼 Queued {args.hero} as the hero video")
+        if args.retry_failed:
+            for model in VIDEO_MODELS:
+                model.query.filter_by(status='failed').update({'status': 'pending', 'error': None})
+            db.session.commit()
+
+        started = time.perf_counter()
+        processed = process_pending_videos()
+        failed = sum(model.query.filter_by(status='failed').count() for model in VIDEO_MODELS)
+    print(f"✅ Processed {processed} videos in {time.perf_counter() - started:.1f}s ({failed} failed in total)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Run the periodic jobs registered in app.py (SCHEDULED JOBS).
+
+    python run_scheduler.py                        # worker: poll for due jobs until stopped
+    python run_scheduler.py --once                 # run whatever is due and exit (cron)
+    python run_scheduler.py --job prune_activity_logs  # run one job now, even if not due
+    python run_scheduler.py --list                 # show last runs
+
+Any number of workers (and app processes with SCHEDULER_THREAD) can poll
+the same database; a lease row per job makes sure each run happens once.
+"""
+
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, scheduler
+
+def list_jobs():
+    with app.app_context():
+        for job in scheduler.status():
+            state = job['state']
+            last = f"{state.last_started_at:%Y-%m-%d %H:%M:%S} {state.last_status or 'running'} " \
+                   f"{state.last_duration_ms or 0:.0f} ms, {state.failure_count}/{state.run_count} failed" \
+                if state and state.last_started_at else 'never run'
+            print(f"   {job['name']:<24} every {job['every']:>6}s  {last}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='run the due jobs once and exit')
+    parser.add_argument('--job', choices=sorted(scheduler.jobs), help='run one job now and exit')
+    parser.add_argument('--list', action='store_true', help='show registered jobs and their last run')
+    args = parser.parse_args(argv)
+
+    # This process is the worker; an in-app polling thread would only duplicate it
+    scheduler.stop()
+    if args.list:
+        list_jobs()
+        return 0
+    if args.job:
+        status = scheduler.run_job(args.job, force=True)
+        print(f"{'✅' if status == 'ok' else '❌'} {args.job}: {status or 'leased by another process'}")
+        return 0 if status == 'ok' else 1
+    if args.once:
+        for name, status in scheduler.run_pending().items():
+            print(f"{'✅' if status == 'ok' else '❌'} {name}: {status}")
+        return 0
+
+    print(f"⏱  Scheduler {scheduler.owner} polling every {app.config['SCHEDULER_TICK_SECONDS']}s for "
+          f"{len(scheduler.jobs)} jobs (Ctrl+C to stop)")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
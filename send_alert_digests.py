@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Email the pending hourly or daily property alert digests.
+
+    python send_alert_digests.py --frequency hourly   # run from cron every hour
+    python send_alert_digests.py --frequency daily    # and once a day
+
+Each user gets one email covering all matches of their alerts with that
+frequency, sent over a single SMTP connection. Links in the emails use
+SITE_URL. run_scheduler.py runs the same digests as periodic jobs; this
+script is for setups that prefer plain cron.
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app
+from helpers.alerts import send_alert_digests, DIGEST_FREQUENCIES
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frequency', choices=DIGEST_FREQUENCIES, required=True)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    # url_for(_external=True) needs a request context
+    with app.test_request_context(base_url=app.config['SITE_URL']):
+        sent = send_alert_digests(args.frequency)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"✅ Sent {sent} {args.frequency} digest emails in {elapsed:.0f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
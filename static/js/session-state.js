@@ -0,0 +1,100 @@
+// ============================================
+// SESSION STATE FOR PRE-RENDERED PAGES
+// Pages written by export_static.py are identical for every visitor; this
+// fills in the per-visitor parts from /api/session
+// ============================================
+
+(function() {
+    const script = document.currentScript;
+    const FLASH_ICONS = {
+        success: 'fa-check-circle',
+        error: 'fa-exclamation-circle',
+        warning: 'fa-exclamation-triangle'
+    };
+
+    function showAuthVariant(state) {
+        const role = state.user ? 'user' : (state.admin ? 'admin' : 'guest');
+        document.querySelectorAll('[data-auth]').forEach(el => {
+            el.hidden = el.dataset.auth !== role;
+        });
+    }
+
+    function markFavorites(ids) {
+        const favorites = new Set(ids);
+        document.querySelectorAll('[data-favorite-id]').forEach(btn => {
+            const active = favorites.has(parseInt(btn.dataset.favoriteId));
+            btn.classList.toggle('active', active);
+            const icon = btn.querySelector('i');
+            if (icon) {
+                icon.classList.toggle('fas', active);
+                icon.classList.toggle('far', !active);
+            }
+        });
+    }
+
+    function fillForms(state) {
+        document.querySelectorAll('input[name="csrf_token"]').forEach(input => {
+            input.value = state.csrf_token;
+        });
+        if (state.user) {
+            document.querySelectorAll('[data-session-fill]').forEach(input => {
+                if (!input.value) input.value = state.user[input.dataset.sessionFill] || '';
+            });
+        }
+    }
+
+    function showMessages(messages) {
+        if (!messages.length) return;
+        const container = document.createElement('div');
+        container.className = 'flash-container';
+        messages.forEach(([category, text]) => {
+            const message = document.createElement('div');
+            message.className = 'flash-message flash-' + category;
+            const span = document.createElement('span');
+            const icon = document.createElement('i');
+            icon.className = 'fas ' + (FLASH_ICONS[category] || 'fa-info-circle');
+            span.append(icon, ' ' + text);
+            const close = document.createElement('button');
+            close.className = 'close-flash';
+            close.innerHTML = '<i class="fas fa-times"></i>';
+            close.addEventListener('click', () => message.remove());
+            message.append(span, close);
+            container.appendChild(message);
+        });
+        const navbar = document.getElementById('navbar');
+        document.body.insertBefore(container, navbar ? navbar.nextSibling : document.body.firstChild);
+    }
+
+    function countView() {
+        // Views of pre-rendered property pages are counted here instead of on the server
+        const badge = document.querySelector('[data-view-beacon]');
+        if (!badge) return;
+        fetch(badge.dataset.viewBeacon, {method: 'POST', credentials: 'same-origin'})
+            .then(r => r.ok ? r.json() : null)
+            .then(data => {
+                const count = badge.querySelector('[data-view-count]');
+                if (data && count) count.textContent = data.views;
+            })
+            .catch(() => {});
+    }
+
+    function load() {
+        fetch(script.dataset.sessionUrl, {credentials: 'same-origin', headers: {'Accept': 'application/json'}})
+            .then(r => r.ok ? r.json() : null)
+            .then(state => {
+                if (!state) return;
+                showAuthVariant(state);
+                markFavorites(state.favorite_ids);
+                fillForms(state);
+                showMessages(state.messages);
+            })
+            .catch(() => {});
+        countView();
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', load);
+    } else {
+        load();
+    }
+})();
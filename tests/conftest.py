@@ -0,0 +1,17 @@
+"""
+Configure the app before any test imports it: a throwaway database, in-memory
+sessions, no rate limits or HTTP caching, and no email.
+"""
+
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix='premiumestate-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['SESSION_BACKEND'] = 'memory'
+os.environ['RATELIMIT_ENABLED'] = 'false'
+os.environ['HTTP_CACHE_ENABLED'] = 'false'
+os.environ['MAIL_USERNAME'] = ''
+os.environ['MAIL_PASSWORD'] = ''
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
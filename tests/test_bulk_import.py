@@ -0,0 +1,74 @@
+"""
+An export re-imported into an emptied database restores the same
+properties, and importing it again changes nothing.
+
+    python -m pytest tests/test_bulk_import.py
+"""
+
+import os
+import tempfile
+import time
+
+import pytest
+from app import app
+from models import db, Property, PropertyImage, PropertyDocument
+from helpers.bulk import export_csv, export_jsonl, iter_properties, start_import, import_job_status
+
+def _create_properties():
+    for i in range(3):
+        property = Property(title=f'Import plot {i}', description='Corner plot with a clear title, road access and water supply.',
+                            property_type='Residential Plot', price=1500000 + i, area=1200 + i, location='Nashik', address='Test road',
+                            latitude=19.99 + i / 100 if i else None, longitude=73.78 if i else None,
+                            status='Available', featured=i == 0)
+        property.images = [PropertyImage(image_url=f'https://example.com/import/{i}-{n}.jpg', is_primary=n == 0)
+                           for n in range(2)]
+        property.documents = [PropertyDocument(document_name=f'Plan {i}', document_url=f'https://example.com/import/{i}.pdf',
+                                               document_type='PDF', size_bytes=2048)]
+        db.session.add(property)
+    db.session.commit()
+
+def _truncate():
+    for property in Property.query.all():
+        db.session.delete(property)
+    db.session.commit()
+
+def _import(path, fmt):
+    job_id = start_import(app, path, fmt)
+    for _ in range(200):
+        job = import_job_status(job_id)
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+        db.session.expire_all()
+    pytest.fail(f'Import {job_id} did not finish')
+
+def _dump(chunks, suffix):
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(chunks)
+    return path
+
+@pytest.mark.parametrize('fmt, export, suffix', [
+    ('jsonl', export_jsonl, '.jsonl'),
+    ('csv', export_csv, '.csv'),
+])
+def test_export_reimports_into_empty_database(fmt, export, suffix):
+    with app.app_context():
+        _truncate()
+        _create_properties()
+        exported = list(iter_properties())
+        path = _dump(export(), suffix)
+        again = _dump(export(), suffix)
+
+        _truncate()
+        job = _import(path, fmt)
+        assert (job['status'], job['inserted'], job['failed'], job['errors']) == ('completed', 3, 0, [])
+        restored = list(iter_properties())
+        if fmt == 'csv':
+            # CSV keeps document names and URLs only
+            for row in exported + restored:
+                row['documents'] = [(d['name'], d['url']) for d in row['documents']]
+        assert restored == exported
+
+        job = _import(again, fmt)
+        assert (job['status'], job['unchanged'], job['inserted'], job['updated']) == ('completed', 3, 0, 0)
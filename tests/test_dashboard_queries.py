@@ -0,0 +1,91 @@
+"""
+Pin the number of SQL statements of the user dashboard and its JSON
+endpoints, so lazy loads per favorite or booking cannot creep back in.
+
+    python -m pytest tests/test_dashboard_queries.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from app import app, perf
+from models import db, User, Property, PropertyImage, Favorite, Booking
+from helpers.dashboard import dashboard_cache
+
+# Statements per request, whatever the number of favorites and bookings
+EXPECTED_QUERIES = {
+    'user_dashboard': 8,
+    'api_user_favorites': 5,
+    'api_user_bookings': 5,
+}
+
+def _create_user(email, favorites, bookings):
+    user = User(name=email.split('@')[0], email=email, password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    for i in range(max(favorites, bookings)):
+        property = Property(title=f'{email} plot {i}', description='Test plot', property_type='Residential Plot',
+                            price=1000000 + i, area=1200, location='Pune', address='Test road')
+        property.images = [PropertyImage(image_url=f'https://example.com/{email}/{i}-{n}.jpg') for n in range(2)]
+        db.session.add(property)
+        db.session.flush()
+        if i < favorites:
+            db.session.add(Favorite(user_id=user.id, property_id=property.id))
+        if i < bookings:
+            db.session.add(Booking(user_id=user.id, property_id=property.id,
+                                   booking_date=datetime.utcnow() + timedelta(days=i + 1), booking_time='10:00 AM',
+                                   visitor_name=user.name, visitor_email=email, visitor_phone='9876543210'))
+    db.session.commit()
+    return user.id
+
+@pytest.fixture(scope='module')
+def users():
+    with app.app_context():
+        return {
+            'small': _create_user('small@example.com', favorites=2, bookings=1),
+            'large': _create_user('large@example.com', favorites=30, bookings=20),
+        }
+
+def _count_queries(user_id, url, endpoint):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    dashboard_cache.invalidate()
+    stats = perf.endpoints.get(endpoint)
+    before = stats.queries if stats else 0
+    response = client.get(url)
+    assert response.status_code == 200
+    return perf.endpoints[endpoint].queries - before
+
+@pytest.mark.parametrize('endpoint, url', [
+    ('user_dashboard', '/user/dashboard'),
+    ('api_user_favorites', '/api/user/favorites'),
+    ('api_user_bookings', '/api/user/bookings'),
+])
+def test_query_count_does_not_grow_with_rows(users, endpoint, url):
+    small = _count_queries(users['small'], url, endpoint)
+    large = _count_queries(users['large'], url, endpoint)
+    assert small == large == EXPECTED_QUERIES[endpoint]
+
+def test_cached_page_reuses_the_result(users):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = users['large']
+    dashboard_cache.invalidate()
+    first = client.get('/api/user/favorites').get_json()
+    queries = perf.endpoints['api_user_favorites'].queries
+    assert client.get('/api/user/favorites').get_json() == first
+    # Only the listing version is checked on a cache hit
+    assert perf.endpoints['api_user_favorites'].queries - queries == 1
+
+def test_property_edit_refreshes_cached_page(users):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = users['large']
+    dashboard_cache.invalidate()
+    first = client.get('/api/user/favorites').get_json()
+    with app.app_context():
+        property = db.session.get(Property, first['items'][0]['id'])
+        property.title = 'Renamed by an admin'
+        db.session.commit()
+    assert client.get('/api/user/favorites').get_json()['items'][0]['title'] == 'Renamed by an admin'